@@ -0,0 +1,125 @@
+"""CPU cost of building `_bulk` bodies: legacy str/join/encode path vs BulkBodyBuilder.
+
+No cluster is needed; bodies are built and dropped. Example:
+
+    python3 benchmarks/bench_bulk_body.py --size-mb 256
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import json
+import random
+import tempfile
+import time
+from ingest.bulk_body import BufferPool, BulkBodyBuilder, encode_action
+
+LEVELS = ["DEBUG", "INFO", "WARN", "ERROR"]
+COMPONENTS = ["auth", "payment", "database", "search", "frontend"]
+
+
+def generate_log(path, size_mb):
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, 'w') as f:
+        while written < target:
+            line = json.dumps({
+                "@timestamp": "2025-12-06T14:52:24.878567",
+                "level": random.choice(LEVELS),
+                "component": random.choice(COMPONENTS),
+                "message": "x" * random.randint(20, 200),
+                "response_time_ms": random.randint(1, 1000),
+                "user_id": random.randint(1, 10000),
+            }) + "\n"
+            f.write(line)
+            written += len(line)
+    return written
+
+
+def legacy_bodies(path, index_name, batch_size):
+    """The pre-builder code path: text read, json.dumps per doc, join, encode."""
+    bulk_data = []
+    count = 0
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            bulk_data.append(json.dumps({"index": {"_index": index_name}}))
+            bulk_data.append(line)
+            count += 1
+            if count % batch_size == 0:
+                body = ("\n".join(bulk_data) + "\n").encode('utf-8')
+                bulk_data = []
+                del body
+    if bulk_data:
+        body = ("\n".join(bulk_data) + "\n").encode('utf-8')
+        del body
+    return count
+
+
+def builder_bodies(path, index_name, batch_size):
+    builder = BulkBodyBuilder(encode_action(index_name), BufferPool(2))
+    count = 0
+    with open(path, 'rb') as f:
+        for raw_line in f:
+            if raw_line.isspace():
+                continue
+            builder.add(raw_line)
+            count += 1
+            if builder.docs >= batch_size:
+                builder.take().release()
+    if builder.docs:
+        builder.take().release()
+    return count
+
+
+def measure(fn, path, index_name, batch_size, size_bytes):
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    docs = fn(path, index_name, batch_size)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    gb = size_bytes / (1024 ** 3)
+    return {"docs": docs, "cpu_s": round(cpu, 3), "wall_s": round(wall, 3), "cpu_s_per_gb": round(cpu / gb, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk body construction")
+    parser.add_argument("--size-mb", type=int, default=128, help="Size of the synthetic log file (default: 128)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Documents per batch (default: 500)")
+    parser.add_argument("--file", help="Use an existing NDJSON log instead of generating one")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.file:
+        path = args.file
+        size_bytes = os.path.getsize(path)
+    else:
+        tmp = tempfile.NamedTemporaryFile(suffix=".log", delete=False)
+        tmp.close()
+        path = tmp.name
+        size_bytes = generate_log(path, args.size_mb)
+
+    try:
+        # Warm the page cache so both runs measure CPU, not disk.
+        with open(path, 'rb') as f:
+            while f.read(1 << 20):
+                pass
+        results = {
+            "size_mb": round(size_bytes / (1024 * 1024), 1),
+            "batch_size": args.batch_size,
+            "legacy": measure(legacy_bodies, path, "bench", args.batch_size, size_bytes),
+            "builder": measure(builder_bodies, path, "bench", args.batch_size, size_bytes),
+        }
+        legacy_cpu = results["legacy"]["cpu_s_per_gb"]
+        builder_cpu = results["builder"]["cpu_s_per_gb"]
+        results["cpu_reduction_pct"] = round(100 * (1 - builder_cpu / legacy_cpu), 1) if legacy_cpu else None
+        print(json.dumps(results, indent=2))
+    finally:
+        if tmp is not None:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
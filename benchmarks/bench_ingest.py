@@ -0,0 +1,261 @@
+"""End-to-end ingest throughput against an in-process stub `_bulk` server.
+
+Generates a synthetic log, starts a local stub cluster with configurable
+latency and rejection rate, and runs `ingest_logs` for every combination of
+batch size and worker count. Each cell runs in its own child process so CPU
+time and peak RSS belong to that cell alone. Example:
+
+    python3 benchmarks/bench_ingest.py --lines 200000 --batch-sizes 500,2000 --workers 1,4 --latency-ms 5
+
+Results (docs/sec, p50/p99 bulk latency, client CPU, peak RSS) are printed as
+JSON; `--out` also writes them to a file for comparison between runs.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import contextlib
+import gzip
+import json
+import random
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def generate_log(path, lines, line_bytes, fields, cardinality, seed=42):
+    """Write `lines` NDJSON docs of roughly `line_bytes` each.
+
+    Every doc has `fields` keyword fields whose values come from a vocabulary
+    of `cardinality` terms, plus a message padded to reach the target size.
+    """
+    rnd = random.Random(seed)
+    vocabulary = [f"term{i:06d}" for i in range(max(1, cardinality))]
+    written = 0
+    with open(path, 'w') as f:
+        for n in range(lines):
+            doc = {"@timestamp": f"2025-12-06T14:52:{n % 60:02d}.{n % 1000000:06d}"}
+            for i in range(fields):
+                doc[f"field_{i}"] = rnd.choice(vocabulary)
+            doc["value"] = rnd.randint(0, 1000000)
+            base = len(json.dumps(doc)) + len(', "message": ""') + 1
+            doc["message"] = "x" * max(0, line_bytes - base)
+            line = json.dumps(doc) + "\n"
+            f.write(line)
+            written += len(line)
+    return written
+
+
+class StubBulkServer:
+    """Minimal threaded `_bulk` endpoint: acks every item after a delay, rejecting some with 429."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, reject_rate=0.0, seed=7):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.reject_rate = reject_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.requests = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stub-bulk", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as two writes; without this, Nagle plus
+            # delayed ACK adds ~40 ms to every response and swamps the results.
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _read_body(self):
+                if self.headers.get("Transfer-Encoding") == "chunked":
+                    chunks = []
+                    while True:
+                        size = int(self.rfile.readline().strip(), 16)
+                        if size == 0:
+                            self.rfile.readline()
+                            break
+                        chunks.append(self.rfile.read(size))
+                        self.rfile.readline()
+                    body = b"".join(chunks)
+                else:
+                    body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                return body
+
+            def _reply(self, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self._read_body()
+                if not self.path.startswith("/_bulk"):
+                    return self._reply({"acknowledged": True})
+                docs = body.count(b"\n") // 2
+                with stub._random_lock:
+                    stub.requests += 1
+                    delay = stub.latency_ms + stub._random.uniform(0, stub.jitter_ms)
+                    rejected = [stub._random.random() < stub.reject_rate for _ in range(docs)]
+                if delay > 0:
+                    time.sleep(delay / 1000.0)
+                items = [
+                    {"index": {"status": 429, "error": {"type": "es_rejected_execution_exception", "reason": "stub"}}}
+                    if r else {"index": {"status": 201}}
+                    for r in rejected
+                ]
+                self._reply({"took": int(delay), "errors": any(rejected), "items": items})
+
+            def do_GET(self):
+                self._reply({})
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_cell(url, log_path, batch_size, workers, gzip_bodies, work_dir):
+    """Run one ingest in this process and return its measurements (called in the child)."""
+    import utils
+    utils.ES_HOST = url
+    # Keep checkpoints and dead letters of benchmark runs out of the repo.
+    utils.CONFIG["ingest_checkpoint_path"] = os.path.join(work_dir, "checkpoints.json")
+    utils.CONFIG["ingest_dead_letter_path"] = os.path.join(work_dir, "dead_letter.ndjson")
+    from ingest import ingest_logs
+
+    cpu_start = resource.getrusage(resource.RUSAGE_SELF)
+    wall_start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        stats = ingest_logs.ingest_logs(
+            "bench", workers=workers, batch_size=batch_size, batch_bytes=1 << 30,
+            gzip=gzip_bodies, paths=[log_path], readers=1,
+        )
+    wall = time.perf_counter() - wall_start
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (usage.ru_utime - cpu_start.ru_utime) + (usage.ru_stime - cpu_start.ru_stime)
+    p50 = stats.latency_percentile(50)
+    p99 = stats.latency_percentile(99)
+    return {
+        "batch_size": batch_size,
+        "workers": workers,
+        "docs": stats.docs,
+        "bulk_requests": stats.requests,
+        "retried_docs": sum(stats.retried.values()),
+        "failed_docs": sum(stats.failed.values()),
+        "wall_s": round(wall, 3),
+        "docs_per_sec": round(stats.docs / wall, 1) if wall else None,
+        "bulk_latency_p50_ms": round(p50, 2) if p50 is not None else None,
+        "bulk_latency_p99_ms": round(p99, 2) if p99 is not None else None,
+        "client_cpu_s": round(cpu, 3),
+        "client_cpu_s_per_1k_docs": round(cpu * 1000 / stats.docs, 4) if stats.docs else None,
+        # ru_maxrss is in KB on Linux.
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+    }
+
+
+def _int_list(text):
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest throughput against a local stub cluster")
+    parser.add_argument("--lines", type=int, default=100000, help="Documents in the synthetic log (default: 100000)")
+    parser.add_argument("--line-bytes", type=int, default=300, help="Approximate bytes per log line (default: 300)")
+    parser.add_argument("--fields", type=int, default=8, help="Keyword fields per document (default: 8)")
+    parser.add_argument("--cardinality", type=int, default=1000, help="Distinct values per keyword field (default: 1000)")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[500, 2000], help="Comma-separated batch sizes (default: 500,2000)")
+    parser.add_argument("--workers", type=_int_list, default=[1, 4], help="Comma-separated sender worker counts (default: 1,4)")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Stub latency per bulk request (default: 5)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra uniform random latency (default: 0)")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Share of items the stub rejects with 429 (default: 0)")
+    parser.add_argument("--gzip", action="store_true", help="gzip-compress bulk bodies")
+    parser.add_argument("--file", help="Use an existing NDJSON log instead of generating one")
+    parser.add_argument("--out", help="Also write the JSON results to this file")
+    parser.add_argument("--cell", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cell:
+        # Child mode: one matrix cell, JSON on stdout.
+        cell = json.loads(args.cell)
+        print(json.dumps(run_cell(**cell)))
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="bench_ingest_")
+    if args.file:
+        log_path = args.file
+        size_bytes = os.path.getsize(log_path)
+    else:
+        log_path = os.path.join(work_dir, "bench.log")
+        size_bytes = generate_log(log_path, args.lines, args.line_bytes, args.fields, args.cardinality)
+
+    stub = StubBulkServer(args.latency_ms, args.jitter_ms, args.reject_rate).start()
+    results = []
+    try:
+        for batch_size in args.batch_sizes:
+            for workers in args.workers:
+                cell = {"url": stub.url, "log_path": log_path, "batch_size": batch_size, "workers": workers,
+                        "gzip_bodies": args.gzip, "work_dir": work_dir}
+                child = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--cell", json.dumps(cell)],
+                    capture_output=True, text=True,
+                )
+                if child.returncode != 0:
+                    results.append({"batch_size": batch_size, "workers": workers, "error": child.stderr.strip()[-2000:]})
+                    continue
+                results.append(json.loads(child.stdout.strip().splitlines()[-1]))
+                print(f"batch_size={batch_size} workers={workers}: {results[-1]['docs_per_sec']} docs/sec", file=sys.stderr)
+    finally:
+        stub.stop()
+        for name in os.listdir(work_dir):
+            path = os.path.join(work_dir, name)
+            if path != args.file:
+                os.remove(path)
+        os.rmdir(work_dir)
+
+    report = {
+        "config": {
+            "lines": args.lines if not args.file else None,
+            "log_mb": round(size_bytes / (1024 * 1024), 1),
+            "line_bytes": args.line_bytes,
+            "fields": args.fields,
+            "cardinality": args.cardinality,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "reject_rate": args.reject_rate,
+            "gzip": args.gzip,
+            "python": sys.version.split()[0],
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Encode/decode cost of each installed JSON backend on Elasticsearch-shaped payloads.
+
+Builds four realistic payloads (a `_bulk` response, a `_nodes/stats`
+response, a `_cat/indices?format=json` listing and a page of search hits)
+and times `loads` and `dumps` with every backend utils can use. Example:
+
+    python3 benchmarks/bench_json_codec.py --docs 5000 --nodes 50 --indices 2000
+
+Results (MB/s and ms per call) are printed as JSON; `--out` also writes them to a file.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import json
+import random
+import time
+import utils
+
+
+def bulk_response(docs, rnd):
+    items = []
+    for n in range(docs):
+        if rnd.random() < 0.01:
+            item = {"_index": "logs-bench", "_id": f"doc-{n}", "status": 429,
+                    "error": {"type": "es_rejected_execution_exception", "reason": "rejected execution of coordinating operation"}}
+        else:
+            item = {"_index": "logs-bench", "_id": f"doc-{n}", "_version": 1, "result": "created",
+                    "_shards": {"total": 2, "successful": 2, "failed": 0}, "_seq_no": n, "_primary_term": 1, "status": 201}
+        items.append({"index": item})
+    return {"took": 42, "errors": True, "items": items}
+
+
+def nodes_stats(nodes, rnd):
+    def pool():
+        return {"threads": rnd.randint(1, 64), "queue": rnd.randint(0, 100), "active": rnd.randint(0, 64),
+                "rejected": rnd.randint(0, 1000), "largest": 64, "completed": rnd.randint(0, 10 ** 9)}
+
+    data = {}
+    for n in range(nodes):
+        data[f"nodeid{n:016d}"] = {
+            "name": f"es-data-{n}", "host": f"10.0.{n // 256}.{n % 256}", "roles": ["data", "ingest"],
+            "jvm": {"mem": {"heap_used_in_bytes": rnd.randint(1, 31) << 30, "heap_used_percent": rnd.randint(10, 90),
+                            "heap_max_in_bytes": 31 << 30},
+                    "gc": {"collectors": {"young": {"collection_count": rnd.randint(0, 10 ** 6), "collection_time_in_millis": rnd.randint(0, 10 ** 8)},
+                                          "old": {"collection_count": rnd.randint(0, 1000), "collection_time_in_millis": rnd.randint(0, 10 ** 6)}}}},
+            "os": {"cpu": {"percent": rnd.randint(0, 100), "load_average": {"1m": rnd.random() * 8, "5m": rnd.random() * 8, "15m": rnd.random() * 8}},
+                   "mem": {"used_percent": rnd.randint(10, 99), "total_in_bytes": 64 << 30}},
+            "thread_pool": {name: pool() for name in ("write", "search", "get", "management", "refresh", "flush", "force_merge", "snapshot")},
+            "breakers": {name: {"limit_size_in_bytes": 20 << 30, "estimated_size_in_bytes": rnd.randint(0, 10 ** 9),
+                                "overhead": 1.0, "tripped": rnd.randint(0, 5)}
+                         for name in ("request", "fielddata", "in_flight_requests", "parent")},
+            "indices": {"translog": {"operations": rnd.randint(0, 10 ** 6), "size_in_bytes": rnd.randint(0, 10 ** 9),
+                                     "uncommitted_operations": rnd.randint(0, 10 ** 5)},
+                        "indexing": {"index_total": rnd.randint(0, 10 ** 10), "index_time_in_millis": rnd.randint(0, 10 ** 9)},
+                        "search": {"query_total": rnd.randint(0, 10 ** 10), "query_time_in_millis": rnd.randint(0, 10 ** 9)}},
+        }
+    return {"_nodes": {"total": nodes, "successful": nodes, "failed": 0}, "cluster_name": "bench", "nodes": data}
+
+
+def cat_indices(indices, rnd):
+    return [
+        {"health": rnd.choice(("green", "green", "yellow")), "status": "open", "index": f"logs-2025.{n // 30 + 1:02d}.{n % 30 + 1:02d}-{n}",
+         "uuid": f"{rnd.getrandbits(96):024x}", "pri": "3", "rep": "1", "docs.count": str(rnd.randint(0, 10 ** 8)),
+         "docs.deleted": str(rnd.randint(0, 10 ** 5)), "store.size": str(rnd.randint(0, 10 ** 11)), "pri.store.size": str(rnd.randint(0, 10 ** 11))}
+        for n in range(indices)
+    ]
+
+
+def search_hits(docs, rnd):
+    hits = []
+    for n in range(docs):
+        source = {"@timestamp": f"2025-12-06T14:52:{n % 60:02d}.{n % 1000000:06d}Z", "level": rnd.choice(("INFO", "WARN", "ERROR")),
+                  "service": f"svc-{rnd.randint(0, 50)}", "host": {"name": f"host-{rnd.randint(0, 500)}", "ip": f"10.1.{n % 256}.{rnd.randint(0, 255)}"},
+                  "message": "request handled in %d ms (user=%s) – ok" % (rnd.randint(1, 5000), rnd.getrandbits(32)),
+                  "tags": ["prod", "eu-west-1"], "duration_ms": rnd.random() * 1000}
+        hits.append({"_index": "logs-bench", "_id": f"doc-{n}", "_score": None, "_source": source, "sort": [n, n * 7]})
+    return {"took": 12, "timed_out": False, "_shards": {"total": 3, "successful": 3, "skipped": 0, "failed": 0},
+            "pit_id": "x" * 200, "hits": {"total": {"value": 10000, "relation": "gte"}, "max_score": None, "hits": hits}}
+
+
+def _best_time(func, arg, repeat, min_seconds=0.2):
+    """Best per-call time over `repeat` rounds, each long enough to time reliably."""
+    calls = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(calls):
+            func(arg)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds / repeat or calls >= 1 << 20:
+            break
+        calls *= 2
+    best = elapsed / calls
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func(arg)
+        best = min(best, (time.perf_counter() - started) / calls)
+    return best
+
+
+def bench_backend(name, payloads, repeat):
+    try:
+        _name, loads, dumps = utils._load_json_backend(name)
+    except ImportError:
+        return {"backend": name, "skipped": "not installed"}
+    results = {"backend": name, "payloads": {}}
+    for label, obj in payloads.items():
+        encoded = dumps(obj)
+        if loads(encoded) != json.loads(encoded):
+            results["payloads"][label] = {"error": "decoded value differs from the standard library"}
+            continue
+        mb = len(encoded) / (1024 * 1024)
+        loads_s = _best_time(loads, encoded, repeat)
+        dumps_s = _best_time(dumps, obj, repeat)
+        results["payloads"][label] = {
+            "loads_ms": round(loads_s * 1000, 3),
+            "loads_mb_per_s": round(mb / loads_s, 1),
+            "dumps_ms": round(dumps_s * 1000, 3),
+            "dumps_mb_per_s": round(mb / dumps_s, 1),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSON backends on Elasticsearch-shaped payloads")
+    parser.add_argument("--docs", type=int, default=5000, help="Items in the bulk response and hits in the search page (default: 5000)")
+    parser.add_argument("--nodes", type=int, default=50, help="Nodes in the _nodes/stats response (default: 50)")
+    parser.add_argument("--indices", type=int, default=2000, help="Rows in the _cat/indices listing (default: 2000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing rounds per measurement; the best is kept (default: 5)")
+    parser.add_argument("--out", help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    payloads = {
+        "bulk_response": bulk_response(args.docs, rnd),
+        "nodes_stats": nodes_stats(args.nodes, rnd),
+        "cat_indices": cat_indices(args.indices, rnd),
+        "search_hits": search_hits(args.docs, rnd),
+    }
+    report = {
+        "config": {
+            "payload_mb": {label: round(len(json.dumps(obj).encode()) / (1024 * 1024), 2) for label, obj in payloads.items()},
+            "repeat": args.repeat,
+            "active_backend": utils.json_backend(),
+            "python": sys.version.split()[0],
+        },
+        "results": [bench_backend(name, payloads, args.repeat) for name in utils.JSON_BACKENDS],
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Cold-start cost of `ops.py` subcommands.
+
+Runs each command in a fresh interpreter several times and reports the wall
+time, then runs it once more under `-X importtime` to show what was imported
+and which modules cost the most. Commands run against an in-process stub
+cluster, so only client start-up is measured. Example:
+
+    python3 benchmarks/bench_startup.py --runs 20 --command "health" --command "indices list"
+
+With `--max-ms`, the script exits with status 1 if any command's median is
+slower, so it can guard start-up time in CI.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import json
+import shlex
+import statistics
+import subprocess
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OPS = os.path.join(ROOT, "ops.py")
+PROJECT_PACKAGES = ("utils", "monitor", "indices", "ingest", "search")
+
+# Runs ops.py as __main__ against the stub cluster given as argv[1].
+_LAUNCHER = (
+    "import sys, runpy\n"
+    "sys.path.insert(0, sys.argv[1])\n"
+    "import utils\n"
+    "utils.ES_HOST = sys.argv[2]\n"
+    "sys.argv = [sys.argv[3]] + sys.argv[4:]\n"
+    "runpy.run_path(sys.argv[0], run_name='__main__')\n"
+)
+
+
+def _child_argv(url, command, importtime=False):
+    flags = ["-X", "importtime"] if importtime else []
+    return [sys.executable] + flags + ["-c", _LAUNCHER, ROOT, url, OPS] + shlex.split(command)
+
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us)] from `-X importtime` output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            modules.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return modules
+
+
+def bench_command(url, command, runs, top):
+    wall_ms = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(_child_argv(url, command), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=ROOT)
+        wall_ms.append((time.perf_counter() - started) * 1000)
+
+    child = subprocess.run(_child_argv(url, command, importtime=True), stdout=subprocess.DEVNULL,
+                           stderr=subprocess.PIPE, text=True, cwd=ROOT)
+    modules = parse_importtime(child.stderr)
+    return {
+        "command": command,
+        "wall_ms_min": round(min(wall_ms), 1),
+        "wall_ms_median": round(statistics.median(wall_ms), 1),
+        "import_ms_total": round(sum(self_us for _, self_us, _ in modules) / 1000, 1),
+        "modules_imported": len(modules),
+        "project_modules": sorted(name for name, _, _ in modules if name.split(".")[0] in PROJECT_PACKAGES),
+        "slowest_imports_self_ms": [
+            [name, round(self_us / 1000, 2)]
+            for name, self_us, _ in sorted(modules, key=lambda m: m[1], reverse=True)[:top]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ops.py cold start per subcommand")
+    parser.add_argument("--command", action="append", help="ops.py arguments to time, e.g. 'health' (repeatable; default: --help, health, translog)")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per command (default: 10)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list per command (default: 10)")
+    parser.add_argument("--max-ms", type=float, help="Exit with status 1 if a command's median wall time is above this")
+    parser.add_argument("--out", help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    from benchmarks.bench_ingest import StubBulkServer
+    commands = args.command or ["--help", "health", "translog"]
+    stub = StubBulkServer().start()
+    try:
+        baseline = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"])
+            baseline.append((time.perf_counter() - started) * 1000)
+        results = [bench_command(stub.url, command, max(1, args.runs), args.top) for command in commands]
+    finally:
+        stub.stop()
+
+    report = {
+        "config": {
+            "runs": args.runs,
+            "python": sys.version.split()[0],
+            "bare_interpreter_ms_median": round(statistics.median(baseline), 1),
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(output + "\n")
+    if args.max_ms is not None:
+        slow = [r["command"] for r in results if r["wall_ms_median"] > args.max_ms]
+        if slow:
+            print(f"Median start-up above {args.max_ms:g} ms for: {', '.join(slow)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
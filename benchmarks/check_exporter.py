@@ -0,0 +1,231 @@
+"""End-to-end check of the OpenMetrics exporter against an in-process stub cluster.
+
+Starts a stub serving `_nodes/stats`, `_cat/master` and `_cluster/health`,
+then checks the exposition three ways: one scrape of `/metrics` through the
+exporter's own HTTP handler, a refresh while the stub fails (`es_exporter_up`
+must drop to 0 and the last good metrics must stay), and `monitor/exporter.py
+--once` in a fresh interpreter. Example:
+
+    python3 benchmarks/check_exporter.py
+
+Prints one line per check and exits with status 1 if any of them failed, so
+it can run in CI.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import json
+import subprocess
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import utils
+from monitor import exporter, node_stats
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXPORTER = os.path.join(ROOT, "monitor", "exporter.py")
+
+# Families a healthy refresh must expose.
+EXPECTED_FAMILIES = (
+    "es_cluster_status",
+    "es_cluster_number_of_nodes",
+    "es_cluster_unassigned_shards",
+    "es_cluster_number_of_pending_tasks",
+    "es_node_heap_used_percent",
+    "es_node_cpu_percent",
+    "es_node_is_master",
+    "es_thread_pool_queue",
+    "es_thread_pool_rejected",
+    "es_breaker_tripped",
+    "es_translog_uncommitted_operations",
+    "es_indexing_index",
+    "es_exporter_up",
+    "es_exporter_refresh_errors",
+)
+
+# Runs exporter.py as __main__ against the stub cluster, without touching the
+# node stats disk cache.
+_LAUNCHER = (
+    "import sys, runpy\n"
+    "sys.path.insert(0, sys.argv[1])\n"
+    "import utils\n"
+    "utils.ES_HOST = sys.argv[2]\n"
+    "from monitor import node_stats\n"
+    "node_stats.CACHE_PATH = None\n"
+    "sys.argv = [sys.argv[3]] + sys.argv[4:]\n"
+    "runpy.run_path(sys.argv[0], run_name='__main__')\n"
+)
+
+
+def nodes_stats(nodes):
+    data = {}
+    for n in range(nodes):
+        data[f"node{n}"] = {
+            "name": f"es-data-{n}", "host": f"10.0.0.{n}", "roles": ["data", "master"],
+            "jvm": {"mem": {"heap_used_percent": 40 + n}},
+            "os": {"cpu": {"percent": 10 + n, "load_average": {"1m": 1.5}}, "mem": {"used_percent": 70}},
+            "thread_pool": {"write": {"active": 1, "queue": n, "rejected": 5 * n},
+                            "search": {"active": 0, "queue": 0, "rejected": 0}},
+            "breakers": {"parent": {"tripped": n, "estimated_size_in_bytes": 1 << 20, "limit_size_in_bytes": 1 << 30}},
+            "indices": {"translog": {"size_in_bytes": 1024, "operations": 10, "uncommitted_operations": 3},
+                        "indexing": {"index_total": 1000 * (n + 1)}, "search": {"query_total": 50}},
+        }
+    return {"nodes": data}
+
+
+class StubCluster:
+    """Minimal threaded cluster answering the exporter's three requests; every request fails with 503 while `fail` is set."""
+
+    def __init__(self, nodes=3):
+        self.responses = {
+            "/_nodes/stats": nodes_stats(nodes),
+            "/_cat/master": [{"id": "node0"}],
+            "/_cluster/health": {"cluster_name": "stub", "status": "yellow", "number_of_nodes": nodes,
+                                 "active_shards": 10, "relocating_shards": 0, "initializing_shards": 0,
+                                 "unassigned_shards": 2, "number_of_pending_tasks": 1},
+        }
+        self.fail = False
+        self.requests = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stub-cluster", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                stub.requests += 1
+                path = self.path.split("?", 1)[0]
+                data = next((value for prefix, value in stub.responses.items() if path.startswith(prefix)), None)
+                if stub.fail:
+                    status, body = 503, b'{"error":"stub failure"}'
+                elif data is None:
+                    status, body = 404, b'{"error":"not found"}'
+                else:
+                    status, body = 200, json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def parse_exposition(text):
+    """Return ({family: type}, {sample: value}) from OpenMetrics text."""
+    families = {}
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ", 3)
+            families[name] = kind
+        elif line and not line.startswith("#"):
+            sample, value = line.rsplit(" ", 1)
+            samples[sample] = float(value)
+    return families, samples
+
+
+class Checks:
+    def __init__(self):
+        self.failed = 0
+
+    def expect(self, ok, description):
+        print(f"{'ok  ' if ok else 'FAIL'} {description}")
+        if not ok:
+            self.failed += 1
+
+
+def check_exposition(checks, label, text, up):
+    families, samples = parse_exposition(text)
+    checks.expect(text.endswith("# EOF\n"), f"{label}: exposition ends with '# EOF'")
+    missing = [name for name in EXPECTED_FAMILIES if name not in families]
+    checks.expect(not missing, f"{label}: all expected metric families present" + (f" (missing {', '.join(missing)})" if missing else ""))
+    checks.expect(samples.get("es_exporter_up") == up, f"{label}: es_exporter_up is {up}")
+    checks.expect(samples.get("es_cluster_status") == 1, f"{label}: es_cluster_status is 1 (yellow)")
+    checks.expect(samples.get('es_node_heap_used_percent{node="es-data-2"}') == 42,
+                  f"{label}: per-node heap sample carries the stub value")
+    checks.expect(samples.get('es_node_is_master{node="es-data-0"}') == 1, f"{label}: elected master is flagged")
+    checks.expect(samples.get('es_thread_pool_rejected_total{node="es-data-1",pool="write"}') == 5,
+                  f"{label}: counters use the _total suffix")
+    return samples
+
+
+def scrape(url):
+    with urllib.request.urlopen(url) as response:
+        return response.headers.get("Content-Type", ""), response.read().decode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the OpenMetrics exporter against an in-process stub cluster")
+    parser.add_argument("--nodes", type=int, default=3, help="Nodes in the stub cluster (default: 3)")
+    args = parser.parse_args()
+
+    checks = Checks()
+    stub = StubCluster(max(3, args.nodes)).start()
+    utils.ES_HOST = stub.url
+    node_stats.CACHE_PATH = None
+    cache = exporter.MetricsCache(interval=3600)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), exporter._make_handler(cache))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="exporter", daemon=True).start()
+    metrics_url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    try:
+        checks.expect(cache.refresh(), "refresh against a healthy stub succeeds")
+        content_type, text = scrape(metrics_url)
+        checks.expect(content_type == exporter.CONTENT_TYPE, "scrape: OpenMetrics content type")
+        check_exposition(checks, "scrape", text, up=1)
+
+        requests = stub.requests
+        for _ in range(5):
+            scrape(metrics_url)
+        checks.expect(stub.requests == requests, "scrapes are served from the cache, not the cluster")
+
+        stub.fail = True
+        print("(the stub now fails every request; the HTTP 503 errors below are expected)")
+        checks.expect(not cache.refresh(), "refresh against a failing stub reports failure")
+        _, text = scrape(metrics_url)
+        samples = check_exposition(checks, "after failure", text, up=0)
+        checks.expect(samples.get("es_exporter_refresh_errors_total") == 1, "after failure: es_exporter_refresh_errors_total is 1")
+
+        stub.fail = False
+        checks.expect(cache.refresh(), "refresh recovers once the stub answers again")
+        _, text = scrape(metrics_url)
+        check_exposition(checks, "recovered", text, up=1)
+
+        child = subprocess.run([sys.executable, "-c", _LAUNCHER, ROOT, stub.url, EXPORTER, "--once"],
+                               capture_output=True, text=True, cwd=ROOT)
+        checks.expect(child.returncode == 0, "exporter.py --once exits with status 0")
+        check_exposition(checks, "--once", child.stdout, up=1)
+    finally:
+        server.shutdown()
+        server.server_close()
+        stub.stop()
+
+    print(f"{checks.failed} check(s) failed." if checks.failed else "All checks passed.")
+    if checks.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
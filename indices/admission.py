@@ -0,0 +1,189 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils
+import argparse
+import threading
+import time
+from collections import namedtuple
+
+
+def _coerce_float(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _as_bool(value, default):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in {"true", "false"}:
+        return value.strip().lower() == "true"
+    return default
+
+
+def _get_admission_config():
+    section = utils.CONFIG.get("admission_control", {})
+    return section if isinstance(section, dict) else {}
+
+
+GO = "go"
+SLOW = "slow"
+PAUSE = "pause"
+
+# Limits per signal. Reaching `slow` delays each operation, reaching `pause`
+# holds them until every signal is back at or below `resume` (hysteresis, so a
+# queue hovering around the limit doesn't flap between pause and go).
+Thresholds = namedtuple("Thresholds", "slow pause resume")
+Sample = namedtuple("Sample", "pending_tasks oldest_task_ms master_ms")
+
+_cfg = _get_admission_config()
+ENABLED = _as_bool(_cfg.get("enabled", True), True)
+# How long a cluster sample is reused before the next probe.
+CHECK_INTERVAL = max(0.1, _coerce_float(_cfg.get("check_interval_seconds", 1), 1.0))
+SLOW_DELAY = max(0.0, _coerce_float(_cfg.get("slow_delay_seconds", 1), 1.0))
+# After this long paused an operation is given up on (not sent).
+MAX_PAUSE = max(0.0, _coerce_float(_cfg.get("max_pause_seconds", 600), 600.0))
+PENDING_TASKS = Thresholds(
+    _coerce_float(_cfg.get("slow_pending_tasks", 20), 20.0),
+    _coerce_float(_cfg.get("pause_pending_tasks", 100), 100.0),
+    _coerce_float(_cfg.get("resume_pending_tasks", 10), 10.0),
+)
+TASK_AGE_MS = Thresholds(
+    _coerce_float(_cfg.get("slow_task_age_ms", 5000), 5000.0),
+    _coerce_float(_cfg.get("pause_task_age_ms", 30000), 30000.0),
+    _coerce_float(_cfg.get("resume_task_age_ms", 2000), 2000.0),
+)
+MASTER_LATENCY_MS = Thresholds(
+    _coerce_float(_cfg.get("slow_master_latency_ms", 1000), 1000.0),
+    _coerce_float(_cfg.get("pause_master_latency_ms", 5000), 5000.0),
+    _coerce_float(_cfg.get("resume_master_latency_ms", 500), 500.0),
+)
+
+
+def probe():
+    """Sample the master's queue and responsiveness; None if the cluster could not be reached.
+
+    `_cluster/health` is answered by the elected master and reports the same
+    pending-task count as `_cluster/pending_tasks` plus the age of the oldest
+    task, without listing the (possibly huge) queue. Its round trip doubles as
+    the master latency.
+    """
+    started = time.monotonic()
+    data = utils.make_request("_cluster/health?filter_path=number_of_pending_tasks,task_max_waiting_in_queue_millis")
+    if data is None:
+        return None
+    return Sample(
+        pending_tasks=data.get('number_of_pending_tasks', 0),
+        oldest_task_ms=data.get('task_max_waiting_in_queue_millis', 0),
+        master_ms=(time.monotonic() - started) * 1000,
+    )
+
+
+def classify(sample, previous=GO):
+    """Next state for `sample`, given the current state."""
+    signals = (
+        (sample.pending_tasks, PENDING_TASKS),
+        (sample.oldest_task_ms, TASK_AGE_MS),
+        (sample.master_ms, MASTER_LATENCY_MS),
+    )
+    if any(value >= limits.pause for value, limits in signals):
+        return PAUSE
+    if previous == PAUSE and any(value > limits.resume for value, limits in signals):
+        return PAUSE
+    if any(value >= limits.slow for value, limits in signals):
+        return SLOW
+    return GO
+
+
+def _describe(sample):
+    return (f"{sample.pending_tasks} pending task(s), oldest {sample.oldest_task_ms / 1000:.1f}s, "
+            f"master answered in {sample.master_ms:.0f} ms")
+
+
+class AdmissionController:
+    """Shared gate in front of cluster-state-changing requests.
+
+    Every caller goes through `admit()` before sending a create/delete/open/
+    close, mapping or settings change. The cluster is probed at most once per
+    `check_interval` however many threads are waiting, and the state moves
+    between go, slow (operations are let through one at a time, at most one
+    per max(slow_delay, check_interval)) and pause (operations wait until the
+    master has drained its queue).
+    """
+
+    def __init__(self, enabled=ENABLED, check_interval=CHECK_INTERVAL, slow_delay=SLOW_DELAY, max_pause=MAX_PAUSE):
+        self.enabled = enabled
+        self.check_interval = check_interval
+        self.slow_delay = slow_delay
+        self.max_pause = max_pause
+        self.state = GO
+        self.sample = None
+        self._checked = None
+        self._lock = threading.Lock()
+        # Held across the delay while slow, so concurrent callers go one by one.
+        self._slow_lock = threading.Lock()
+
+    def _refresh(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._checked is not None and now - self._checked < self.check_interval:
+                return self.state
+            sample = probe()
+            self._checked = time.monotonic()
+            if sample is None:
+                # Unreachable: let the operation itself fail and report the error.
+                return GO
+            state = classify(sample, self.state)
+            if state != self.state:
+                if state == PAUSE:
+                    print(f"Admission control: pausing cluster-state changes ({_describe(sample)}).")
+                elif state == SLOW:
+                    print(f"Admission control: slowing cluster-state changes ({_describe(sample)}).")
+                else:
+                    print(f"Admission control: resuming at full speed ({_describe(sample)}).")
+            self.state = state
+            self.sample = sample
+            return state
+
+    def admit(self, operation=None):
+        """Block until the cluster can take another state change. False if it stayed paused past max_pause."""
+        if not self.enabled:
+            return True
+        deadline = time.monotonic() + self.max_pause
+        while True:
+            state = self._refresh()
+            if state == GO:
+                return True
+            if state == SLOW:
+                with self._slow_lock:
+                    # The state may have changed while this caller queued for its turn.
+                    if self._refresh() == SLOW:
+                        time.sleep(max(self.slow_delay, self.check_interval))
+                        return True
+                continue
+            if time.monotonic() >= deadline:
+                print(f"Admission control: cluster still busy after {self.max_pause:g}s; "
+                      f"not sending {operation or 'the operation'}.")
+                return False
+            time.sleep(min(self.check_interval, max(0.0, deadline - time.monotonic())))
+
+
+CONTROLLER = AdmissionController()
+
+
+def admit(operation=None):
+    """Wait for the shared controller to admit one cluster-state change."""
+    return CONTROLLER.admit(operation)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show what admission control would do right now.")
+    parser.parse_args()
+
+    sample = probe()
+    if sample is None:
+        print("Could not reach the cluster.")
+    else:
+        print(f"{_describe(sample)} -> {classify(sample)}")
@@ -0,0 +1,337 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils
+import argparse
+import fnmatch
+import http.client
+import queue
+import threading
+import time
+import zlib
+from collections import namedtuple
+from indices import admission, create_update_index
+
+
+def _coerce_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _coerce_float(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _get_bulk_admin_config():
+    section = utils.CONFIG.get("bulk_admin", {})
+    return section if isinstance(section, dict) else {}
+
+
+_cfg = _get_bulk_admin_config()
+# Multi-index requests in flight at once.
+CONCURRENCY = max(1, _coerce_int(_cfg.get("concurrency", 2), 2))
+# Requests started per second across all workers (0 = unlimited). Every call is
+# a cluster-state update on the master, so this keeps pending tasks from piling up.
+REQUESTS_PER_SECOND = max(0.0, _coerce_float(_cfg.get("requests_per_second", 2), 2.0))
+MAX_INDICES_PER_REQUEST = max(1, _coerce_int(_cfg.get("max_indices_per_request", 500), 500))
+# Budget for the comma-joined names in the request line; ES rejects request
+# lines over http.max_initial_line_length (4 KB by default).
+MAX_NAMES_BYTES = max(256, _coerce_int(_cfg.get("max_names_bytes", 3500), 3500))
+
+# method, path ("{}" = comma-joined names), payload builder, index states it
+# applies to, and verbs for the prompt and progress lines.
+BulkAction = namedtuple("BulkAction", "method path payload statuses verb past")
+
+ACTIONS = {
+    "delete": BulkAction("DELETE", "{}", None, ("open", "close"), "DELETE", "Deleted"),
+    "close": BulkAction("POST", "{}/_close", None, ("open",), "close", "Closed"),
+    "open": BulkAction("POST", "{}/_open", None, ("close",), "open", "Opened"),
+    "update-settings": BulkAction("PUT", "{}/_settings", create_update_index.update_settings_payload,
+                                  ("open", "close"), "update the settings of", "Updated settings of"),
+    # Mappings can only be changed on open indices.
+    "update-mapping": BulkAction("PUT", "{}/_mapping", create_update_index.update_mapping_payload,
+                                 ("open",), "update the mapping of", "Updated mapping of"),
+}
+
+
+def read_names_file(path):
+    """Index names or patterns from a file, one per line (# comments and blank lines skipped)."""
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _list_indices(pattern="*"):
+    """Stream `_cat/indices` into [(name, status)]; None on failure."""
+    lines = utils.stream_request(f"_cat/indices/{pattern}?h=index,status&expand_wildcards=open,closed")
+    if lines is None:
+        return None
+    indices = []
+    try:
+        for line in lines:
+            fields = line.split()
+            if len(fields) == 2:
+                indices.append((fields[0].decode(), fields[1].decode()))
+    except (OSError, http.client.HTTPException, zlib.error) as e:
+        print(f"Error reading the index list: {e}")
+        return None
+    return indices
+
+
+def split_selectors(pattern):
+    """Comma-separated names/patterns as a list, e.g. 'logs-a,logs-b*' -> ['logs-a', 'logs-b*']."""
+    return [part.strip() for part in pattern.split(",") if part.strip()]
+
+
+def expand_targets(action, pattern=None, names=None):
+    """Resolve a pattern or a list of names/patterns to the indices `action` applies to.
+
+    `pattern` may be comma-separated like any ES index expression; each part
+    is matched on its own, and parts starting with '-' exclude what they match.
+    One `_cat/indices` request does the expansion. Dot-prefixed (system)
+    indices are only included when a selector itself starts with a dot.
+    Returns (targets, unmatched selectors), or None if the cluster could not be read.
+    """
+    spec = ACTIONS[action]
+    selectors = names if names is not None else split_selectors(pattern)
+    excludes = [selector[1:] for selector in selectors if selector.startswith("-")]
+    selectors = [selector for selector in selectors if not selector.startswith("-")]
+    # A single pattern is filtered server-side; anything else is matched against the full listing.
+    indices = _list_indices(selectors[0] if len(selectors) == 1 and not excludes else "*")
+    if indices is None:
+        return None
+
+    targets = []
+    seen = set()
+    matched = set()
+    for name, status in indices:
+        for selector in selectors:
+            if name == selector or fnmatch.fnmatchcase(name, selector):
+                matched.add(selector)
+                if name.startswith(".") and not selector.startswith("."):
+                    continue
+                if any(fnmatch.fnmatchcase(name, exclude) for exclude in excludes):
+                    continue
+                if status in spec.statuses and name not in seen:
+                    seen.add(name)
+                    targets.append(name)
+    targets.sort()
+    return targets, [selector for selector in selectors if selector not in matched]
+
+
+def chunk_names(names, max_count=MAX_INDICES_PER_REQUEST, max_bytes=MAX_NAMES_BYTES):
+    """Split names into comma-joined groups within the per-request count and length limits."""
+    chunks = []
+    current = []
+    size = 0
+    for name in names:
+        extra = len(name.encode("utf-8")) + (1 if current else 0)
+        if current and (len(current) >= max_count or size + extra > max_bytes):
+            chunks.append(current)
+            current, size, extra = [], 0, len(name.encode("utf-8"))
+        current.append(name)
+        size += extra
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            slot = max(time.monotonic(), self._next)
+            self._next = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _NotAdmitted(Exception):
+    pass
+
+
+class _BulkRun:
+    """Worker pool for one bulk action.
+
+    Jobs are groups of index names. A multi-index request that fails is split
+    into single-index jobs, so one bad index doesn't fail the whole group and
+    the error is attributed to the right index.
+    """
+
+    def __init__(self, action, concurrency, limiter, total_requests):
+        self.spec = ACTIONS[action]
+        self.payload = self.spec.payload() if self.spec.payload else None
+        self.limiter = limiter
+        self.total_requests = total_requests
+        self.requests = 0
+        self.succeeded = 0
+        self.failed = {}
+        self._gave_up = False
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        utils.ensure_pool_size(concurrency)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"bulk-admin-{i}", daemon=True) for i in range(concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _call(self, names):
+        self.limiter.wait()
+        # Once the cluster stayed busy past admission control's limit, skip the rest.
+        if self._gave_up or not admission.admit(f"{self.spec.method} for {len(names)} index(es)"):
+            self._gave_up = True
+            raise _NotAdmitted()
+        data = utils.make_request(self.spec.path.format(",".join(names)), method=self.spec.method, data=self.payload)
+        if not data or not data.get('acknowledged'):
+            return None
+        # _close reports per index; an index that didn't close is a failure.
+        closed = data.get('indices') if isinstance(data.get('indices'), dict) else {}
+        return [name for name in names if closed.get(name, {}).get('closed', True) is False]
+
+    def _run(self):
+        while True:
+            names = self._queue.get()
+            try:
+                if names is None:
+                    return
+                try:
+                    not_done = self._call(names)
+                except _NotAdmitted:
+                    with self._lock:
+                        for name in names:
+                            self.failed[name] = "not sent: cluster busy (admission control)"
+                    continue
+                except Exception as e:
+                    print(f"Error calling {self.spec.method} {self.spec.path.format('...')}: {e}")
+                    not_done = None
+                with self._lock:
+                    self.requests += 1
+                    if not_done is None and len(names) > 1:
+                        # Retry the group one index at a time to isolate the failures.
+                        self.total_requests += len(names)
+                        for name in names:
+                            self._queue.put([name])
+                        print(f"Request for {len(names)} indices failed; retrying them one by one.")
+                        continue
+                    failures = names if not_done is None else not_done
+                    for name in failures:
+                        self.failed[name] = "request failed" if not_done is None else "not closed"
+                    done = len(names) - len(failures)
+                    self.succeeded += done
+                    # Single-index retries are only summarized at the end.
+                    if done and len(names) > 1:
+                        print(f"{self.spec.past} {done} index(es) ({self.requests}/{self.total_requests} requests).")
+            finally:
+                self._queue.task_done()
+
+    def submit(self, names):
+        self._queue.put(names)
+
+    def close(self):
+        self._queue.join()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+
+def _preview(names, head=5, tail=2):
+    if len(names) <= head + tail:
+        return ", ".join(names)
+    return ", ".join(names[:head]) + f", ... ({len(names) - head - tail} more) ..., " + ", ".join(names[-tail:])
+
+
+def run_bulk_action(action, pattern=None, names_file=None, assume_yes=False,
+                    concurrency=CONCURRENCY, rate=REQUESTS_PER_SECOND):
+    """Apply `action` to every index matching `pattern` or listed in `names_file`.
+
+    Targets are expanded once, grouped into comma-separated multi-index
+    requests, and sent by a bounded worker pool at most `rate` requests per
+    second. One summarized confirmation covers the whole run. Returns
+    (succeeded, {index: reason}) or None if nothing was run.
+    """
+    if action not in ACTIONS:
+        print(f"Error: '{action}' cannot be applied to a pattern or list (supported: {', '.join(ACTIONS)}).")
+        return None
+    if names_file:
+        try:
+            names = read_names_file(names_file)
+        except OSError as e:
+            print(f"Error: Cannot read {names_file}: {e}")
+            return None
+        selector = names_file
+    else:
+        names = None
+        selector = pattern
+        if not pattern:
+            print("Error: Specify --pattern or --from-file.")
+            return None
+    if action == "delete" and any(s in ("*", "_all") for s in (names if names is not None else split_selectors(pattern))):
+        print("Error: Refusing to delete every index; use a narrower pattern.")
+        return None
+
+    expanded = expand_targets(action, pattern, names)
+    if expanded is None:
+        print("Could not list indices.")
+        return None
+    targets, unmatched = expanded
+    if unmatched:
+        print(f"Warning: {len(unmatched)} name(s)/pattern(s) matched no index: {_preview(unmatched)}")
+    if not targets:
+        print(f"No {'/'.join(ACTIONS[action].statuses)} indices match '{selector}'; nothing to do.")
+        return 0, {}
+
+    chunks = chunk_names(targets)
+    concurrency = max(1, min(concurrency, len(chunks)))
+    spec = ACTIONS[action]
+    print(f"About to {spec.verb} {len(targets)} index(es) matching '{selector}' in {len(chunks)} request(s), "
+          f"{concurrency} at a time" + (f", at most {rate:g}/s" if rate > 0 else "") + ":")
+    print(f"  {_preview(targets)}")
+    if not assume_yes:
+        confirm = input("Proceed? (y/n): ")
+        if confirm.lower() != 'y':
+            print("Aborted.")
+            return None
+
+    started = time.monotonic()
+    run = _BulkRun(action, concurrency, RateLimiter(rate), len(chunks))
+    for names_chunk in chunks:
+        run.submit(names_chunk)
+    run.close()
+
+    print(f"{spec.past} {run.succeeded} of {len(targets)} index(es) with {run.requests} request(s) "
+          f"in {time.monotonic() - started:.1f}s; {len(run.failed)} failed.")
+    if run.failed:
+        for name, reason in sorted(run.failed.items())[:20]:
+            print(f"- {name}: {reason}")
+        if len(run.failed) > 20:
+            print(f"... and {len(run.failed) - 20} more.")
+    return run.succeeded, run.failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply an index action to every index matching a pattern or listed in a file.")
+    parser.add_argument("action", choices=list(ACTIONS), help="Action to perform")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--pattern", help="Index pattern, e.g. 'logs-2026.09.*'")
+    target.add_argument("--from-file", help="File with one index name or pattern per line")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help=f"Requests in flight at once (default: {CONCURRENCY})")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND, help=f"Max requests started per second, 0 = unlimited (default: {REQUESTS_PER_SECOND:g})")
+    parser.add_argument("--yes", action="store_true", help="Skip the confirmation prompt")
+    args = parser.parse_args()
+
+    run_bulk_action(args.action, args.pattern, args.from_file, args.yes, args.concurrency, args.rate)
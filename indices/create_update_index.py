@@ -4,6 +4,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import utils
 import json
 import argparse
+from indices import admission
 
 
 def _deep_merge(base, override):
@@ -87,6 +88,8 @@ def create_custom_index(index_name):
         "mappings": create_fragment.get("mappings", {}),
     }
     
+    if not admission.admit(f"creation of '{index_name}'"):
+        return
     data = utils.make_request(index_name, method='PUT', data=payload)
     if data and 'acknowledged' in data:
         print(f"Index '{index_name}' created successfully.")
@@ -94,9 +97,20 @@ def create_custom_index(index_name):
     else:
         print(f"Failed to create index '{index_name}'.")
 
-def update_index_mapping(index_name):
+def update_mapping_payload():
+    """Mapping update body: the built-in default merged with config.json `create_update_index.update_mapping`."""
+    cfg = _get_create_update_index_config()
+    return _deep_merge(_default_update_mapping_payload(), cfg.get("update_mapping", {}))
+
+def update_settings_payload():
+    """Settings update body: the built-in default merged with config.json `create_update_index.update_settings`."""
     cfg = _get_create_update_index_config()
-    payload = _deep_merge(_default_update_mapping_payload(), cfg.get("update_mapping", {}))
+    return _deep_merge(_default_update_settings_payload(), cfg.get("update_settings", {}))
+
+def update_index_mapping(index_name):
+    payload = update_mapping_payload()
+    if not admission.admit(f"mapping update of '{index_name}'"):
+        return
     
     data = utils.make_request(f"{index_name}/_mapping", method='PUT', data=payload)
     if data and 'acknowledged' in data:
@@ -106,8 +120,9 @@ def update_index_mapping(index_name):
         print(f"Failed to update mapping for '{index_name}'.")
 
 def update_index_settings(index_name):
-    cfg = _get_create_update_index_config()
-    payload = _deep_merge(_default_update_settings_payload(), cfg.get("update_settings", {}))
+    payload = update_settings_payload()
+    if not admission.admit(f"settings update of '{index_name}'"):
+        return
     
     data = utils.make_request(f"{index_name}/_settings", method='PUT', data=payload)
     if data and 'acknowledged' in data:
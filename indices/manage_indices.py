@@ -3,24 +3,146 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import utils
 import argparse
+import csv
+import heapq
+import http.client
+import json
+import zlib
+from indices import admission
 
 DEFAULT_PATTERN = utils.CONFIG.get("default_index_pattern", "*")
 
-def list_indices(pattern=None):
+# `_cat/indices` columns, in request order. index and status are always set;
+# closed indices leave the rest blank, which drops trailing fields.
+LIST_COLUMNS = ("index", "status", "health", "docs.count", "store.size")
+LIST_FORMATS = ("table", "ndjson", "csv")
+TOP_BY = ("size", "docs", "health")
+_HEALTH_RANK = {"red": 3, "yellow": 2, "green": 1}
+
+
+def _format_bytes(num_bytes):
+    if num_bytes >= 1024 * 1024 * 1024:
+        return f"{num_bytes/(1024*1024*1024):.2f} GB"
+    if num_bytes >= 1024 * 1024:
+        return f"{num_bytes/(1024*1024):.2f} MB"
+    if num_bytes >= 1024:
+        return f"{num_bytes/1024:.2f} KB"
+    return f"{num_bytes} B"
+
+
+def _parse_row(line):
+    fields = line.decode("utf-8", errors="replace").split()
+    if len(fields) < 2:
+        return None
+
+    def number(i):
+        return int(fields[i]) if len(fields) > i and fields[i].isdigit() else None
+
+    return {
+        "index": fields[0],
+        "status": fields[1],
+        "health": fields[2] if len(fields) > 2 else None,
+        "docs.count": number(3),
+        "store.size": number(4),
+    }
+
+
+def _top_key(by):
+    if by == "docs":
+        return lambda row: row["docs.count"] if row["docs.count"] is not None else -1
+    if by == "health":
+        # Worst health first, then the largest.
+        return lambda row: (_HEALTH_RANK.get(row["health"], 0), row["store.size"] or 0)
+    return lambda row: row["store.size"] if row["store.size"] is not None else -1
+
+
+class _RowWriter:
+    """Writes rows as they arrive, so output never needs the whole listing in memory."""
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.count = 0
+        self._csv = None
+
+    def header(self, title):
+        if self.fmt == "table":
+            print(f"\n=== {title} ===")
+            print(f"{'Index':<30} {'Health':<10} {'Status':<10} {'Docs Count':>12} {'Store Size':>12}")
+            print("-" * 80)
+        elif self.fmt == "csv":
+            self._csv = csv.writer(sys.stdout)
+            self._csv.writerow(LIST_COLUMNS)
+
+    def write(self, row):
+        self.count += 1
+        if self.fmt == "ndjson":
+            sys.stdout.write(json.dumps(row) + "\n")
+        elif self.fmt == "csv":
+            self._csv.writerow(["" if row[column] is None else row[column] for column in LIST_COLUMNS])
+        else:
+            docs = row["docs.count"] if row["docs.count"] is not None else "-"
+            size = _format_bytes(row["store.size"]) if row["store.size"] is not None else "-"
+            print(f"{row['index']:<30} {row['health'] or '-':<10} {row['status']:<10} {docs:>12} {size:>12}")
+
+
+def list_indices(pattern=None, sort="index", top=None, by="size", fmt="table"):
+    """List indices matching `pattern`, streaming `_cat/indices` with only the needed columns.
+
+    `sort` is passed to Elasticsearch (`s=`, e.g. "store.size:desc") and rows
+    are printed as they arrive. With `top`, only the N largest by size, docs
+    or worst health are kept, in a bounded heap. `fmt` is table, ndjson or
+    csv. Memory stays flat however many indices match. Returns the number of
+    rows written, or None on error.
+    """
     if pattern is None:
         pattern = DEFAULT_PATTERN
-    data = utils.make_request(f"_cat/indices/{pattern}?v&s=index&format=json")
-    print(f"\n=== Indices ({pattern}) ===")
-    if not data:
-        print("No indices found.")
-        return
+    endpoint = f"_cat/indices/{pattern}?h={','.join(LIST_COLUMNS)}&bytes=b"
+    if sort:
+        endpoint += f"&s={sort}"
+    lines = utils.stream_request(endpoint)
+    if lines is None:
+        print("Could not list indices.")
+        return None
+
+    writer = _RowWriter(fmt)
+    heap = []
+    key = _top_key(by)
+    seen = 0
+    try:
+        if not top:
+            writer.header(f"Indices ({pattern})")
+        for line in lines:
+            row = _parse_row(line)
+            if row is None:
+                continue
+            seen += 1
+            if not top:
+                writer.write(row)
+            elif len(heap) < top:
+                heapq.heappush(heap, (key(row), seen, row))
+            elif key(row) > heap[0][0]:
+                heapq.heapreplace(heap, (key(row), seen, row))
+    except (OSError, http.client.HTTPException, zlib.error) as e:
+        if isinstance(e, BrokenPipeError):
+            lines.close()
+            return writer.count
+        print(f"Error reading the index list: {e}")
+        return None
 
-    print(f"{'Index':<30} {'Health':<10} {'Status':<10} {'Docs Count':<12} {'Store Size':<12}")
-    print("-" * 80)
-    for index in data:
-        print(f"{index.get('index', 'N/A'):<30} {index.get('health', 'N/A'):<10} {index.get('status', 'N/A'):<10} {index.get('docs.count', 'N/A'):<12} {index.get('store.size', 'N/A'):<12}")
+    if top:
+        writer.header(f"Top {top} of {seen} Indices ({pattern}) by {by}")
+        for _key, _seq, row in sorted(heap, key=lambda entry: (entry[0], -entry[1]), reverse=True):
+            writer.write(row)
+    if fmt == "table":
+        if not seen:
+            print("No indices found.")
+        elif not top:
+            print(f"\n{seen} index(es).")
+    return writer.count
 
 def delete_index(index_name):
+    if not admission.admit(f"delete of '{index_name}'"):
+        return
     data = utils.make_request(index_name, method='DELETE')
     if data and data.get('acknowledged'):
         print(f"Successfully deleted index: {index_name}")
@@ -28,6 +150,8 @@ def delete_index(index_name):
         print(f"Failed to delete index: {index_name}")
 
 def close_index(index_name):
+    if not admission.admit(f"close of '{index_name}'"):
+        return
     data = utils.make_request(f"{index_name}/_close", method='POST')
     if data and data.get('acknowledged'):
         print(f"Successfully closed index: {index_name}")
@@ -35,6 +159,8 @@ def close_index(index_name):
         print(f"Failed to close index: {index_name}")
 
 def open_index(index_name):
+    if not admission.admit(f"open of '{index_name}'"):
+        return
     data = utils.make_request(f"{index_name}/_open", method='POST')
     if data and data.get('acknowledged'):
         print(f"Successfully opened index: {index_name}")
@@ -53,11 +179,15 @@ if __name__ == "__main__":
         help="Index pattern for list, or index name for delete/close/open (default from config.json)",
         default=DEFAULT_PATTERN,
     )
+    parser.add_argument("--sort", default="index", help="Server-side sort for list, e.g. 'store.size:desc' (default: index)")
+    parser.add_argument("--top", type=int, help="List only the top N indices (see --by)")
+    parser.add_argument("--by", choices=TOP_BY, default="size", help="Ranking for --top (default: size)")
+    parser.add_argument("--format", choices=LIST_FORMATS, default="table", help="Output format for list (default: table)")
     
     args = parser.parse_args()
 
     if args.action == "list":
-        list_indices(args.index)
+        list_indices(args.index, args.sort, args.top, args.by, args.format)
     elif args.action in ["delete", "close", "open"]:
         if args.index == "*":
             print("Error: Please specify a specific index name for this action (wildcards not recommended for safety).")
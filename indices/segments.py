@@ -0,0 +1,331 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils
+import argparse
+import http.client
+import time
+import zlib
+
+
+def _coerce_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _coerce_float(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _format_bytes(num_bytes):
+    if num_bytes >= 1024 * 1024 * 1024:
+        return f"{num_bytes/(1024*1024*1024):.2f} GB"
+    if num_bytes >= 1024 * 1024:
+        return f"{num_bytes/(1024*1024):.2f} MB"
+    if num_bytes >= 1024:
+        return f"{num_bytes/1024:.2f} KB"
+    return f"{num_bytes} B"
+
+
+def _get_segments_config():
+    section = utils.CONFIG.get("segments", {})
+    return section if isinstance(section, dict) else {}
+
+
+_cfg = _get_segments_config()
+# Segments below this size count as "small" (merge candidates that cost little to fold).
+SMALL_SEGMENT_BYTES = _coerce_int(_cfg.get("small_segment_bytes", 50 * 1024 * 1024), 50 * 1024 * 1024)
+# A read-only index is worth force-merging when its shards average more segments
+# than this, or when this share of its docs are deleted.
+MAX_SEGMENTS_PER_SHARD = _coerce_float(_cfg.get("max_segments_per_shard", 1), 1.0)
+DELETED_RATIO = _coerce_float(_cfg.get("deleted_ratio", 0.1), 0.1)
+# Force merges allowed to run at once on any one node.
+MERGES_PER_NODE = max(1, _coerce_int(_cfg.get("merges_per_node", 1), 1))
+POLL_SECONDS = max(1, _coerce_int(_cfg.get("poll_seconds", 10), 10))
+# Consecutive failed task-status polls before a merge is no longer polled. Its
+# node slots stay taken for the rest of the run, since it may still be running.
+MAX_POLL_FAILURES = max(1, _coerce_int(_cfg.get("max_poll_failures", 6), 6))
+
+_COLUMNS = ("index", "shard", "prirep", "id", "segment", "docs.count", "docs.deleted", "size")
+
+
+class ShardSegments:
+    __slots__ = ("segments", "small", "docs", "deleted", "size")
+
+    def __init__(self):
+        self.segments = 0
+        self.small = 0
+        self.docs = 0
+        self.deleted = 0
+        self.size = 0
+
+
+class IndexSegments:
+    """Per-index roll-up of the shard copies' segments."""
+
+    def __init__(self, name):
+        self.name = name
+        self.shards = {}
+        self.nodes = set()
+        self.read_only = False
+        self.merges_current = 0
+        self.merges_throttled_ms = 0
+
+    def add(self, shard_key, node, docs, deleted, size):
+        shard = self.shards.get(shard_key)
+        if shard is None:
+            shard = self.shards[shard_key] = ShardSegments()
+        shard.segments += 1
+        shard.docs += docs
+        shard.deleted += deleted
+        shard.size += size
+        if size < SMALL_SEGMENT_BYTES:
+            shard.small += 1
+        self.nodes.add(node)
+
+    @property
+    def segments(self):
+        return sum(s.segments for s in self.shards.values())
+
+    @property
+    def avg_segments(self):
+        return self.segments / max(len(self.shards), 1)
+
+    @property
+    def max_segments(self):
+        return max((s.segments for s in self.shards.values()), default=0)
+
+    @property
+    def small_segments(self):
+        return sum(s.small for s in self.shards.values())
+
+    @property
+    def size(self):
+        return sum(s.size for s in self.shards.values())
+
+    @property
+    def deleted_ratio(self):
+        docs = sum(s.docs for s in self.shards.values())
+        deleted = sum(s.deleted for s in self.shards.values())
+        return deleted / (docs + deleted) if docs + deleted else 0.0
+
+    @property
+    def excess_segments(self):
+        """Segments a merge down to one per shard copy would remove."""
+        return sum(s.segments - 1 for s in self.shards.values())
+
+    @property
+    def reclaimable_bytes(self):
+        return int(sum(s.size * s.deleted / (s.docs + s.deleted) for s in self.shards.values() if s.docs + s.deleted))
+
+    def needs_forcemerge(self):
+        return self.read_only and (self.avg_segments > MAX_SEGMENTS_PER_SHARD or self.deleted_ratio >= DELETED_RATIO)
+
+
+def collect_segments(pattern="*"):
+    """Stream `_cat/segments` into {index: IndexSegments}; None on failure."""
+    lines = utils.stream_request(f"_cat/segments/{pattern}?h={','.join(_COLUMNS)}&bytes=b")
+    if lines is None:
+        return None
+    indices = {}
+    try:
+        for line in lines:
+            fields = line.split()
+            if len(fields) != len(_COLUMNS):
+                continue
+            try:
+                docs, deleted, size = int(fields[5]), int(fields[6]), int(fields[7])
+            except ValueError:
+                continue
+            name = fields[0].decode()
+            index = indices.get(name)
+            if index is None:
+                index = indices[name] = IndexSegments(name)
+            node = fields[3].decode()
+            index.add((fields[1], fields[2], node), node, docs, deleted, size)
+    except (OSError, http.client.HTTPException, zlib.error) as e:
+        print(f"Error reading segments: {e}")
+        return None
+    return indices
+
+
+def _load_blocks_and_merges(pattern, indices):
+    settings = utils.make_request(f"{pattern}/_settings/index.blocks.*?flat_settings=true")
+    for name, entry in (settings or {}).items():
+        if name not in indices:
+            continue
+        flat = entry.get('settings', {})
+        indices[name].read_only = any(
+            str(flat.get(key, "false")).lower() == "true"
+            for key in ("index.blocks.write", "index.blocks.read_only", "index.blocks.read_only_allow_delete")
+        )
+    stats = utils.make_request(
+        f"{pattern}/_stats/merge?filter_path=indices.*.total.merges.current,indices.*.total.merges.total_throttled_time_in_millis"
+    )
+    for name, entry in ((stats or {}).get('indices') or {}).items():
+        if name not in indices:
+            continue
+        merges = entry.get('total', {}).get('merges', {})
+        indices[name].merges_current = merges.get('current', 0)
+        indices[name].merges_throttled_ms = merges.get('total_throttled_time_in_millis', 0)
+
+
+def segments_report(pattern="*", top=20):
+    """Print segment and merge pressure per index and return the force-merge candidates (best first)."""
+    indices = collect_segments(pattern)
+    if indices is None:
+        print("Could not retrieve segments.")
+        return None
+    if not indices:
+        print(f"No segments found for '{pattern}'.")
+        return []
+    _load_blocks_and_merges(pattern, indices)
+
+    ranked = sorted(indices.values(), key=lambda i: (i.avg_segments, i.deleted_ratio), reverse=True)
+    print(f"\n=== Segments ({pattern}, {len(indices)} indices, worst {min(top, len(ranked))}) ===")
+    print(f"{'Index':<30} {'Shards':>6} {'Segs':>6} {'Avg/sh':>7} {'Max/sh':>7} {'Small':>6} {'Del%':>6} {'Size':>11} {'Merging':>8} {'RO':>3}")
+    print("-" * 101)
+    for index in ranked[:top]:
+        print(f"{index.name:<30} {len(index.shards):>6} {index.segments:>6} {index.avg_segments:>7.1f} {index.max_segments:>7} "
+              f"{index.small_segments:>6} {index.deleted_ratio:>6.1%} {_format_bytes(index.size):>11} {index.merges_current:>8} "
+              f"{'yes' if index.read_only else '-':>3}")
+
+    merging = sum(i.merges_current for i in indices.values())
+    throttled_ms = sum(i.merges_throttled_ms for i in indices.values())
+    print(f"\nMerges running now: {merging}. Merge time throttled since start: {throttled_ms / 1000:.0f}s.")
+    if merging and throttled_ms:
+        print("Note: Merges are being throttled; if this persists, disk I/O is not keeping up with ingestion.")
+
+    candidates = sorted(
+        (i for i in indices.values() if i.needs_forcemerge()),
+        key=lambda i: (i.excess_segments, i.reclaimable_bytes),
+        reverse=True,
+    )
+    print("\n=== Force-Merge Recommendations (read-only indices) ===")
+    if not candidates:
+        print("No read-only index needs a force merge. (Good)")
+        return []
+    print(f"{'Index':<30} {'Segs removed':>13} {'Reclaimable':>12} {'Del%':>6} {'Nodes':>6}")
+    print("-" * 72)
+    for index in candidates[:top]:
+        print(f"{index.name:<30} {index.excess_segments:>13} {_format_bytes(index.reclaimable_bytes):>12} "
+              f"{index.deleted_ratio:>6.1%} {len(index.nodes):>6}")
+    if len(candidates) > top:
+        print(f"... and {len(candidates) - top} more.")
+    return candidates
+
+
+def _start_forcemerge(index_name):
+    data = utils.make_request(f"{index_name}/_forcemerge?max_num_segments=1&wait_for_completion=false", method='POST')
+    return data.get('task') if data else None
+
+
+def _task_done(task_id):
+    """(finished, error) for a background task, or None if its status could not be read."""
+    data = utils.make_request(f"_tasks/{task_id}")
+    if data is None:
+        return None
+    if not data.get('completed'):
+        return False, None
+    error = data.get('error')
+    return True, (error.get('reason') if isinstance(error, dict) else error)
+
+
+def run_forcemerges(candidates, per_node=MERGES_PER_NODE, poll_seconds=POLL_SECONDS):
+    """Force-merge indices best-first, never running more than `per_node` at once on any node.
+
+    Merges run as background tasks (wait_for_completion=false) that are polled,
+    so a long merge never hits the HTTP timeout. A failed poll counts as still
+    running; after `MAX_POLL_FAILURES` in a row the merge is no longer polled but
+    keeps its node slots, so the per-node limit holds even when the task API is
+    unreachable. Ctrl-C stops scheduling; merges already started keep running in
+    the cluster.
+    """
+    pending = list(candidates)
+    running = {}
+    poll_failures = {}
+    unknown = []
+    load = {}
+    done = failed = 0
+    try:
+        while pending or running:
+            if not running and all(any(load.get(node, 0) >= per_node for node in index.nodes) for index in pending):
+                print(f"Not starting {len(pending)} force merge(s): their nodes still have merges in an unknown state.")
+                break
+            for index in list(pending):
+                if any(load.get(node, 0) >= per_node for node in index.nodes):
+                    continue
+                task_id = _start_forcemerge(index.name)
+                pending.remove(index)
+                if not task_id:
+                    print(f"Failed to start force merge of '{index.name}'.")
+                    failed += 1
+                    continue
+                running[task_id] = (index, time.monotonic())
+                for node in index.nodes:
+                    load[node] = load.get(node, 0) + 1
+                print(f"Started force merge of '{index.name}' (task {task_id}).")
+
+            if running:
+                time.sleep(poll_seconds)
+            for task_id, (index, started) in list(running.items()):
+                status = _task_done(task_id)
+                if status is None:
+                    poll_failures[task_id] = poll_failures.get(task_id, 0) + 1
+                    if poll_failures[task_id] >= MAX_POLL_FAILURES:
+                        del running[task_id]
+                        unknown.append(task_id)
+                        print(f"Could not read the status of the force merge of '{index.name}' (task {task_id}) "
+                              f"{MAX_POLL_FAILURES} times in a row; no longer polling it. Its nodes are treated "
+                              f"as busy for the rest of the run.")
+                    continue
+                poll_failures.pop(task_id, None)
+                finished, error = status
+                if not finished:
+                    continue
+                del running[task_id]
+                for node in index.nodes:
+                    load[node] -= 1
+                if error:
+                    print(f"Force merge of '{index.name}' failed: {error}")
+                    failed += 1
+                else:
+                    print(f"Force merge of '{index.name}' finished in {time.monotonic() - started:.0f}s.")
+                    done += 1
+    except KeyboardInterrupt:
+        print(f"\nStopped scheduling. {len(running)} force merge(s) keep running in the cluster: {', '.join(running)}")
+    print(f"Force merges completed: {done}, failed: {failed}, status unknown: {len(unknown)}, not started: {len(pending)}.")
+    if unknown:
+        print(f"Check these tasks with GET _tasks/<id>: {', '.join(unknown)}")
+    return done
+
+
+def plan_and_run(pattern="*", top=20, execute=False, per_node=MERGES_PER_NODE, assume_yes=False):
+    candidates = segments_report(pattern, top)
+    if not candidates or not execute:
+        return candidates
+    print(f"\nAbout to force-merge {len(candidates)} read-only index(es) to 1 segment per shard, at most {per_node} per node at a time.")
+    if not assume_yes:
+        confirm = input("Proceed? (y/n): ")
+        if confirm.lower() != 'y':
+            print("Aborted.")
+            return candidates
+    run_forcemerges(candidates, per_node)
+    return candidates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Segment/merge pressure report and force-merge planner.")
+    parser.add_argument("--index", default="*", help="Index name or pattern (default: *)")
+    parser.add_argument("--top", type=int, default=20, help="Rows to show per table (default: 20)")
+    parser.add_argument("--execute", action="store_true", help="Force-merge the recommended indices")
+    parser.add_argument("--per-node", type=int, default=MERGES_PER_NODE, help=f"Concurrent force merges per node (default: {MERGES_PER_NODE})")
+    parser.add_argument("--yes", action="store_true", help="Skip the confirmation prompt for --execute")
+    args = parser.parse_args()
+
+    plan_and_run(args.index, args.top, args.execute, args.per_node, args.yes)
@@ -4,6 +4,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import json
 import utils
+from indices import admission
 
 
 def _get_translog_control_config():
@@ -53,6 +54,11 @@ def _build_payload(mode, enabled_override=None, sync_interval_override=None, dur
     return payload
 
 
+def mode_settings(mode):
+    """Flat settings `set_translog_mode(index_name, mode)` would apply, from config."""
+    return _build_payload("request" if mode == "enable" else mode)
+
+
 def set_translog_mode(index_name, mode, *, enabled=None, sync_interval=None, durability=None):
     """Set translog-related index settings.
 
@@ -81,6 +87,8 @@ def set_translog_mode(index_name, mode, *, enabled=None, sync_interval=None, dur
     )
     if not payload:
         return None
+    if not admission.admit(f"translog settings update of '{index_name}'"):
+        return None
 
     return utils.make_request(f"{index_name}/_settings", method="PUT", data=payload)
 
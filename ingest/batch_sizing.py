@@ -0,0 +1,134 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+import utils
+
+
+def _coerce_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _coerce_float(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _get_adaptive_config():
+    section = utils.CONFIG.get("ingest_adaptive", {})
+    return section if isinstance(section, dict) else {}
+
+
+class BatchLimits:
+    """Fixed batch limits: a batch is flushed at `max_docs` documents or `max_bytes` bytes."""
+
+    adaptive = False
+
+    def __init__(self, max_docs, max_bytes):
+        self.max_docs = max(1, int(max_docs))
+        self.max_bytes = max(1, int(max_bytes))
+        self._shared = None
+
+    def share(self, ctx):
+        """Publish the limits through a shared array so reader processes can follow them."""
+        self._shared = ctx.RawArray('q', [self.max_docs, self.max_bytes])
+        return self._shared
+
+    def _publish(self):
+        if self._shared is not None:
+            self._shared[0] = self.max_docs
+            self._shared[1] = self.max_bytes
+
+    def is_full(self, docs, nbytes):
+        return docs >= self.max_docs or nbytes >= self.max_bytes
+
+    def observe(self, docs, nbytes, latency_ms, took_ms=None, rejected=False):
+        pass
+
+    def describe(self):
+        return f"{self.max_docs} docs / {self.max_bytes / (1024 * 1024):.1f} MB per batch"
+
+
+class AdaptiveBatchSizer(BatchLimits):
+    """AIMD batch sizing driven by bulk latency, `took` and 429 rejections.
+
+    - any rejection halves the batch (multiplicative decrease);
+    - a batch slower than the target shrinks by 20%;
+    - a full batch comfortably under the target grows by 25%.
+
+    The server-side `took` is preferred over wall-clock latency when present,
+    so a slow network link alone does not shrink the batches. Docs and bytes
+    limits move together and stay inside [min_*, max_*].
+    """
+
+    adaptive = True
+
+    def __init__(self, max_docs, max_bytes, target_latency_ms=1000,
+                 min_docs=50, max_docs_limit=None, min_bytes=64 * 1024, max_bytes_limit=None):
+        super().__init__(max_docs, max_bytes)
+        self.target_latency_ms = target_latency_ms
+        self.min_docs = max(1, min_docs)
+        self.min_bytes = max(1, min_bytes)
+        self.max_docs_limit = max_docs_limit or self.max_docs * 8
+        self.max_bytes_limit = max_bytes_limit or self.max_bytes * 8
+        self._lock = threading.Lock()
+
+    def _scale(self, factor):
+        self.max_docs = int(min(max(self.max_docs * factor, self.min_docs), self.max_docs_limit))
+        self.max_bytes = int(min(max(self.max_bytes * factor, self.min_bytes), self.max_bytes_limit))
+        self._publish()
+
+    def observe(self, docs, nbytes, latency_ms, took_ms=None, rejected=False):
+        with self._lock:
+            if rejected:
+                self._scale(0.5)
+                return
+            observed = took_ms if took_ms is not None else latency_ms
+            if observed > self.target_latency_ms * 1.2:
+                self._scale(0.8)
+            elif observed < self.target_latency_ms * 0.8 and (
+                docs >= self.max_docs * 0.9 or nbytes >= self.max_bytes * 0.9
+            ):
+                # Only grow when the batch actually hit a limit; a short tail
+                # batch says nothing about whether a bigger one would be fast.
+                self._scale(1.25)
+
+    def describe(self):
+        return f"{super().describe()} (adaptive, target {self.target_latency_ms:.0f} ms)"
+
+
+class SharedBatchLimits(BatchLimits):
+    """Limits read from an array published by `BatchLimits.share` in the parent process."""
+
+    def __init__(self, shared):
+        self._shared = shared
+
+    @property
+    def max_docs(self):
+        return self._shared[0]
+
+    @property
+    def max_bytes(self):
+        return self._shared[1]
+
+
+def build_batch_limits(max_docs, max_bytes, adaptive=None):
+    """Create the batch limiter for an ingest run from config.json (`ingest_adaptive`)."""
+    cfg = _get_adaptive_config()
+    if adaptive is None:
+        adaptive = bool(cfg.get("enabled", False))
+    if not adaptive:
+        return BatchLimits(max_docs, max_bytes)
+    return AdaptiveBatchSizer(
+        max_docs,
+        max_bytes,
+        target_latency_ms=_coerce_float(cfg.get("target_latency_ms", 1000), 1000.0),
+        min_docs=_coerce_int(cfg.get("min_batch_docs", 50), 50),
+        max_docs_limit=_coerce_int(cfg.get("max_batch_docs"), None),
+        max_bytes_limit=_coerce_int(cfg.get("max_batch_bytes"), None),
+    )
@@ -0,0 +1,92 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+import utils
+from ingest.bulk_pipeline import BulkBatch
+
+
+def encode_action(index_name, doc_id=None):
+    """Encode one bulk action line (with trailing newline) as bytes."""
+    meta = {"_index": index_name}
+    if doc_id is not None:
+        meta["_id"] = doc_id
+    return utils.json_dumps({"index": meta}) + b"\n"
+
+
+class BufferPool:
+    """Free list of bytearrays so batch buffers keep their capacity between batches."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._free = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return bytearray()
+
+    def put(self, buf):
+        with self._lock:
+            if len(self._free) < self.maxsize:
+                self._free.append(buf)
+
+
+class BulkBodyBuilder:
+    """Build `_bulk` NDJSON bodies directly in a reusable bytearray.
+
+    Source lines are appended as the raw bytes read from the file (binary mode),
+    the action line is encoded once and reused for every document, and the
+    finished batch body is a memoryview over the buffer, which http.client hands
+    to sendall() as-is. Compared with building a list of str, joining and
+    encoding, this removes the per-document dict/json.dumps and two full copies
+    of every batch.
+
+    Buffers are never shrunk: the builder writes at its own cursor with slice
+    assignment, so after the first few batches no reallocation happens. The
+    buffer goes back to the pool when the pipeline releases the batch.
+    """
+
+    def __init__(self, action_line, pool=None):
+        self.action_line = action_line
+        self.pool = pool or BufferPool(1)
+        self._buf = self.pool.get()
+        self._len = 0
+        self._spans = []
+
+    @property
+    def docs(self):
+        return len(self._spans)
+
+    @property
+    def size(self):
+        return self._len
+
+    def _write(self, data):
+        end = self._len + len(data)
+        self._buf[self._len:end] = data
+        self._len = end
+
+    def add(self, line, action=None):
+        """Append one document. `line` is the raw source line, normally ending in b"\\n"."""
+        start = self._len
+        self._write(action or self.action_line)
+        if line.endswith(b"\n") and not line[:1].isspace() and not line[-2:-1].isspace():
+            # Fast path: already a clean NDJSON line, copy it straight in.
+            self._write(line)
+        else:
+            self._write(line.strip())
+            self._write(b"\n")
+        self._spans.append((start, self._len))
+
+    def take(self, seq=None, end_offset=None):
+        """Hand the current body over as a BulkBatch and start a new buffer."""
+        body = memoryview(self._buf)[:self._len]
+        batch = BulkBatch(body, len(self._spans), self._spans, seq=seq, end_offset=end_offset)
+        batch.release_to = (self.pool, self._buf)
+        self._buf = self.pool.get()
+        self._len = 0
+        self._spans = []
+        return batch
@@ -0,0 +1,243 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http.client
+import json
+import signal
+import threading
+import time
+import utils
+from indices import admission, translog_control
+
+
+def _coerce_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _resolve_path(path):
+    if os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(utils.__file__)), path)
+
+
+def _get_bulk_load_config():
+    section = utils.CONFIG.get("bulk_load_mode", {})
+    return section if isinstance(section, dict) else {}
+
+
+_cfg = _get_bulk_load_config()
+FAST_REFRESH_INTERVAL = str(_cfg.get("refresh_interval", "-1"))
+FAST_REPLICAS = _coerce_int(_cfg.get("number_of_replicas", 0), 0)
+# How long to wait for the index to go green after the settings are restored.
+GREEN_TIMEOUT = _coerce_int(_cfg.get("green_timeout_seconds", 600), 600)
+# Originals of an active bulk load, so a run killed before restoring can be undone.
+STATE_PATH = _resolve_path(_cfg.get("state_path", "ingest/.bulk_load_state.json"))
+
+# Every setting the fast profile may touch; all of them are snapshotted, and the
+# ones a run actually sets are restored.
+SNAPSHOT_KEYS = (
+    "index.refresh_interval",
+    "index.number_of_replicas",
+    "index.auto_expand_replicas",
+    "index.translog.enabled",
+    "index.translog.durability",
+    "index.translog.sync_interval",
+)
+
+
+def _read_state():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    try:
+        with open(STATE_PATH, 'r') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError) as e:
+        print(f"Warning: Ignoring unreadable bulk-load state file {STATE_PATH}: {e}")
+        return {}
+
+
+def _write_state(state):
+    if not state:
+        if os.path.exists(STATE_PATH):
+            os.remove(STATE_PATH)
+        return
+    tmp_path = f"{STATE_PATH}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATE_PATH)
+
+
+class BulkLoadAborted(Exception):
+    """The index could not be tuned safely; nothing was changed."""
+
+
+def get_index_settings(index_name):
+    """Return the explicitly set SNAPSHOT_KEYS of an index ({} if none), or None if it does not exist.
+
+    Raises BulkLoadAborted when the settings cannot be read for any other
+    reason (timeout, 5xx, 401/403): tuning an index without its originals
+    would later "restore" it to cluster defaults.
+    """
+    url = utils.build_url(f"{index_name}/_settings?flat_settings=true")
+    try:
+        status, reason, response_data = utils.perform_request("GET", url)
+        data = utils.json_loads(response_data) if response_data else {}
+    except (OSError, http.client.HTTPException, ValueError) as e:
+        raise BulkLoadAborted(f"could not read the settings of '{index_name}': {e}")
+    if status == 404 and isinstance(data, dict) and \
+            (data.get('error') or {}).get('type') == "index_not_found_exception":
+        return None
+    if status >= 400 or not isinstance(data, dict):
+        raise BulkLoadAborted(f"could not read the settings of '{index_name}': HTTP {status} {reason}")
+    entry = data.get(index_name) or next(iter(data.values()), {})
+    flat = entry.get('settings', {}) if isinstance(entry, dict) else {}
+    return {key: flat[key] for key in SNAPSHOT_KEYS if key in flat}
+
+
+def wait_for_green(index_name, timeout=GREEN_TIMEOUT):
+    """Poll cluster health for the index until green or `timeout` seconds pass."""
+    deadline = time.monotonic() + timeout
+    # Keep each server-side wait well under the HTTP socket timeout, if one is set.
+    step = 30 if utils.HTTP_TIMEOUT is None else max(1, min(30, int(utils.HTTP_TIMEOUT) - 5))
+    status = None
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print(f"Warning: '{index_name}' is still {status or 'unknown'} after {timeout}s.")
+            return False
+        wait = max(1, min(step, int(remaining)))
+        data = utils.make_request(f"_cluster/health/{index_name}?wait_for_status=green&timeout={wait}s")
+        status = data.get('status') if data else None
+        if status == "green":
+            print(f"Index '{index_name}' is green.")
+            return True
+        if data is None:
+            time.sleep(min(wait, 5))
+
+
+class BulkLoadMode:
+    """Context manager that tunes an index for a backfill and restores it afterwards.
+
+    On entry the index's refresh_interval, replica and translog settings are
+    snapshotted (to memory and to STATE_PATH), then the fast profile is applied:
+    refresh disabled, no replicas, translog `async` via translog_control. If the
+    snapshot cannot be read, BulkLoadAborted is raised before anything changes.
+    On exit (normal, exception, Ctrl-C or SIGTERM) the keys the profile set are
+    put back to their exact originals; keys that were not set explicitly are
+    reset with null so they fall back to their defaults. Then the index is
+    refreshed and we wait for green.
+
+    If a previous run died before restoring, its saved originals are reused
+    instead of snapshotting the still-tuned settings.
+    """
+
+    def __init__(self, index_name, green_timeout=GREEN_TIMEOUT):
+        self.index_name = index_name
+        self.green_timeout = green_timeout
+        self.original = None
+        # Keys the profile sets; only these are restored.
+        self.changed = set()
+        self._previous_sigterm = None
+
+    def _on_sigterm(self, signum, frame):
+        raise KeyboardInterrupt("SIGTERM")
+
+    def _apply(self):
+        state = _read_state()
+        current = get_index_settings(self.index_name)
+        if self.index_name in state:
+            self.original = state[self.index_name]
+            print(f"Found settings saved by an unfinished bulk load of '{self.index_name}'; they will be restored at the end.")
+        elif current is None:
+            # Not created yet: create it with the fast profile, restore defaults afterwards.
+            self.original = {}
+        else:
+            self.original = current
+        state[self.index_name] = self.original
+        _write_state(state)
+
+        fast = {"index.refresh_interval": FAST_REFRESH_INTERVAL, "index.number_of_replicas": FAST_REPLICAS}
+        if str(self.original.get("index.auto_expand_replicas", "false")).lower() != "false":
+            # auto_expand_replicas would override number_of_replicas.
+            fast["index.auto_expand_replicas"] = "false"
+        self.changed = set(fast) | set(translog_control.mode_settings("async"))
+        if not admission.admit(f"bulk-load profile for '{self.index_name}'"):
+            result = None
+        elif current is None:
+            result = utils.make_request(self.index_name, method='PUT', data={"settings": fast})
+        else:
+            result = utils.make_request(f"{self.index_name}/_settings", method='PUT', data=fast)
+        if not result or not result.get('acknowledged'):
+            print(f"Warning: Could not apply the bulk-load profile to '{self.index_name}'.")
+        translog = translog_control.set_translog_mode(self.index_name, "async")
+        if not translog or not translog.get('acknowledged'):
+            print(f"Warning: Could not switch the translog of '{self.index_name}' to async.")
+        print(f"Bulk-load mode on for '{self.index_name}': refresh_interval={FAST_REFRESH_INTERVAL}, "
+              f"number_of_replicas={FAST_REPLICAS}, translog async.")
+
+    def _put_settings(self, payload):
+        result = utils.make_request(f"{self.index_name}/_settings", method='PUT', data=payload)
+        return bool(result and result.get('acknowledged'))
+
+    def restore(self):
+        keys = [key for key in SNAPSHOT_KEYS if key in self.changed]
+        if not keys:
+            failed = []
+        else:
+            # Restoring is never skipped; admission control only paces it.
+            admission.admit(f"settings restore of '{self.index_name}'")
+            if self._put_settings({key: self.original.get(key) for key in keys}):
+                failed = []
+            else:
+                # One rejected key fails the whole request; restore the rest one by one.
+                failed = [key for key in keys if not self._put_settings({key: self.original.get(key)})]
+        if failed:
+            print(f"ERROR: Could not restore {', '.join(failed)} of '{self.index_name}'. Original values "
+                  f"(kept in {STATE_PATH}): {json.dumps({key: self.original.get(key) for key in failed})}")
+            return False
+        state = _read_state()
+        state.pop(self.index_name, None)
+        _write_state(state)
+        print(f"Restored original settings of '{self.index_name}'.")
+        return True
+
+    def __enter__(self):
+        if threading.current_thread() is threading.main_thread():
+            self._previous_sigterm = signal.signal(signal.SIGTERM, self._on_sigterm)
+        try:
+            self._apply()
+        except BulkLoadAborted:
+            if threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGTERM, self._previous_sigterm or signal.SIG_DFL)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        in_main = threading.current_thread() is threading.main_thread()
+        # Don't let a second Ctrl-C / SIGTERM cut the restore short.
+        if in_main:
+            previous_sigint = signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        try:
+            restored = self.restore()
+        finally:
+            if in_main:
+                signal.signal(signal.SIGINT, previous_sigint)
+                signal.signal(signal.SIGTERM, self._previous_sigterm or signal.SIG_DFL)
+
+        if restored:
+            try:
+                utils.make_request(f"{self.index_name}/_refresh", method='POST')
+                print(f"Waiting up to {self.green_timeout}s for '{self.index_name}' to go green...")
+                wait_for_green(self.index_name, self.green_timeout)
+            except KeyboardInterrupt:
+                print("Stopped waiting for green; the settings are already restored.")
+
+        if exc_type is KeyboardInterrupt:
+            print("Ingest interrupted.")
+            return True
+        return False
@@ -0,0 +1,218 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import queue
+import threading
+import time
+from collections import Counter, deque
+import utils
+
+
+class BulkBatch:
+    """One `_bulk` request body plus the bookkeeping the pipeline needs.
+
+    `spans[i]` is the (start, end) byte range of document i (action line plus
+    source line) inside `body`, so failed items can be re-sent or dead-lettered.
+    `source` / `seq` / `end_offset` tie the batch back to its position in the
+    source file for checkpointing. `release_to` is an optional
+    (BufferPool, bytearray) pair the body's buffer is returned to once the
+    batch has been sent. `read_at` is the monotonic time the batch's oldest
+    line was read (follow mode uses it for lag).
+    """
+
+    __slots__ = ("body", "docs", "spans", "source", "seq", "end_offset", "release_to", "read_at")
+
+    def __init__(self, body, docs, spans=None, seq=None, end_offset=None, source=None):
+        self.body = body
+        self.docs = docs
+        self.spans = spans
+        self.source = source
+        self.seq = seq
+        self.end_offset = end_offset
+        self.release_to = None
+        self.read_at = None
+
+    @property
+    def size(self):
+        return len(self.body)
+
+    def doc(self, i):
+        start, end = self.spans[i]
+        return bytes(self.body[start:end])
+
+    def detach(self):
+        """Give the batch sole ownership of its body (e.g. before pickling).
+
+        The pooled buffer itself, trimmed to the body, becomes the body instead
+        of being copied; the pool hands out a new buffer for the next batch.
+        """
+        if self.release_to is not None:
+            _pool, buf = self.release_to
+            self.release_to = None
+            size = len(self.body)
+            if isinstance(self.body, memoryview):
+                self.body.release()
+            del buf[size:]
+            self.body = buf
+        return self
+
+    def release(self):
+        if self.release_to is None:
+            return
+        pool, buf = self.release_to
+        self.release_to = None
+        if isinstance(self.body, memoryview):
+            self.body.release()
+        self.body = b""
+        pool.put(buf)
+
+    def subset(self, indexes):
+        """Build a new batch holding only the given documents, in order."""
+        body = bytearray()
+        spans = []
+        for i in indexes:
+            start = len(body)
+            body += self.doc(i)
+            spans.append((start, len(body)))
+        return BulkBatch(bytes(body), len(spans), spans)
+
+
+# Latest bulk latencies kept for percentiles (bounded for long --follow runs).
+LATENCY_SAMPLES = 100000
+
+
+class IngestStats:
+    """Thread-safe counters for an ingest run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.docs = 0
+        self.bytes = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.retried = Counter()
+        self.failed = Counter()
+        self.requests = 0
+        self.latencies_ms = deque(maxlen=LATENCY_SAMPLES)
+
+    def record_batch(self, docs, nbytes, ok=True):
+        with self._lock:
+            self.batches += 1
+            if ok:
+                self.docs += docs
+                self.bytes += nbytes
+            else:
+                self.failed_batches += 1
+            return self.docs
+
+    def record_retry(self, error_type, count=1):
+        with self._lock:
+            self.retried[error_type] += count
+
+    def record_failure(self, error_type, count=1):
+        with self._lock:
+            self.failed[error_type] += count
+
+    def record_latency(self, latency_ms):
+        with self._lock:
+            self.requests += 1
+            self.latencies_ms.append(latency_ms)
+
+    def latency_percentile(self, pct):
+        """Nearest-rank percentile of the bulk request latencies in ms (None if no requests)."""
+        with self._lock:
+            ordered = sorted(self.latencies_ms)
+        if not ordered:
+            return None
+        rank = max(1, -(-len(ordered) * pct // 100))
+        return ordered[int(rank) - 1]
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        mb = self.bytes / (1024 * 1024)
+        lines = [
+            f"Ingested {self.docs} documents ({mb:.2f} MB) in {elapsed:.2f}s: "
+            f"{self.docs / elapsed:.0f} docs/sec, {mb / elapsed:.2f} MB/sec"
+        ]
+        if self.latencies_ms:
+            lines.append(
+                f"Bulk latency over {self.requests} requests: p50 {self.latency_percentile(50):.1f} ms, "
+                f"p99 {self.latency_percentile(99):.1f} ms"
+            )
+        if self.failed_batches:
+            lines.append(f"Warning: {self.failed_batches} of {self.batches} bulk requests failed.")
+        if self.retried:
+            lines.append("Retried documents by error type:")
+            lines.extend(f"  {error_type}: {count}" for error_type, count in self.retried.most_common())
+        if self.failed:
+            lines.append(f"Failed documents by error type ({sum(self.failed.values())} total):")
+            lines.extend(f"  {error_type}: {count}" for error_type, count in self.failed.most_common())
+        return "\n".join(lines)
+
+
+class BulkPipeline:
+    """Fan bulk batches out to N sender threads through a bounded queue.
+
+    `submit` blocks while the queue is full, so the file reader can never run
+    more than `queue_size` batches ahead of the senders and memory stays flat.
+    `send` is called with a BulkBatch and returns the number of documents
+    acknowledged, or None when the request failed as a whole. `on_complete`,
+    if given, is called with (batch, acked) once every document of the batch
+    has been handled (acknowledged or dead-lettered); it is not called when
+    `send` raised, so such a batch is never checkpointed as done.
+    """
+
+    def __init__(self, send, workers=1, queue_size=None, stats=None, on_complete=None, progress=True):
+        self.send = send
+        self.on_complete = on_complete
+        self.progress = progress
+        self.workers = max(1, workers)
+        self.stats = stats or IngestStats()
+        self._queue = queue.Queue(maxsize=queue_size or self.workers * 2)
+        # Batches alive at once: queued + one in flight per worker.
+        self.capacity = self._queue.maxsize + self.workers
+        self._threads = []
+        self._print_lock = threading.Lock()
+        utils.ensure_pool_size(self.workers)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"bulk-sender-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                try:
+                    acked = self.send(batch)
+                    if self.on_complete is not None:
+                        self.on_complete(batch, acked or 0)
+                except Exception as e:
+                    print(f"Error sending bulk request: {e}")
+                    acked = None
+                ok = acked is not None
+                total = self.stats.record_batch(acked or 0, batch.size, ok)
+                batch.release()
+                if ok and self.progress:
+                    with self._print_lock:
+                        print(f"Processed {total} documents...")
+            finally:
+                self._queue.task_done()
+
+    def submit(self, batch):
+        self._queue.put(batch)
+
+    def drain(self):
+        """Block until every batch submitted so far has been sent and completed."""
+        self._queue.join()
+
+    def close(self):
+        """Wait for every queued batch to be sent, then stop the workers."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        return self.stats
@@ -0,0 +1,180 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http.client
+import random
+import threading
+import time
+import utils
+
+
+def _coerce_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _get_retry_config():
+    section = utils.CONFIG.get("ingest_retry", {})
+    return section if isinstance(section, dict) else {}
+
+
+# Per-item statuses worth re-sending: the document was fine, the node was busy.
+RETRYABLE_ITEM_STATUSES = {429, 503}
+# Whole-request statuses worth re-sending (proxies / coordinating node overload).
+RETRYABLE_REQUEST_STATUSES = {429, 502, 503, 504}
+
+
+def _resolve_path(path):
+    if os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(utils.__file__)), path)
+
+
+DEAD_LETTER_PATH = _resolve_path(utils.CONFIG.get("ingest_dead_letter_path", "ingest/dead_letter.ndjson"))
+
+
+class DeadLetterWriter:
+    """Append permanently failed documents to an NDJSON file, one record per line.
+
+    Each record keeps the original action and source lines so the file can be
+    inspected and replayed once the cause (mapping conflict, bad line...) is fixed.
+    """
+
+    def __init__(self, path=DEAD_LETTER_PATH):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        self._fh = None
+
+    def write(self, doc, status, error):
+        action, _, source = bytes(doc).rstrip(b"\n").partition(b"\n")
+        record = {
+            "status": status,
+            "error": error,
+            "action": action.decode("utf-8", errors="replace"),
+            "source": source.decode("utf-8", errors="replace"),
+        }
+        line = utils.json_dumps(record) + b"\n"
+        with self._lock:
+            if self._fh is None:
+                self._fh = open(self.path, "ab")
+            self._fh.write(line)
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+def _post_bulk(body, compress=False):
+    """POST one bulk body. Returns (status, parsed_result_or_None, error_description)."""
+    try:
+        status, reason, response_data = utils.perform_request(
+            "POST", utils.build_url("_bulk"), body=body, headers={'Content-Type': 'application/x-ndjson'},
+            compress=compress,
+        )
+    except (OSError, http.client.HTTPException) as e:
+        return None, None, f"connection error: {e}"
+
+    if status >= 400:
+        return status, None, f"HTTP {status} {reason}: {response_data[:500].decode('utf-8', errors='replace')}"
+    try:
+        return status, utils.json_loads(response_data), None
+    except ValueError as e:
+        return status, None, f"invalid bulk response: {e}"
+
+
+class BulkSender:
+    """Send a BulkBatch, retrying rejected items and dead-lettering the rest.
+
+    Used as the `send` callable of a BulkPipeline. Retries happen inside the
+    sender worker with exponential backoff and full jitter, which also slows the
+    file reader down while the cluster is pushing back.
+    """
+
+    def __init__(self, stats, limits=None, dead_letter=None, max_retries=None,
+                 initial_backoff_ms=None, max_backoff_ms=None, compress=False):
+        cfg = _get_retry_config()
+        self.stats = stats
+        self.limits = limits
+        self.compress = compress
+        self.dead_letter = dead_letter or DeadLetterWriter()
+        self.max_retries = max_retries if max_retries is not None else _coerce_int(cfg.get("max_retries", 5), 5)
+        self.initial_backoff_ms = initial_backoff_ms or _coerce_int(cfg.get("initial_backoff_ms", 200), 200)
+        self.max_backoff_ms = max_backoff_ms or _coerce_int(cfg.get("max_backoff_ms", 30000), 30000)
+
+    def _backoff(self, attempt):
+        cap = min(self.max_backoff_ms, self.initial_backoff_ms * (2 ** attempt))
+        time.sleep(random.uniform(0, cap) / 1000.0)
+
+    def _observe(self, batch, started, result, rejected):
+        latency_ms = (time.monotonic() - started) * 1000
+        self.stats.record_latency(latency_ms)
+        if self.limits is None:
+            return
+        took_ms = result.get('took') if result else None
+        self.limits.observe(batch.docs, batch.size, latency_ms, took_ms, rejected)
+
+    def _fail(self, batch, indexes, status, error):
+        error_type = error.get('type', f"http_{status}") if isinstance(error, dict) else f"http_{status}"
+        for i in indexes:
+            self.dead_letter.write(batch.doc(i), status, error)
+        self.stats.record_failure(error_type, len(indexes))
+
+    def __call__(self, batch):
+        pending = batch
+        acked = 0
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            status, result, request_error = _post_bulk(pending.body, self.compress)
+
+            if result is None:
+                # The request failed as a whole; no per-item outcome available.
+                retryable = status is None or status in RETRYABLE_REQUEST_STATUSES
+                error_type = "connection_error" if status is None else f"http_{status}"
+                self._observe(pending, started, None, status == 429)
+                if retryable and attempt < self.max_retries:
+                    self.stats.record_retry(error_type, pending.docs)
+                    self._backoff(attempt)
+                    attempt += 1
+                    continue
+                print(f"Bulk request failed after {attempt + 1} attempt(s): {request_error}")
+                self._fail(pending, range(pending.docs), status, {"type": error_type, "reason": request_error})
+                return acked if acked else None
+
+            items = result.get('items', [])
+            if not result.get('errors'):
+                self._observe(pending, started, result, False)
+                return acked + pending.docs
+
+            retry_indexes = []
+            rejected = False
+            for i, item in enumerate(items[:pending.docs]):
+                outcome = next(iter(item.values()), {})
+                item_status = outcome.get('status', 0)
+                if item_status < 300:
+                    acked += 1
+                    continue
+                error = outcome.get('error', {})
+                if item_status == 429:
+                    rejected = True
+                if item_status in RETRYABLE_ITEM_STATUSES and attempt < self.max_retries:
+                    retry_indexes.append(i)
+                    self.stats.record_retry(error.get('type', f"http_{item_status}") if isinstance(error, dict) else f"http_{item_status}")
+                else:
+                    self._fail(pending, [i], item_status, error)
+            if len(items) < pending.docs:
+                self._fail(pending, range(len(items), pending.docs), status,
+                           {"type": "missing_bulk_item", "reason": "bulk response has fewer items than documents sent"})
+            self._observe(pending, started, result, rejected)
+
+            if not retry_indexes:
+                return acked
+            pending = pending.subset(retry_indexes)
+            self._backoff(attempt)
+            attempt += 1
@@ -0,0 +1,107 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json
+import threading
+import time
+import utils
+from ingest.log_sources import COMPRESSED_SUFFIXES
+
+
+def _resolve_path(path):
+    if os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(utils.__file__)), path)
+
+
+CHECKPOINT_PATH = _resolve_path(utils.CONFIG.get("ingest_checkpoint_path", "ingest/.checkpoints.json"))
+
+
+class CheckpointStore:
+    """Checkpoints for every ingested file, kept in one small JSON file.
+
+    Entries are keyed by absolute log path and hold the inode, the byte offset
+    up to which every document has been handled by the cluster, and the number
+    of documents acknowledged so far. Writes go to a temp file first and are
+    swapped in with os.replace, so a crash never leaves a torn checkpoint.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._read()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable checkpoint file {self.path}: {e}")
+            return {}
+
+    def get(self, file_path):
+        with self._lock:
+            return self._entries.get(os.path.abspath(file_path))
+
+    def save(self, file_path, inode, offset, docs):
+        entry = {"inode": inode, "offset": offset, "docs": docs, "updated_at": time.time()}
+        with self._lock:
+            self._entries[os.path.abspath(file_path)] = entry
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+class CheckpointTracker:
+    """Advance a file's checkpoint as bulk batches complete, possibly out of order.
+
+    Each batch gets a per-file sequence number (0, 1, 2...) when it is cut.
+    With several sender workers batch 7 may finish before batch 6, so the
+    checkpoint only moves to the end of the longest run of completed batches
+    (a low-water mark); a resume therefore never skips a batch that was still
+    in flight.
+    """
+
+    def __init__(self, store, file_path, inode, offset=0, docs=0):
+        self.store = store
+        self.file_path = file_path
+        self.inode = inode
+        self.offset = offset
+        self.docs = docs
+        self._lock = threading.Lock()
+        self._low_seq = 0
+        self._done = {}
+
+    def complete(self, seq, end_offset, acked_docs):
+        with self._lock:
+            self._done[seq] = (end_offset, acked_docs)
+            if seq != self._low_seq:
+                return
+            while self._low_seq in self._done:
+                end_offset, acked_docs = self._done.pop(self._low_seq)
+                self.offset = end_offset
+                self.docs += acked_docs
+                self._low_seq += 1
+            self.store.save(self.file_path, self.inode, self.offset, self.docs)
+
+
+def resume_position(store, file_path):
+    """Return (offset, docs) to resume from, or (0, 0) if the checkpoint does not match the file."""
+    entry = store.get(file_path)
+    if not entry:
+        print(f"No checkpoint found for {file_path}; starting from the beginning.")
+        return 0, 0
+    stat = os.stat(file_path)
+    if entry.get("inode") != stat.st_ino:
+        print(f"Checkpoint for {file_path} is for a different file (inode changed); starting from the beginning.")
+        return 0, 0
+    offset = entry.get("offset", 0)
+    # Offsets into .gz/.bz2 files are positions in the decompressed stream.
+    if offset > stat.st_size and not file_path.endswith(COMPRESSED_SUFFIXES):
+        print(f"Checkpoint offset {offset} is past the end of {file_path} (truncated?); starting from the beginning.")
+        return 0, 0
+    return offset, entry.get("docs", 0)
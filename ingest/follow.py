@@ -0,0 +1,208 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+import time
+import utils
+from ingest.bulk_body import BufferPool, BulkBodyBuilder, encode_action
+from ingest.bulk_pipeline import BulkPipeline, IngestStats
+from ingest.bulk_sender import BulkSender
+from ingest.checkpoint import CheckpointStore, CheckpointTracker, resume_position
+from ingest.log_sources import doc_id
+
+
+def _coerce_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+FLUSH_MS = _coerce_int(utils.CONFIG.get("ingest_follow_flush_ms", 1000), 1000)
+POLL_MS = _coerce_int(utils.CONFIG.get("ingest_follow_poll_ms", 200), 200)
+STATUS_INTERVAL = 1.0
+
+
+class LagStats:
+    """End-to-end lag: time from a line being read to its batch being acknowledged.
+
+    Lines are picked up within one poll interval of being written, so this is
+    the write-to-ack lag give or take `ingest_follow_poll_ms`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.last_ms = 0.0
+        self.window_max_ms = 0.0
+
+    def record(self, seconds):
+        ms = seconds * 1000
+        with self._lock:
+            self.last_ms = ms
+            self.window_max_ms = max(self.window_max_ms, ms)
+
+    def take_window(self):
+        with self._lock:
+            last, peak = self.last_ms, self.window_max_ms
+            self.window_max_ms = 0.0
+            return last, peak
+
+
+class LogFollower:
+    """Tail a growing log and ship new lines continuously (like `tail -F`).
+
+    A batch is flushed when it reaches the doc or byte limit, or when its
+    oldest line has waited `flush_ms`. Rotation is detected by the path
+    pointing at a new inode: the old file is read to its end, in-flight batches
+    are drained, and the new file is followed from offset 0. A file that
+    shrinks below the current offset (copytruncate) is re-read from 0.
+    Checkpoints are written exactly as in batch ingest, so --resume works.
+    """
+
+    def __init__(self, file_path, index_name, limits, workers=1, gzip=False, idempotent_ids=False,
+                 resume=False, flush_ms=FLUSH_MS, poll_ms=POLL_MS):
+        self.file_path = file_path
+        self.index_name = index_name
+        self.limits = limits
+        self.idempotent_ids = idempotent_ids
+        self.resume = resume
+        self.flush_s = flush_ms / 1000.0
+        self.poll_s = poll_ms / 1000.0
+        self.store = CheckpointStore()
+        self.stats = IngestStats()
+        self.lag = LagStats()
+        self.sender = BulkSender(self.stats, limits=limits, compress=gzip)
+        self.trackers = []
+        self.pipeline = BulkPipeline(
+            self.sender, workers=workers, stats=self.stats, on_complete=self._on_complete, progress=False
+        )
+        self.builder = BulkBodyBuilder(encode_action(index_name), BufferPool(self.pipeline.capacity + 1))
+        self._file = None
+        self._tracker = None
+        self._source = None
+        self._offset = 0
+        self._seq = 0
+        self._batch_started = None
+
+    def _on_complete(self, batch, acked):
+        self.trackers[batch.source].complete(batch.seq, batch.end_offset, acked)
+        self.lag.record(time.monotonic() - batch.read_at)
+
+    def _open(self, start_offset=None, start_docs=0):
+        self._file = open(self.file_path, 'rb')
+        inode = os.fstat(self._file.fileno()).st_ino
+        if start_offset is None:
+            # Plain `tail -F`: only ship lines written from now on.
+            start_offset = os.fstat(self._file.fileno()).st_size
+        self._file.seek(start_offset)
+        self._offset = start_offset
+        self._seq = 0
+        self._tracker = CheckpointTracker(self.store, self.file_path, inode, start_offset, start_docs)
+        self.trackers.append(self._tracker)
+        self._source = len(self.trackers) - 1
+        print(f"Following {self.file_path} (inode {inode}) from byte offset {start_offset}.")
+
+    def _flush(self):
+        if not self.builder.docs:
+            return
+        batch = self.builder.take(self._seq, self._offset)
+        batch.source = self._source
+        batch.read_at = self._batch_started
+        self._seq += 1
+        self._batch_started = None
+        self.pipeline.submit(batch)
+
+    def _add(self, raw_line, line_offset):
+        if raw_line.isspace():
+            return
+        if self._batch_started is None:
+            self._batch_started = time.monotonic()
+        if self.idempotent_ids:
+            self.builder.add(raw_line, encode_action(self.index_name, doc_id(self.file_path, line_offset)))
+        else:
+            self.builder.add(raw_line)
+        if self.limits.is_full(self.builder.docs, self.builder.size):
+            self._flush()
+
+    def _read_available(self, final=False):
+        """Consume every complete line currently in the file. With `final`, a trailing partial line counts too."""
+        while True:
+            raw_line = self._file.readline()
+            if not raw_line:
+                return
+            if not raw_line.endswith(b"\n") and not final:
+                # Writer is mid-line; come back for the rest of it.
+                self._file.seek(self._offset)
+                return
+            line_offset = self._offset
+            self._offset += len(raw_line)
+            self._add(raw_line, line_offset)
+
+    def _switch_file(self, reason, start_offset=0):
+        print(f"\n{reason}; draining in-flight batches.")
+        self._flush()
+        self.pipeline.drain()
+        self._file.close()
+        self._open(start_offset)
+
+    def _check_rotation(self):
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            # Rotated away and not recreated yet.
+            return
+        if stat.st_ino != self._tracker.inode:
+            self._read_available(final=True)
+            self._switch_file(f"{self.file_path} was rotated (new inode {stat.st_ino})")
+        elif stat.st_size < self._offset:
+            self._switch_file(f"{self.file_path} was truncated")
+
+    def _print_status(self, interval, last_docs):
+        docs = self.stats.docs
+        last_lag, peak_lag = self.lag.take_window()
+        rate = (docs - last_docs) / interval if interval > 0 else 0.0
+        print(
+            f"\r[follow] {docs} docs acked | {rate:,.0f} docs/s | "
+            f"lag last {last_lag:,.0f} ms, max {peak_lag:,.0f} ms | {self.builder.docs} buffered   ",
+            end="",
+            flush=True,
+        )
+        return docs
+
+    def run(self):
+        if self.resume:
+            offset, docs = resume_position(self.store, self.file_path)
+            self._open(offset, docs)
+        else:
+            self._open()
+        print(f"Flushing at {self.limits.describe()} or every {self.flush_s * 1000:.0f} ms. Press Ctrl-C to stop.")
+
+        last_status = time.monotonic()
+        last_docs = 0
+        try:
+            while True:
+                self._read_available()
+                now = time.monotonic()
+                if self._batch_started is not None and now - self._batch_started >= self.flush_s:
+                    self._flush()
+                if now - last_status >= STATUS_INTERVAL:
+                    last_docs = self._print_status(now - last_status, last_docs)
+                    last_status = now
+                self._check_rotation()
+
+                wait = self.poll_s
+                if self._batch_started is not None:
+                    wait = min(wait, max(0.0, self._batch_started + self.flush_s - time.monotonic()))
+                time.sleep(wait)
+        except KeyboardInterrupt:
+            print("\nStopping: flushing buffered lines...")
+        finally:
+            self._flush()
+            self.pipeline.close()
+            self.sender.dead_letter.close()
+            if self._file is not None:
+                self._file.close()
+            print(self.stats.summary())
+            if self.sender.dead_letter.count:
+                print(f"{self.sender.dead_letter.count} failed documents written to {self.sender.dead_letter.path}")
+            print(f"Checkpoint: byte offset {self._tracker.offset}, {self._tracker.docs} documents acknowledged ({self.store.path}).")
@@ -2,8 +2,16 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import utils
-import json
 import argparse
+from ingest.bulk_pipeline import BulkPipeline, IngestStats
+from ingest.bulk_body import BufferPool
+from ingest.batch_sizing import build_batch_limits
+from ingest.bulk_sender import BulkSender
+from ingest.checkpoint import CheckpointStore, CheckpointTracker, resume_position
+from ingest.log_sources import expand_log_paths, read_log
+from ingest.parallel_readers import ParallelReaders
+from ingest.follow import FLUSH_MS, LogFollower
+from ingest.bulk_load_mode import BulkLoadAborted, BulkLoadMode
 
 
 def _coerce_int(value, default):
@@ -16,8 +24,14 @@ INDEX_NAME = utils.CONFIG.get("default_ingest_index", "logs-sample")
 # Use configured path or fallback to default relative path
 LOG_FILE_PATH = utils.CONFIG.get("log_file_path", "./sample.log")
 BATCH_SIZE = _coerce_int(utils.CONFIG.get("ingest_batch_size", 500), 500)
+# Byte bound per batch; keep well below http.max_content_length (100mb by default).
+BATCH_BYTES = _coerce_int(utils.CONFIG.get("ingest_batch_bytes", 5 * 1024 * 1024), 5 * 1024 * 1024)
+WORKERS = _coerce_int(utils.CONFIG.get("ingest_workers", 1), 1)
+IDEMPOTENT_IDS = bool(utils.CONFIG.get("ingest_idempotent_ids", False))
+BULK_GZIP = bool(utils.CONFIG.get("bulk_gzip", False))
+READERS = _coerce_int(utils.CONFIG.get("ingest_readers", os.cpu_count() or 1), os.cpu_count() or 1)
 
-def ingest_logs(index_name=INDEX_NAME):
+def resolve_log_path(log_file_path=LOG_FILE_PATH):
     # Resolve absolute path
     # If LOG_FILE_PATH is absolute, os.path.join will use it directly.
     # If relative, it will be relative to this script's directory (ingest/).
@@ -30,71 +44,152 @@ def ingest_logs(index_name=INDEX_NAME):
     # Let's try to resolve it relative to the config file location (daily_ops_scripts root) if possible,
     # or just use it as is if absolute.
     
-    if os.path.isabs(LOG_FILE_PATH):
-        file_path = LOG_FILE_PATH
+    if os.path.isabs(log_file_path):
+        file_path = log_file_path
     else:
         # Assume relative to daily_ops_scripts root (where config.json is)
         # utils.py is in daily_ops_scripts/
         base_dir = os.path.dirname(os.path.abspath(utils.__file__))
-        file_path = os.path.join(base_dir, LOG_FILE_PATH)
+        file_path = os.path.join(base_dir, log_file_path)
 
     if not os.path.exists(file_path):
         # Fallback: try relative to this script (ingest/) just in case
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        fallback_path = os.path.join(script_dir, LOG_FILE_PATH)
+        fallback_path = os.path.join(script_dir, log_file_path)
         if os.path.exists(fallback_path):
             file_path = fallback_path
         else:
             print(f"Error: Log file not found at {file_path} or {fallback_path}")
+            return None
+    return file_path
+
+def _resolve_files(paths):
+    if not paths:
+        file_path = resolve_log_path()
+        return [file_path] if file_path else []
+    files = expand_log_paths(paths)
+    if not files:
+        print(f"Error: No log files matched {', '.join(paths)}")
+    return files
+
+def ingest_logs(index_name=INDEX_NAME, workers=WORKERS, batch_size=BATCH_SIZE, batch_bytes=BATCH_BYTES,
+                adaptive=None, resume=False, idempotent_ids=IDEMPOTENT_IDS, gzip=BULK_GZIP,
+                paths=None, readers=READERS, follow=False, flush_ms=FLUSH_MS, bulk_load_mode=False):
+    files = _resolve_files(paths)
+    if not files:
+        return
+
+    if bulk_load_mode:
+        if follow:
+            print("Error: --bulk-load-mode is for one-off backfills and cannot be combined with --follow.")
             return
+        stats = None
+        try:
+            with BulkLoadMode(index_name):
+                stats = ingest_logs(
+                    index_name, workers, batch_size, batch_bytes, adaptive=adaptive, resume=resume,
+                    idempotent_ids=idempotent_ids, gzip=gzip, paths=files, readers=readers,
+                )
+        except BulkLoadAborted as e:
+            print(f"Error: {e}; not tuning the index and not ingesting.")
+        # BulkLoadMode swallows Ctrl-C/SIGTERM after restoring, so this is
+        # reached on interruption too; never fall through to a second ingest.
+        return stats
 
-    print(f"Reading logs from {file_path}...")
-    
-    bulk_data = []
-    count = 0
-    
-    try:
-        with open(file_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Create action line
-                action = {"index": {"_index": index_name}}
-                bulk_data.append(json.dumps(action))
-                bulk_data.append(line)
-                count += 1
-                
-                # Send in batches of 500
-                if count % BATCH_SIZE == 0:
-                    send_bulk_request(bulk_data)
-                    bulk_data = []
-                    print(f"Processed {count} documents...")
+    if follow:
+        if len(files) != 1:
+            print(f"Error: --follow needs exactly one file, got {len(files)}.")
+            return
+        limits = build_batch_limits(batch_size, batch_bytes, adaptive)
+        LogFollower(
+            files[0], index_name, limits, workers=workers, gzip=gzip, idempotent_ids=idempotent_ids,
+            resume=resume, flush_ms=flush_ms,
+        ).run()
+        return
 
-        # Send remaining
-        if bulk_data:
-            send_bulk_request(bulk_data)
-            print(f"Processed {count} documents (Finished).")
-            
-    except Exception as e:
-        print(f"Error reading file: {e}")
+    store = CheckpointStore()
+    trackers = []
+    for file_path in files:
+        start_offset, start_docs = resume_position(store, file_path) if resume else (0, 0)
+        trackers.append(CheckpointTracker(store, file_path, os.stat(file_path).st_ino, start_offset, start_docs))
 
-def send_bulk_request(bulk_data):
-    # Bulk data must end with a newline
-    data_str = "\n".join(bulk_data) + "\n"
-    
-    # Use utils.make_request
-    # We explicitly set Content-Type to application/x-ndjson, though application/json often works too.
-    result = utils.make_request("_bulk", method="POST", data=data_str, headers={'Content-Type': 'application/x-ndjson'})
+    limits = build_batch_limits(batch_size, batch_bytes, adaptive)
+    source_desc = files[0] if len(files) == 1 else f"{len(files)} files"
+    print(f"Reading logs from {source_desc} with {workers} sender worker(s), {limits.describe()}...")
+    if gzip:
+        print(f"Bulk bodies are gzip-compressed (level {utils.GZIP_LEVEL}).")
+    for tracker in trackers:
+        if tracker.offset:
+            print(f"Resuming {tracker.file_path} at byte offset {tracker.offset} ({tracker.docs} documents already acknowledged).")
+
+    # Batches are handed to sender threads through a bounded queue; reading
+    # blocks whenever the senders fall behind.
+    stats = IngestStats()
+    sender = BulkSender(stats, limits=limits, compress=gzip)
+    pipeline = BulkPipeline(
+        sender,
+        workers=workers,
+        stats=stats,
+        on_complete=lambda batch, acked: trackers[batch.source].complete(batch.seq, batch.end_offset, acked),
+    )
+    count = 0
     
-    if result and result.get('errors'):
-        print("Warning: Some documents failed to index.")
-        # In a real script, you'd inspect result['items'] for errors
+    try:
+        if readers > 1 and len(files) > 1:
+            # Several files: decompress and build bodies in reader processes.
+            print(f"Spreading {len(files)} files over {min(readers, len(files))} reader processes.")
+            read_counts = []
+            parallel = ParallelReaders(
+                [(i, t.file_path, t.offset) for i, t in enumerate(trackers)],
+                limits, index_name, readers, idempotent_ids=idempotent_ids,
+            )
+            parallel.run(
+                pipeline.submit,
+                on_file_done=lambda source, docs: read_counts.append(docs),
+                on_file_error=lambda source, error: print(f"Error reading file {files[source]}: {error}"),
+            )
+            count = sum(read_counts)
+        else:
+            pool = BufferPool(pipeline.capacity + 1)
+            for source, tracker in enumerate(trackers):
+                try:
+                    count += read_log(
+                        tracker.file_path, index_name, limits, pool, pipeline.submit,
+                        start_offset=tracker.offset, idempotent_ids=idempotent_ids, source=source,
+                    )
+                except Exception as e:
+                    print(f"Error reading file {tracker.file_path}: {e}")
+    finally:
+        pipeline.close()
+        sender.dead_letter.close()
+        print(f"Read {count} documents (Finished).")
+        print(stats.summary())
+        print(utils.WIRE_STATS.summary())
+        if sender.dead_letter.count:
+            print(f"{sender.dead_letter.count} failed documents written to {sender.dead_letter.path}")
+        if len(trackers) == 1:
+            print(f"Checkpoint: byte offset {trackers[0].offset}, {trackers[0].docs} documents acknowledged ({store.path}).")
+        else:
+            print(f"Checkpoints for {len(trackers)} files saved to {store.path}.")
+        if limits.adaptive:
+            print(f"Adaptive batch limits settled at {limits.describe()}.")
+    return stats
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Ingest sample logs into Elasticsearch")
     parser.add_argument("--index", default=INDEX_NAME, help=f"Target index name (default: {INDEX_NAME})")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Concurrent bulk sender threads (default: {WORKERS})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Max documents per bulk request (default: {BATCH_SIZE})")
+    parser.add_argument("--batch-bytes", type=int, default=BATCH_BYTES, help=f"Max bytes per bulk request (default: {BATCH_BYTES})")
+    parser.add_argument("--adaptive", action="store_true", default=None, help="Adapt batch size to bulk latency and 429s")
+    parser.add_argument("--path", action="append", help="Log file, directory or glob (repeatable; .gz/.bz2 supported)")
+    parser.add_argument("--readers", type=int, default=READERS, help=f"Reader processes for multi-file ingest (default: {READERS})")
+    parser.add_argument("--follow", action="store_true", help="Keep tailing the file and ship new lines as they are written")
+    parser.add_argument("--flush-ms", type=int, default=FLUSH_MS, help=f"In --follow mode, flush a partial batch after this long (default: {FLUSH_MS})")
+    parser.add_argument("--gzip", action="store_true", default=BULK_GZIP, help="gzip-compress bulk request bodies")
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpointed byte offset")
+    parser.add_argument("--idempotent-ids", action="store_true", default=IDEMPOTENT_IDS, help="Derive _id from file path + byte offset")
+    parser.add_argument("--bulk-load-mode", action="store_true", help="Tune the index for the backfill (no refresh/replicas, async translog) and restore it afterwards")
     args = parser.parse_args()
 
     # Update global INDEX_NAME if provided
@@ -102,4 +197,18 @@ if __name__ == "__main__":
         INDEX_NAME = args.index
 
     print(f"Ingesting logs into index '{INDEX_NAME}'...")
-    ingest_logs()
+    ingest_logs(
+        INDEX_NAME,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        batch_bytes=args.batch_bytes,
+        adaptive=args.adaptive,
+        resume=args.resume,
+        idempotent_ids=args.idempotent_ids,
+        gzip=args.gzip,
+        paths=args.path,
+        readers=args.readers,
+        follow=args.follow,
+        flush_ms=args.flush_ms,
+        bulk_load_mode=args.bulk_load_mode,
+    )
@@ -0,0 +1,120 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import multiprocessing
+import queue
+from ingest.batch_sizing import SharedBatchLimits
+from ingest.bulk_body import BufferPool
+from ingest.log_sources import read_log
+
+# Messages a reader process puts on the output queue besides BulkBatch objects.
+FILE_START = "file_start"
+FILE_DONE = "file_done"
+FILE_ERROR = "file_error"
+READER_EXIT = "reader_exit"
+# How often the parent checks for readers that died without saying so.
+LIVENESS_SECONDS = 1.0
+
+
+def _reader_main(tasks, out, shared_limits, index_name, idempotent_ids):
+    """Reader process: pull (source, path, offset) tasks, push batches to `out`."""
+    limits = SharedBatchLimits(shared_limits)
+    # Buffers are handed over with the batches (detach), not recycled: the
+    # queue pickles them in a feeder thread after put() has returned.
+    pool = BufferPool(0)
+    pid = os.getpid()
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            source, path, start_offset = task
+            out.put((FILE_START, source, pid))
+            try:
+                docs = read_log(
+                    path, index_name, limits, pool,
+                    lambda batch: out.put(batch.detach()),
+                    start_offset=start_offset, idempotent_ids=idempotent_ids, source=source,
+                )
+                out.put((FILE_DONE, source, docs))
+            except Exception as e:
+                out.put((FILE_ERROR, source, f"{type(e).__name__}: {e}"))
+    finally:
+        out.put((READER_EXIT, None, pid))
+
+
+class ParallelReaders:
+    """Spread log files over a pool of reader processes.
+
+    Readers decompress, frame lines and build bulk bodies on every core and
+    send finished batches back over a bounded queue; the parent drains it into
+    its single BulkPipeline. Since the parent only consumes as fast as the
+    senders accept batches, backpressure reaches the readers through the queue.
+    The 'spawn' start method is used so children never inherit the parent's
+    sender threads or pooled sockets.
+    """
+
+    def __init__(self, files, limits, index_name, processes, idempotent_ids=False):
+        self.ctx = multiprocessing.get_context("spawn")
+        self.processes = max(1, min(processes, len(files)))
+        self._tasks = self.ctx.Queue()
+        self._out = self.ctx.Queue(maxsize=self.processes * 2)
+        shared = limits.share(self.ctx)
+        for task in files:
+            self._tasks.put(task)
+        for _ in range(self.processes):
+            self._tasks.put(None)
+        self._procs = [
+            self.ctx.Process(
+                target=_reader_main,
+                args=(self._tasks, self._out, shared, index_name, idempotent_ids),
+                daemon=True,
+            )
+            for _ in range(self.processes)
+        ]
+
+    def _reap(self, live, reading, on_file_error):
+        """Drop readers that died without a READER_EXIT (e.g. OOM-killed) and fail their current file."""
+        for proc in self._procs:
+            if proc.pid not in live or proc.is_alive() or proc.exitcode == 0:
+                continue
+            live.discard(proc.pid)
+            source = reading.pop(proc.pid, None)
+            if source is not None and on_file_error:
+                on_file_error(source, f"reader process died (exit code {proc.exitcode})")
+
+    def run(self, submit, on_file_done=None, on_file_error=None):
+        """Start the readers and feed every batch to `submit` until all of them exit."""
+        for proc in self._procs:
+            proc.start()
+        live = {proc.pid for proc in self._procs}
+        # pid -> source of the file each reader is on.
+        reading = {}
+        try:
+            while live:
+                try:
+                    msg = self._out.get(timeout=LIVENESS_SECONDS)
+                except queue.Empty:
+                    self._reap(live, reading, on_file_error)
+                    continue
+                if isinstance(msg, tuple):
+                    kind, source, value = msg
+                    if kind == READER_EXIT:
+                        live.discard(value)
+                    elif kind == FILE_START:
+                        reading[value] = source
+                    elif kind in (FILE_DONE, FILE_ERROR):
+                        for pid, current in list(reading.items()):
+                            if current == source:
+                                del reading[pid]
+                        if kind == FILE_DONE and on_file_done:
+                            on_file_done(source, value)
+                        elif kind == FILE_ERROR and on_file_error:
+                            on_file_error(source, value)
+                    continue
+                submit(msg)
+        finally:
+            for proc in self._procs:
+                if proc.is_alive() and live:
+                    proc.terminate()
+                proc.join()
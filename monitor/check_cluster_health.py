@@ -3,6 +3,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import utils
 import argparse
+from monitor import node_stats
 
 def get_cluster_health():
     data = utils.make_request("_cluster/health")
@@ -21,18 +22,24 @@ def get_cluster_health():
     return None
 
 def get_nodes_info():
-    data = utils.make_request("_cat/nodes?v&h=ip,heap.percent,ram.percent,cpu,load_1m,node.role,master,name&format=json")
-    if data:
+    snapshot = node_stats.get_snapshot()
+    if snapshot:
         print("\n=== Nodes Info ===")
         print(f"{'Name':<20} {'IP':<15} {'Role':<10} {'Master':<8} {'CPU%':<6} {'Heap%':<6} {'RAM%':<6} {'Load 1m':<8}")
         print("-" * 90)
-        for node in data:
-            print(f"{node.get('name', 'N/A'):<20} {node.get('ip', 'N/A'):<15} {node.get('node.role', 'N/A'):<10} {node.get('master', 'N/A'):<8} {node.get('cpu', 'N/A'):<6} {node.get('heap.percent', 'N/A'):<6} {node.get('ram.percent', 'N/A'):<6} {node.get('load_1m', 'N/A'):<8}")
+        for node in snapshot.nodes():
+            print(f"{node.name:<20} {node.ip:<15} {node.role:<10} {node.master:<8} {node.cpu:<6} {node.heap_percent:<6} {node.ram_percent:<6} {node.load_1m:<8}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Checks the health of the Elasticsearch cluster and lists node information.")
+    parser.add_argument("--watch", type=float, metavar="INTERVAL", help="Poll every INTERVAL seconds and show per-second rates")
     args = parser.parse_args()
 
+    if args.watch:
+        from monitor import watch
+        watch.watch(args.watch)
+        sys.exit(0)
+
     health = get_cluster_health()
     if health:
         get_nodes_info()
@@ -2,8 +2,22 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import utils
+from monitor import node_stats
+import io
+import threading
+import time
 
 
+def _coerce_float(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+# Seconds each diagnostics check may take before it is reported as timed out.
+CHECK_TIMEOUT = _coerce_float(utils.CONFIG.get("diagnostics_check_timeout", 10), 10.0)
+
 def _format_bytes(num_bytes):
     try:
         num_bytes = int(num_bytes)
@@ -18,9 +32,13 @@ def _format_bytes(num_bytes):
         return f"{num_bytes/1024:.2f} KB"
     return f"{num_bytes} B"
 
-def check_pending_tasks():
-    print("\n--- Pending Cluster Tasks ---")
-    data = utils.make_request("_cluster/pending_tasks")
+def _print_header(title):
+    print(f"\n--- {title} ---")
+
+def fetch_pending_tasks():
+    return utils.make_request("_cluster/pending_tasks")
+
+def render_pending_tasks(data):
     if data and 'tasks' in data:
         tasks = data['tasks']
         if not tasks:
@@ -34,20 +52,22 @@ def check_pending_tasks():
     else:
         print("Could not retrieve pending tasks.")
 
-def check_thread_pool_rejections():
-    print("\n--- Thread Pool Rejections (Write/Search) ---")
-    # Get cat thread pool info for search and write
-    data = utils.make_request("_cat/thread_pool/write,search?v&h=node_name,name,active,queue,rejected&format=json")
-    
+def check_pending_tasks():
+    _print_header("Pending Cluster Tasks")
+    render_pending_tasks(fetch_pending_tasks())
+
+def fetch_thread_pool_rejections():
+    return node_stats.get_snapshot()
+
+def render_thread_pool_rejections(snapshot):
     has_rejections = False
-    if data:
+    if snapshot:
         print(f"{'Node':<20} {'Type':<10} {'Active':<8} {'Queue':<8} {'Rejected':<10}")
         print("-" * 60)
-        for node in data:
-            rejected = int(node.get('rejected', 0))
-            if rejected > 0:
+        for pool in snapshot.thread_pools():
+            if pool.rejected > 0:
                 has_rejections = True
-            print(f"{node.get('node_name', 'N/A'):<20} {node.get('name', 'N/A'):<10} {node.get('active', 'N/A'):<8} {node.get('queue', 'N/A'):<8} {node.get('rejected', 'N/A'):<10}")
+            print(f"{pool.node:<20} {pool.name:<10} {pool.active:<8} {pool.queue:<8} {pool.rejected:<10}")
         
         if has_rejections:
             print("\nWARNING: Rejections detected! This indicates the cluster is overloaded.")
@@ -56,49 +76,52 @@ def check_thread_pool_rejections():
     else:
         print("Could not retrieve thread pool stats.")
 
-def check_circuit_breakers():
-    print("\n--- Circuit Breakers ---")
-    data = utils.make_request("_nodes/stats/breaker")
-    
+def check_thread_pool_rejections():
+    _print_header("Thread Pool Rejections (Write/Search)")
+    render_thread_pool_rejections(fetch_thread_pool_rejections())
+
+def fetch_circuit_breakers():
+    return node_stats.get_snapshot()
+
+def render_circuit_breakers(snapshot):
     tripped = False
-    if data and 'nodes' in data:
-        for node_id, node_stats in data['nodes'].items():
-            breakers = node_stats.get('breakers', {})
-            for breaker_name, stats in breakers.items():
-                tripped_count = stats.get('tripped', 0)
-                if tripped_count > 0:
-                    tripped = True
-                    print(f"WARNING: Node {node_stats.get('name')} - Breaker '{breaker_name}' tripped {tripped_count} times!")
+    if snapshot:
+        for breaker in snapshot.breakers():
+            if breaker.tripped > 0:
+                tripped = True
+                print(f"WARNING: Node {breaker.node} - Breaker '{breaker.name}' tripped {breaker.tripped} times!")
         
         if not tripped:
             print("No circuit breakers tripped. (Good)")
     else:
         print("Could not retrieve circuit breaker stats.")
 
-def check_translog_stats():
-    print("\n--- Translog Stats (Persistence) ---")
+def check_circuit_breakers():
+    _print_header("Circuit Breakers")
+    render_circuit_breakers(fetch_circuit_breakers())
+
+def fetch_translog_stats():
+    return node_stats.get_snapshot()
+
+def render_translog_stats(snapshot):
     print("Note: 'Uncommitted Ops' = ops not yet in a Lucene commit point (flush), not about translog fsync timing.")
-    data = utils.make_request("_nodes/stats/indices/translog")
-    
-    if data and 'nodes' in data:
+    if snapshot:
         print(f"{'Node':<20} {'Size':<15} {'Ops':<10} {'Uncommitted Ops':<15}")
         print("-" * 65)
-        for node_id, node_stats in data['nodes'].items():
-            name = node_stats.get('name', 'N/A')
-            translog = node_stats.get('indices', {}).get('translog', {})
-            size = translog.get('size_in_bytes', 0)
-            ops = translog.get('operations', 0)
-            uncommitted = translog.get('uncommitted_operations', 0)
-            
-            size_str = _format_bytes(size)
+        for translog in snapshot.translog():
+            size_str = _format_bytes(translog.size_bytes)
 
-            print(f"{name:<20} {size_str:<15} {ops:<10} {uncommitted:<15}")
+            print(f"{translog.node:<20} {size_str:<15} {translog.operations:<10} {translog.uncommitted_operations:<15}")
             
-            if uncommitted > 10000: # Arbitrary threshold for warning
-                print(f"WARNING: High uncommitted operations on node {name}. Risk of long recovery.")
+            if translog.uncommitted_operations > 10000: # Arbitrary threshold for warning
+                print(f"WARNING: High uncommitted operations on node {translog.node}. Risk of long recovery.")
     else:
         print("Could not retrieve translog stats.")
 
+def check_translog_stats():
+    _print_header("Translog Stats (Persistence)")
+    render_translog_stats(fetch_translog_stats())
+
 
 def check_index_translog(index_name):
     """Print translog stats at shard level for a given index.
@@ -149,10 +172,10 @@ def check_index_translog(index_name):
                 f"{str(shard_id):<8} {prirep:<8} {str(node):<20} {_format_bytes(size):<12} {str(ops):<10} {str(uncommitted_ops):<15}"
             )
 
-def check_node_paths():
-    print("\n--- Node Data Paths ---")
-    data = utils.make_request("_nodes/settings")
-    
+def fetch_node_paths():
+    return utils.make_request("_nodes/settings")
+
+def render_node_paths(data):
     if data and 'nodes' in data:
         print(f"{'Node':<20} {'Data Path':<50}")
         print("-" * 70)
@@ -170,13 +193,68 @@ def check_node_paths():
     else:
         print("Could not retrieve node settings.")
 
-def run_diagnostics():
+def check_node_paths():
+    _print_header("Node Data Paths")
+    render_node_paths(fetch_node_paths())
+
+
+# (title, fetch, render) in report order. run_diagnostics fetches them all at
+# once and renders them in this order.
+DIAGNOSTIC_CHECKS = [
+    ("Pending Cluster Tasks", fetch_pending_tasks, render_pending_tasks),
+    ("Thread Pool Rejections (Write/Search)", fetch_thread_pool_rejections, render_thread_pool_rejections),
+    ("Circuit Breakers", fetch_circuit_breakers, render_circuit_breakers),
+    ("Translog Stats (Persistence)", fetch_translog_stats, render_translog_stats),
+    ("Node Data Paths", fetch_node_paths, render_node_paths),
+]
+
+
+def _run_fetch(fetch, results, index):
+    # Errors printed while fetching go to this check's own buffer.
+    buffer = io.StringIO()
+    utils.set_thread_output(buffer)
+    try:
+        results[index] = ("ok", fetch(), buffer)
+    except Exception as e:
+        results[index] = ("error", e, buffer)
+    finally:
+        utils.set_thread_output(None)
+
+
+def run_diagnostics(timeout=CHECK_TIMEOUT):
+    """Fetch every check concurrently, then render them in the usual order.
+
+    Each check gets `timeout` seconds from the start of the run. A check that
+    is still waiting on the cluster is reported as timed out and the rest of
+    the report carries on. Its daemon thread is abandoned and does not keep
+    the process alive. Request errors a check runs into are held back and
+    shown in its own section.
+    """
     print("Running comprehensive cluster diagnostics...")
-    check_pending_tasks()
-    check_thread_pool_rejections()
-    check_circuit_breakers()
-    check_translog_stats()
-    check_node_paths()
+    started = time.monotonic()
+    results = [None] * len(DIAGNOSTIC_CHECKS)
+    threads = []
+    for i, (title, fetch, _render) in enumerate(DIAGNOSTIC_CHECKS):
+        thread = threading.Thread(target=_run_fetch, args=(fetch, results, i), name=f"diag-{i}", daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    for i, (title, _fetch, render) in enumerate(DIAGNOSTIC_CHECKS):
+        threads[i].join(max(0.0, started + timeout - time.monotonic()))
+        _print_header(title)
+        outcome = results[i]
+        if outcome is None:
+            # A late error from this check goes to its buffer, which is never read.
+            print(f"Timed out after {timeout:g}s.")
+            continue
+        status, value, buffer = outcome
+        print(buffer.getvalue(), end="")
+        if status == "error":
+            print(f"Check failed: {value}")
+        else:
+            render(value)
+
+    print(f"\nDiagnostics completed in {time.monotonic() - started:.2f}s.")
 
 if __name__ == "__main__":
     run_diagnostics()
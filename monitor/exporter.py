@@ -0,0 +1,256 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from monitor import node_stats
+
+
+def _coerce_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _coerce_float(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+EXPORTER_PORT = _coerce_int(utils.CONFIG.get("exporter_port", 9114), 9114)
+# Seconds between background refreshes; scrapes in between are served from memory.
+REFRESH_INTERVAL = max(1.0, _coerce_float(utils.CONFIG.get("exporter_refresh_interval", 15), 15.0))
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+_STATUS_VALUES = {"green": 0, "yellow": 1, "red": 2}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class _Family:
+    """Samples of one metric family, rendered as an OpenMetrics block."""
+
+    def __init__(self, name, kind, help_text):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.samples = []
+
+    def add(self, value, **labels):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return
+        self.samples.append((labels, value))
+
+    def render(self, lines):
+        if not self.samples:
+            return
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        lines.append(f"# HELP {self.name} {self.help_text}")
+        suffix = "_total" if self.kind == "counter" else ""
+        for labels, value in self.samples:
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            label_text = "{" + label_text + "}" if label_text else ""
+            lines.append(f"{self.name}{suffix}{label_text} {value}")
+
+
+def render_openmetrics(snapshot, health=None):
+    """Render a node stats snapshot (+ cluster health) as OpenMetrics lines, without `# EOF`."""
+    families = []
+
+    def family(name, kind, help_text):
+        fam = _Family(name, kind, help_text)
+        families.append(fam)
+        return fam
+
+    if health:
+        status = family("es_cluster_status", "gauge", "Cluster health status (0=green, 1=yellow, 2=red).")
+        status.add(_STATUS_VALUES.get(health.get('status')))
+        for field, help_text in (
+            ("number_of_nodes", "Nodes in the cluster."),
+            ("active_shards", "Active primary and replica shards."),
+            ("relocating_shards", "Shards being relocated."),
+            ("initializing_shards", "Shards being initialized."),
+            ("unassigned_shards", "Unassigned shards."),
+            ("number_of_pending_tasks", "Cluster-level changes not yet executed by the master."),
+        ):
+            family(f"es_cluster_{field}", "gauge", help_text).add(health.get(field))
+
+    if snapshot is not None:
+        heap = family("es_node_heap_used_percent", "gauge", "JVM heap used, percent.")
+        cpu = family("es_node_cpu_percent", "gauge", "OS CPU usage, percent.")
+        ram = family("es_node_ram_used_percent", "gauge", "OS memory used, percent.")
+        load = family("es_node_load1", "gauge", "1 minute load average.")
+        master = family("es_node_is_master", "gauge", "1 if the node is the elected master.")
+        for node in snapshot.nodes():
+            heap.add(node.heap_percent, node=node.name)
+            cpu.add(node.cpu, node=node.name)
+            ram.add(node.ram_percent, node=node.name)
+            load.add(node.load_1m, node=node.name)
+            master.add(1 if node.master == "*" else 0, node=node.name)
+
+        active = family("es_thread_pool_active_threads", "gauge", "Busy threads in the thread pool.")
+        queue = family("es_thread_pool_queue", "gauge", "Tasks queued in the thread pool.")
+        rejected = family("es_thread_pool_rejected", "counter", "Tasks rejected by the thread pool since node start.")
+        for pool in snapshot.thread_pools():
+            active.add(pool.active, node=pool.node, pool=pool.name)
+            queue.add(pool.queue, node=pool.node, pool=pool.name)
+            rejected.add(pool.rejected, node=pool.node, pool=pool.name)
+
+        tripped = family("es_breaker_tripped", "counter", "Times the circuit breaker tripped since node start.")
+        estimated = family("es_breaker_estimated_bytes", "gauge", "Memory currently accounted by the circuit breaker.")
+        limit = family("es_breaker_limit_bytes", "gauge", "Circuit breaker limit.")
+        for breaker in snapshot.breakers():
+            tripped.add(breaker.tripped, node=breaker.node, breaker=breaker.name)
+            estimated.add(breaker.estimated_bytes, node=breaker.node, breaker=breaker.name)
+            limit.add(breaker.limit_bytes, node=breaker.node, breaker=breaker.name)
+
+        size = family("es_translog_size_bytes", "gauge", "Translog size on the node.")
+        ops = family("es_translog_operations", "gauge", "Operations in the translog.")
+        uncommitted = family("es_translog_uncommitted_operations", "gauge",
+                             "Translog operations not yet in a Lucene commit point (flush).")
+        for translog in snapshot.translog():
+            size.add(translog.size_bytes, node=translog.node)
+            ops.add(translog.operations, node=translog.node)
+            uncommitted.add(translog.uncommitted_operations, node=translog.node)
+
+        indexed = family("es_indexing_index", "counter", "Documents indexed since node start.")
+        queries = family("es_search_query", "counter", "Search queries executed since node start.")
+        for doc_ops in snapshot.doc_ops():
+            indexed.add(doc_ops.index_total, node=doc_ops.node)
+            queries.add(doc_ops.query_total, node=doc_ops.node)
+
+    lines = []
+    for fam in families:
+        fam.render(lines)
+    return lines
+
+
+class MetricsCache:
+    """Exposition text refreshed by one background thread.
+
+    Scrapes only read the last rendered body, so any number of concurrent
+    Prometheus servers cost the cluster one `_nodes/stats` + `_cluster/health`
+    per refresh interval. If a refresh fails the last good metrics are kept and
+    `es_exporter_up` drops to 0.
+    """
+
+    def __init__(self, interval=REFRESH_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._metrics = []
+        self._body = b"# EOF\n"
+        self._errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def body(self):
+        with self._lock:
+            return self._body
+
+    def refresh(self):
+        started = time.monotonic()
+        snapshot = node_stats.get_snapshot(max_age=0)
+        health = utils.make_request("_cluster/health")
+        up = snapshot is not None and health is not None
+        with self._lock:
+            if up:
+                self._metrics = render_openmetrics(snapshot, health)
+            else:
+                self._errors += 1
+            meta = []
+            for name, kind, help_text, value in (
+                ("es_exporter_up", "gauge", "1 if the last refresh reached the cluster.", 1 if up else 0),
+                ("es_exporter_refresh_errors", "counter", "Refreshes that failed.", self._errors),
+                ("es_exporter_refresh_duration_seconds", "gauge", "Duration of the last refresh.",
+                 round(time.monotonic() - started, 6)),
+                ("es_exporter_last_refresh_timestamp_seconds", "gauge", "Unix time of the last refresh.",
+                 round(time.time(), 3)),
+            ):
+                fam = _Family(name, kind, help_text)
+                fam.add(value)
+                fam.render(meta)
+            self._body = ("\n".join(self._metrics + meta) + "\n# EOF\n").encode("utf-8")
+        return up
+
+    def _run(self):
+        next_refresh = time.monotonic() + self.interval
+        while not self._stop.wait(max(0.0, next_refresh - time.monotonic())):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing metrics: {e}")
+            next_refresh += self.interval
+            if next_refresh < time.monotonic():
+                next_refresh = time.monotonic() + self.interval
+
+    def start(self):
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name="exporter-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def _make_handler(cache):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                self._reply(200, cache.body, CONTENT_TYPE)
+            elif path == "/":
+                self._reply(200, b"Elasticsearch daily ops exporter. Metrics at /metrics\n", "text/plain; charset=utf-8")
+            else:
+                self._reply(404, b"Not found\n", "text/plain; charset=utf-8")
+
+        def _reply(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def serve(port=EXPORTER_PORT, interval=REFRESH_INTERVAL, host="0.0.0.0"):
+    """Serve cached cluster metrics at http://host:port/metrics until Ctrl-C."""
+    cache = MetricsCache(interval)
+    cache.start()
+    server = ThreadingHTTPServer((host, port), _make_handler(cache))
+    server.daemon_threads = True
+    print(f"Serving OpenMetrics on http://{host}:{port}/metrics (refresh every {interval:g}s, cluster {utils.ES_HOST})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping exporter.")
+    finally:
+        cache.stop()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve cluster metrics in OpenMetrics format for Prometheus.")
+    parser.add_argument("--port", type=int, default=EXPORTER_PORT, help=f"Port to listen on (default: {EXPORTER_PORT})")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL, help=f"Seconds between cluster refreshes (default: {REFRESH_INTERVAL:g})")
+    parser.add_argument("--once", action="store_true", help="Print one exposition to stdout and exit")
+    args = parser.parse_args()
+
+    if args.once:
+        cache = MetricsCache(args.interval)
+        cache.refresh()
+        sys.stdout.write(cache.body.decode("utf-8"))
+    else:
+        serve(args.port, args.interval)
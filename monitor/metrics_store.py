@@ -0,0 +1,338 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils
+import argparse
+import fnmatch
+import re
+import time
+from array import array
+from monitor import node_stats
+
+
+def _coerce_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _resolve_path(path):
+    if os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(utils.__file__)), path)
+
+
+def _get_retention_config():
+    section = utils.CONFIG.get("metrics_retention", {})
+    return section if isinstance(section, dict) else {}
+
+
+METRICS_DIR = _resolve_path(utils.CONFIG.get("metrics_dir", "monitor/metrics"))
+COLLECT_INTERVAL = max(1, _coerce_int(utils.CONFIG.get("metrics_interval", 10), 10))
+
+# (tier name, bucket width in seconds, retention in seconds). "raw" keeps every
+# sample; the others keep one averaged point per bucket.
+_retention = _get_retention_config()
+TIERS = (
+    ("raw", 0, _coerce_int(_retention.get("raw", 86400), 86400)),
+    ("1m", 60, _coerce_int(_retention.get("1m", 7 * 86400), 7 * 86400)),
+    ("1h", 3600, _coerce_int(_retention.get("1h", 90 * 86400), 90 * 86400)),
+)
+
+# One record = (timestamp, value) as two native doubles.
+RECORD_SIZE = array('d').itemsize * 2
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def parse_duration(text):
+    """Parse '90s', '15m', '2h', '7d' (or plain seconds) into seconds."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", str(text))
+    if not match:
+        raise ValueError(f"invalid duration '{text}' (expected e.g. 30m, 2h, 7d)")
+    value, unit = match.groups()
+    return float(value) * {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}[unit]
+
+
+class Series:
+    """One metric in one tier: an append-only file of fixed-width (ts, value) records.
+
+    Records are written in timestamp order, so a time range is found with a
+    binary search over record positions (one 16-byte read per probe) and then
+    only that slice of the file is read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._last_ts = None
+
+    def _count(self):
+        try:
+            return os.path.getsize(self.path) // RECORD_SIZE
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _ts_at(f, index):
+        f.seek(index * RECORD_SIZE)
+        record = array('d')
+        record.fromfile(f, 2)
+        return record[0]
+
+    def last_timestamp(self):
+        if self._last_ts is None:
+            count = self._count()
+            if count:
+                with open(self.path, 'rb') as f:
+                    self._last_ts = self._ts_at(f, count - 1)
+        return self._last_ts
+
+    def append(self, ts, value):
+        last = self.last_timestamp()
+        if last is not None and ts <= last:
+            return False  # keep the file sorted (clock went backwards, duplicate bucket)
+        with open(self.path, 'ab') as f:
+            array('d', (ts, value)).tofile(f)
+        self._last_ts = ts
+        return True
+
+    def _lower_bound(self, f, count, ts):
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts_at(f, mid) < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def read(self, since=None, until=None):
+        """Return (timestamps, values) arrays for since <= ts <= until."""
+        timestamps, values = array('d'), array('d')
+        count = self._count()
+        if not count:
+            return timestamps, values
+        with open(self.path, 'rb') as f:
+            start = self._lower_bound(f, count, since) if since is not None else 0
+            end = self._lower_bound(f, count, until + 1e-6) if until is not None else count
+            if end <= start:
+                return timestamps, values
+            f.seek(start * RECORD_SIZE)
+            records = array('d')
+            records.fromfile(f, (end - start) * 2)
+        return records[0::2], records[1::2]
+
+    def prune(self, before):
+        """Drop records older than `before` by rewriting the remaining tail."""
+        count = self._count()
+        if not count:
+            return 0
+        with open(self.path, 'rb') as f:
+            start = self._lower_bound(f, count, before)
+            if start == 0:
+                return 0
+            f.seek(start * RECORD_SIZE)
+            tail = f.read()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(tail)
+        os.replace(tmp_path, self.path)
+        return start
+
+
+class MetricsStore:
+    """Per-metric series files under `root`, one directory per tier.
+
+    `append` writes the raw sample and folds it into the running average of
+    every downsampled tier; a tier point is written when its bucket closes. A
+    bucket still open when the collector stops is lost, which costs at most
+    one point per tier.
+    """
+
+    def __init__(self, root=METRICS_DIR, tiers=TIERS):
+        self.root = root
+        self.tiers = tiers
+        self._series = {}
+        self._buckets = {}
+        for name, _width, _retention in tiers:
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+
+    def series(self, metric, tier="raw"):
+        key = (metric, tier)
+        series = self._series.get(key)
+        if series is None:
+            filename = _UNSAFE.sub("_", metric) + ".f64"
+            series = self._series[key] = Series(os.path.join(self.root, tier, filename))
+        return series
+
+    def metrics(self, pattern="*"):
+        raw_dir = os.path.join(self.root, "raw")
+        if not os.path.isdir(raw_dir):
+            return []
+        names = [name[:-4] for name in os.listdir(raw_dir) if name.endswith(".f64")]
+        return sorted(name for name in names if fnmatch.fnmatchcase(name, pattern))
+
+    def append(self, metric, ts, value):
+        for tier, width, _retention in self.tiers:
+            if width == 0:
+                self.series(metric, tier).append(ts, value)
+                continue
+            bucket_start = ts - ts % width
+            bucket = self._buckets.get((metric, tier))
+            if bucket is not None and bucket[0] != bucket_start:
+                self.series(metric, tier).append(bucket[0], bucket[1] / bucket[2])
+                bucket = None
+            if bucket is None:
+                self._buckets[(metric, tier)] = [bucket_start, value, 1]
+            else:
+                bucket[1] += value
+                bucket[2] += 1
+
+    def pick_tier(self, since_seconds):
+        """Finest tier whose retention still covers the requested window."""
+        for tier, _width, retention in self.tiers:
+            if since_seconds <= retention:
+                return tier
+        return self.tiers[-1][0]
+
+    def query(self, metric, since=None, until=None, tier="raw"):
+        return self.series(metric, tier).read(since, until)
+
+    def prune(self, now=None):
+        now = now or time.time()
+        dropped = 0
+        for tier, _width, retention in self.tiers:
+            tier_dir = os.path.join(self.root, tier)
+            for name in os.listdir(tier_dir):
+                if name.endswith(".f64"):
+                    dropped += self.series(name[:-4], tier).prune(now - retention)
+        return dropped
+
+
+def snapshot_metrics(snapshot, health=None):
+    """Flatten a node stats snapshot (+ cluster health) into {metric: value}."""
+    metrics = {}
+    for node in snapshot.nodes():
+        for field in ("cpu", "heap_percent", "ram_percent", "load_1m"):
+            value = getattr(node, field)
+            if isinstance(value, (int, float)):
+                metrics[f"{node.name}.{field}"] = value
+    for pool in snapshot.thread_pools():
+        metrics[f"{pool.node}.{pool.name}_queue"] = pool.queue
+        metrics[f"{pool.node}.{pool.name}_rejected"] = pool.rejected
+    for translog in snapshot.translog():
+        metrics[f"{translog.node}.translog_ops"] = translog.operations
+        metrics[f"{translog.node}.translog_uncommitted_ops"] = translog.uncommitted_operations
+        metrics[f"{translog.node}.translog_bytes"] = translog.size_bytes
+    for ops in snapshot.doc_ops():
+        metrics[f"{ops.node}.index_total"] = ops.index_total
+        metrics[f"{ops.node}.query_total"] = ops.query_total
+    for breaker in snapshot.breakers():
+        metrics[f"{breaker.node}.breaker_{breaker.name}_tripped"] = breaker.tripped
+        metrics[f"{breaker.node}.breaker_{breaker.name}_bytes"] = breaker.estimated_bytes
+    if health:
+        for field in ("number_of_nodes", "active_shards", "relocating_shards", "initializing_shards",
+                      "unassigned_shards", "number_of_pending_tasks"):
+            if isinstance(health.get(field), (int, float)):
+                metrics[f"cluster.{field}"] = health[field]
+        status = {"green": 0, "yellow": 1, "red": 2}.get(health.get('status'))
+        if status is not None:
+            metrics["cluster.status"] = status
+    return metrics
+
+
+def collect(interval=COLLECT_INTERVAL, store=None, iterations=None):
+    """Sample the cluster every `interval` seconds into the store until Ctrl-C."""
+    store = store or MetricsStore()
+    print(f"Collecting cluster metrics every {interval}s into {store.root} (Ctrl-C to stop)...")
+    store.prune()
+    last_prune = time.monotonic()
+    start = time.monotonic()
+    tick = 0
+    polls = 0
+    try:
+        while iterations is None or polls < iterations:
+            snapshot = node_stats.get_snapshot(max_age=0)
+            if snapshot is None:
+                print("Could not retrieve node stats; skipping this sample.")
+            else:
+                health = utils.make_request("_cluster/health")
+                ts = time.time()
+                values = snapshot_metrics(snapshot, health)
+                for metric, value in values.items():
+                    store.append(metric, ts, float(value))
+                print(f"[{time.strftime('%H:%M:%S')}] Stored {len(values)} metrics.")
+            if time.monotonic() - last_prune > 3600:
+                store.prune()
+                last_prune = time.monotonic()
+
+            polls += 1
+            tick += 1
+            now = time.monotonic()
+            next_tick = start + tick * interval
+            if next_tick < now:
+                tick = int((now - start) // interval) + 1
+                next_tick = start + tick * interval
+            if iterations is None or polls < iterations:
+                time.sleep(next_tick - now)
+    except KeyboardInterrupt:
+        print("\nStopped collecting.")
+
+
+def _format_value(value):
+    return f"{value:.0f}" if value.is_integer() else f"{value:.3f}"
+
+
+def show_history(pattern, since="1h", tier="auto", store=None):
+    """Print the samples of every metric matching `pattern` over the last `since`."""
+    store = store or MetricsStore()
+    try:
+        window = parse_duration(since)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return None
+    if tier == "auto":
+        tier = store.pick_tier(window)
+
+    names = store.metrics(pattern)
+    if not names:
+        print(f"No stored metrics match '{pattern}'. Available metrics:")
+        for name in store.metrics():
+            print(f"  {name}")
+        return None
+
+    start = time.time() - window
+    result = {}
+    for name in names:
+        timestamps, values = store.query(name, since=start, tier=tier)
+        result[name] = (timestamps, values)
+        print(f"\n=== {name} ({tier}, last {since}, {len(values)} points) ===")
+        if not values:
+            continue
+        print(
+            f"min {_format_value(min(values))}   max {_format_value(max(values))}   "
+            f"avg {_format_value(sum(values) / len(values))}   last {_format_value(values[-1])}"
+        )
+        print(f"{'Time':<20} {'Value':>14}")
+        print("-" * 35)
+        for ts, value in zip(timestamps, values):
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts)):<20} {_format_value(value):>14}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect cluster stats into a local time-series store, or query it.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    collect_parser = subparsers.add_parser("collect", help="Sample cluster stats until interrupted")
+    collect_parser.add_argument("--interval", type=int, default=COLLECT_INTERVAL, help=f"Seconds between samples (default: {COLLECT_INTERVAL})")
+    history_parser = subparsers.add_parser("history", help="Show stored samples for a metric")
+    history_parser.add_argument("--metric", default="*", help="Metric name or glob, e.g. 'node-1.heap_percent' or '*.write_queue'")
+    history_parser.add_argument("--since", default="1h", help="How far back to look, e.g. 30m, 2h, 7d (default: 1h)")
+    history_parser.add_argument("--tier", choices=["auto"] + [t[0] for t in TIERS], default="auto", help="Resolution to read (default: auto)")
+    args = parser.parse_args()
+
+    if args.command == "collect":
+        collect(args.interval)
+    else:
+        show_history(args.metric, args.since, args.tier)
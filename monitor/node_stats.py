@@ -0,0 +1,243 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils
+import argparse
+import json
+import threading
+import time
+from collections import namedtuple
+
+
+def _coerce_float(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _resolve_path(path):
+    if os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(utils.__file__)), path)
+
+
+# Seconds a snapshot is reused before the cluster is asked again (0 disables caching).
+CACHE_TTL = _coerce_float(utils.CONFIG.get("node_stats_cache_ttl", 10), 10.0)
+# On-disk copy so back-to-back ops.py invocations share one snapshot too ("" disables).
+_cache_path_setting = utils.CONFIG.get("node_stats_cache_path", "monitor/.node_stats_cache.json")
+CACHE_PATH = _resolve_path(_cache_path_setting) if _cache_path_setting else None
+
+# Every metric group any monitor needs, fetched in a single `_nodes/stats` call.
+STATS_ENDPOINT = "_nodes/stats/breaker,jvm,os,thread_pool,indices/translog,indexing,search"
+# Keep only the fields the views below read; this is most of the response size.
+FILTER_PATH = ",".join([
+    "nodes.*.name",
+    "nodes.*.host",
+    "nodes.*.ip",
+    "nodes.*.roles",
+    "nodes.*.breakers.*.tripped",
+    "nodes.*.breakers.*.estimated_size_in_bytes",
+    "nodes.*.breakers.*.limit_size_in_bytes",
+    "nodes.*.jvm.mem.heap_used_percent",
+    "nodes.*.os.cpu.percent",
+    "nodes.*.os.cpu.load_average.1m",
+    "nodes.*.os.mem.used_percent",
+    "nodes.*.indices.translog.size_in_bytes",
+    "nodes.*.indices.translog.operations",
+    "nodes.*.indices.translog.uncommitted_operations",
+    "nodes.*.indices.indexing.index_total",
+    "nodes.*.indices.search.query_total",
+    "nodes.*.thread_pool.write",
+    "nodes.*.thread_pool.search",
+])
+
+# Same letters `_cat/nodes` uses for node.role.
+_ROLE_LETTERS = {
+    "data": "d", "data_cold": "c", "data_content": "s", "data_frozen": "f",
+    "data_hot": "h", "data_warm": "w", "ingest": "i", "ml": "l", "master": "m",
+    "remote_cluster_client": "r", "transform": "t", "voting_only": "v",
+}
+
+NodeInfo = namedtuple("NodeInfo", "id name ip role master cpu heap_percent ram_percent load_1m")
+BreakerStats = namedtuple("BreakerStats", "node name tripped estimated_bytes limit_bytes")
+TranslogStats = namedtuple("TranslogStats", "node size_bytes operations uncommitted_operations")
+ThreadPoolStats = namedtuple("ThreadPoolStats", "node name active queue rejected")
+DocOpsStats = namedtuple("DocOpsStats", "node index_total query_total")
+
+
+class NodeStatsSnapshot:
+    """One parsed `_nodes/stats` response with typed, per-check views.
+
+    Nodes are ordered by name so every view prints in a stable order.
+    """
+
+    def __init__(self, data, master_id=None, taken_at=None):
+        self.data = data
+        self.master_id = master_id
+        self.taken_at = taken_at if taken_at is not None else time.time()
+        nodes = data.get('nodes', {}) if isinstance(data, dict) else {}
+        self._nodes = sorted(nodes.items(), key=lambda item: item[1].get('name', item[0]))
+
+    @property
+    def age(self):
+        return max(0.0, time.time() - self.taken_at)
+
+    def nodes(self):
+        views = []
+        for node_id, stats in self._nodes:
+            os_stats = stats.get('os', {})
+            cpu = os_stats.get('cpu', {})
+            ip = stats.get('ip') or stats.get('host', 'N/A')
+            if isinstance(ip, list):
+                ip = ip[0] if ip else 'N/A'
+            role = "".join(sorted({_ROLE_LETTERS.get(r, "") for r in stats.get('roles', [])})) or "-"
+            views.append(NodeInfo(
+                id=node_id,
+                name=stats.get('name', 'N/A'),
+                ip=str(ip).rsplit(':', 1)[0],
+                role=role,
+                master="*" if node_id == self.master_id else "-",
+                cpu=cpu.get('percent', 'N/A'),
+                heap_percent=stats.get('jvm', {}).get('mem', {}).get('heap_used_percent', 'N/A'),
+                ram_percent=os_stats.get('mem', {}).get('used_percent', 'N/A'),
+                load_1m=cpu.get('load_average', {}).get('1m', 'N/A'),
+            ))
+        return views
+
+    def breakers(self):
+        return [
+            BreakerStats(
+                node=stats.get('name', node_id),
+                name=name,
+                tripped=breaker.get('tripped', 0),
+                estimated_bytes=breaker.get('estimated_size_in_bytes', 0),
+                limit_bytes=breaker.get('limit_size_in_bytes', 0),
+            )
+            for node_id, stats in self._nodes
+            for name, breaker in stats.get('breakers', {}).items()
+        ]
+
+    def translog(self):
+        views = []
+        for node_id, stats in self._nodes:
+            translog = stats.get('indices', {}).get('translog', {})
+            views.append(TranslogStats(
+                node=stats.get('name', node_id),
+                size_bytes=translog.get('size_in_bytes', 0),
+                operations=translog.get('operations', 0),
+                uncommitted_operations=translog.get('uncommitted_operations', 0),
+            ))
+        return views
+
+    def thread_pools(self, names=("write", "search")):
+        return [
+            ThreadPoolStats(
+                node=stats.get('name', node_id),
+                name=name,
+                active=pool.get('active', 0),
+                queue=pool.get('queue', 0),
+                rejected=pool.get('rejected', 0),
+            )
+            for node_id, stats in self._nodes
+            for name in names
+            for pool in [stats.get('thread_pool', {}).get(name)]
+            if pool is not None
+        ]
+
+    def doc_ops(self):
+        views = []
+        for node_id, stats in self._nodes:
+            indices = stats.get('indices', {})
+            views.append(DocOpsStats(
+                node=stats.get('name', node_id),
+                index_total=indices.get('indexing', {}).get('index_total', 0),
+                query_total=indices.get('search', {}).get('query_total', 0),
+            ))
+        return views
+
+
+_cache = None
+# Single flight: concurrent callers (e.g. parallel diagnostics checks) wait for
+# one fetch instead of each sending their own `_nodes/stats`.
+_cache_lock = threading.Lock()
+
+
+def _read_disk_cache(ttl):
+    if not CACHE_PATH or not os.path.exists(CACHE_PATH):
+        return None
+    try:
+        with open(CACHE_PATH, 'r') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get('es_host') != utils.ES_HOST or time.time() - entry.get('taken_at', 0) > ttl:
+        return None
+    return NodeStatsSnapshot(entry.get('data', {}), entry.get('master_id'), entry.get('taken_at'))
+
+
+def _write_disk_cache(snapshot):
+    if not CACHE_PATH:
+        return
+    entry = {
+        "es_host": utils.ES_HOST,
+        "taken_at": snapshot.taken_at,
+        "master_id": snapshot.master_id,
+        "data": snapshot.data,
+    }
+    tmp_path = f"{CACHE_PATH}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError as e:
+        utils.report(f"Warning: Could not write node stats cache {CACHE_PATH}: {e}")
+
+
+def _fetch_master_id():
+    data = utils.make_request("_cat/master?h=id&format=json")
+    if data and isinstance(data, list):
+        return data[0].get('id')
+    return None
+
+
+def fetch_snapshot():
+    """Fetch a fresh snapshot from the cluster (bypasses the cache). Returns None on failure."""
+    data = utils.make_request(f"{STATS_ENDPOINT}?filter_path={FILTER_PATH}")
+    if not data or 'nodes' not in data:
+        return None
+    return NodeStatsSnapshot(data, _fetch_master_id())
+
+
+def get_snapshot(max_age=None):
+    """Return a node stats snapshot no older than `max_age` seconds (default CACHE_TTL).
+
+    Served from memory, then from the on-disk cache, and only then from the
+    cluster. `max_age=0` always fetches.
+    """
+    global _cache
+    ttl = CACHE_TTL if max_age is None else max_age
+    with _cache_lock:
+        if ttl > 0:
+            if _cache is not None and _cache.age <= ttl:
+                return _cache
+            cached = _read_disk_cache(ttl)
+            if cached is not None:
+                _cache = cached
+                return cached
+        snapshot = fetch_snapshot()
+        if snapshot is not None:
+            _cache = snapshot
+            if CACHE_TTL > 0:
+                _write_disk_cache(snapshot)
+        return snapshot
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch one filtered _nodes/stats snapshot and print it as JSON.")
+    parser.add_argument("--max-age", type=float, default=CACHE_TTL, help=f"Reuse a cached snapshot up to this many seconds old (default: {CACHE_TTL:g})")
+    args = parser.parse_args()
+
+    snapshot = get_snapshot(args.max_age)
+    if snapshot:
+        print(json.dumps(snapshot.data, indent=2))
@@ -0,0 +1,211 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils
+import argparse
+import heapq
+import http.client
+import statistics
+import zlib
+from collections import namedtuple
+
+
+def _coerce_float(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _format_bytes(num_bytes):
+    if num_bytes >= 1024 * 1024 * 1024:
+        return f"{num_bytes/(1024*1024*1024):.2f} GB"
+    if num_bytes >= 1024 * 1024:
+        return f"{num_bytes/(1024*1024):.2f} MB"
+    if num_bytes >= 1024:
+        return f"{num_bytes/1024:.2f} KB"
+    return f"{num_bytes} B"
+
+
+# A node is flagged when its share of something (hot primaries, write load,
+# store) exceeds this multiple of its fair share (1 / number of nodes).
+SKEW_FACTOR = _coerce_float(utils.CONFIG.get("shard_skew_factor", 1.5), 1.5)
+# A shard is flagged when its store is this many times the median shard size.
+SIZE_FACTOR = _coerce_float(utils.CONFIG.get("shard_size_factor", 3), 3.0)
+# A primary is "write-hot" when its write load is this many times the median primary's.
+HOT_FACTOR = _coerce_float(utils.CONFIG.get("shard_hot_factor", 2), 2.0)
+
+# `_cat/shards` columns, in request order. The always-present ones come first:
+# unassigned shards leave the rest blank, which shifts whitespace-split fields.
+COLUMNS = (
+    "index", "shard", "prirep", "state", "node", "docs", "store",
+    "indexing.index_total", "indexing.index_time", "search.query_total", "search.query_time",
+    "merges.total_time", "refresh.time",
+)
+
+Shard = namedtuple("Shard", "index shard prirep node docs store index_total query_total write_ms search_ms")
+
+
+class NodeLoad:
+    __slots__ = ("shards", "primaries", "store", "write_ms", "search_ms", "hot_primaries")
+
+    def __init__(self):
+        self.shards = 0
+        self.primaries = 0
+        self.store = 0
+        self.write_ms = 0
+        self.search_ms = 0
+        self.hot_primaries = 0
+
+
+def _parse_line(line):
+    fields = line.split()
+    if len(fields) != len(COLUMNS) or fields[3] != b"STARTED":
+        return None
+    try:
+        numbers = [int(value) for value in fields[5:]]
+    except ValueError:
+        return None
+    docs, store, index_total, index_ms, query_total, query_ms, merge_ms, refresh_ms = numbers
+    return Shard(
+        index=fields[0].decode(), shard=int(fields[1]), prirep=fields[2].decode(), node=fields[4].decode(),
+        docs=docs, store=store, index_total=index_total, query_total=query_total,
+        # Indexing, merging and refreshing are all paid for by the node holding the copy.
+        write_ms=index_ms + merge_ms + refresh_ms, search_ms=query_ms,
+    )
+
+
+def analyze_shards(index_pattern="*", top=10):
+    """Stream shard-level stats for every matching index and report hot spots.
+
+    One `_cat/shards` request returns indexing, search, merge, refresh and
+    store figures per shard copy. The text response is parsed line by line, so
+    memory stays flat even with tens of thousands of shards: only per-node
+    totals, the shard sizes (for the median), the primaries' write load and
+    bounded top-N heaps are kept.
+
+    Loads are cumulative times since each shard copy started (ms), so they show
+    where work has gone rather than an instantaneous rate.
+    """
+    if top < 1:
+        print("Error: --top must be at least 1.")
+        return None
+    endpoint = f"_cat/shards/{index_pattern}?h={','.join(COLUMNS)}&bytes=b&time=ms"
+    lines = utils.stream_request(endpoint)
+    if lines is None:
+        print("Could not retrieve shard stats.")
+        return None
+
+    nodes = {}
+    sizes = []
+    primaries = []
+    top_write, top_search, top_size = [], [], []
+    seq = 0
+    skipped = 0
+    try:
+        for line in lines:
+            shard = _parse_line(line)
+            if shard is None:
+                if line.strip():
+                    skipped += 1
+                continue
+            seq += 1
+            node = nodes.get(shard.node)
+            if node is None:
+                node = nodes[shard.node] = NodeLoad()
+            node.shards += 1
+            node.store += shard.store
+            node.write_ms += shard.write_ms
+            node.search_ms += shard.search_ms
+            sizes.append(shard.store)
+            if shard.prirep == "p":
+                node.primaries += 1
+                primaries.append((shard.write_ms, shard.node))
+            # Bounded min-heaps: the smallest of the current top N is evicted first.
+            for heap, key in ((top_write, shard.write_ms), (top_search, shard.search_ms), (top_size, shard.store)):
+                if len(heap) < top:
+                    heapq.heappush(heap, (key, seq, shard))
+                elif key > heap[0][0]:
+                    heapq.heapreplace(heap, (key, seq, shard))
+    except (OSError, http.client.HTTPException, zlib.error) as e:
+        print(f"Error reading shard stats: {e}")
+        return None
+
+    if not nodes:
+        print(f"No started shards found for '{index_pattern}'.")
+        return None
+
+    median_size = statistics.median(sizes)
+    median_write = statistics.median(load for load, _ in primaries) if primaries else 0
+    hot_threshold = max(median_write * HOT_FACTOR, 1)
+    hot_total = 0
+    for load, node_name in primaries:
+        if load >= hot_threshold:
+            nodes[node_name].hot_primaries += 1
+            hot_total += 1
+
+    total_store = sum(n.store for n in nodes.values()) or 1
+    total_write = sum(n.write_ms for n in nodes.values()) or 1
+    total_search = sum(n.search_ms for n in nodes.values()) or 1
+    fair = 1 / len(nodes)
+    limit = fair * SKEW_FACTOR
+
+    print(f"Analyzed {len(sizes)} started shard copies on {len(nodes)} nodes"
+          + (f" ({skipped} unassigned/initializing/relocating skipped)" if skipped else "") + ".")
+    print("\n=== Load by Node ===")
+    print(f"{'Node':<20} {'Shards':>7} {'Prim':>6} {'Store':>12} {'Store%':>7} {'Write%':>7} {'Search%':>8} {'Hot prim':>9}")
+    print("-" * 82)
+    warnings = []
+    for name, node in sorted(nodes.items(), key=lambda item: item[1].write_ms, reverse=True):
+        store_share = node.store / total_store
+        write_share = node.write_ms / total_write
+        search_share = node.search_ms / total_search
+        print(f"{name:<20} {node.shards:>7} {node.primaries:>6} {_format_bytes(node.store):>12} "
+              f"{store_share:>7.1%} {write_share:>7.1%} {search_share:>8.1%} {node.hot_primaries:>9}")
+        if len(nodes) > 1:
+            if hot_total >= 2 and node.hot_primaries / hot_total > limit:
+                warnings.append(f"{name} holds {node.hot_primaries} of {hot_total} write-hot primaries (fair share {fair:.0%}).")
+            if write_share > limit:
+                warnings.append(f"{name} carries {write_share:.0%} of all write load (fair share {fair:.0%}).")
+            if search_share > limit:
+                warnings.append(f"{name} carries {search_share:.0%} of all search load (fair share {fair:.0%}).")
+            if store_share > limit:
+                warnings.append(f"{name} stores {store_share:.0%} of all data (fair share {fair:.0%}).")
+
+    if warnings:
+        print("\nWARNING: Node skew detected:")
+        for warning in warnings:
+            print(f"- {warning}")
+    else:
+        print("\nNo node skew detected. (Good)")
+
+    def print_top(title, heap, value_label, fmt):
+        ranked = sorted(heap, key=lambda entry: (-entry[0], entry[1]))
+        if not ranked or ranked[0][0] <= 0:
+            return
+        print(f"\n=== {title} ===")
+        print(f"{'Index':<30} {'Shard':>6} {'P/R':>4} {'Node':<20} {value_label:>14} {'Store':>12}")
+        print("-" * 92)
+        for key, _seq, shard in ranked:
+            print(f"{shard.index:<30} {shard.shard:>6} {shard.prirep:>4} {shard.node:<20} {fmt(key):>14} {_format_bytes(shard.store):>12}")
+
+    print_top(f"Top {top} Shards by Write Load", top_write, "Write ms", str)
+    print_top(f"Top {top} Shards by Search Load", top_search, "Search ms", str)
+
+    oversized = [entry for entry in top_size if entry[0] > median_size * SIZE_FACTOR]
+    if oversized:
+        print_top(f"Shards Over {SIZE_FACTOR:g}x the Median Size ({_format_bytes(int(median_size))})",
+                  oversized, "x median", lambda size: f"{size / max(median_size, 1):.1f}x")
+    else:
+        print(f"\nNo shard is over {SIZE_FACTOR:g}x the median size ({_format_bytes(int(median_size))}). (Good)")
+
+    return {"nodes": nodes, "median_size": median_size, "hot_primaries": hot_total, "warnings": warnings}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find shard hot spots and node skew from shard-level stats.")
+    parser.add_argument("--index", default="*", help="Index name or pattern (default: *)")
+    parser.add_argument("--top", type=int, default=10, help="How many worst shards to list (default: 10)")
+    args = parser.parse_args()
+
+    analyze_shards(args.index, args.top)
@@ -0,0 +1,193 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils
+import argparse
+import time
+from collections import deque, namedtuple
+from monitor import node_stats
+
+
+def _coerce_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+# Samples kept for the windowed averages (one per interval).
+HISTORY = max(2, _coerce_int(utils.CONFIG.get("watch_history", 60), 60))
+
+# Per node, in this order. Counters only grow (a drop means the node restarted);
+# translog ops/size go down on flush, so their deltas are shown signed.
+COUNTERS = ("write_rejected", "search_rejected", "index_total", "query_total", "breaker_trips")
+GAUGES = ("translog_ops", "translog_bytes")
+
+Sample = namedtuple("Sample", "at counters gauges nodes status pending")
+
+_CLEAR = "\x1b[H\x1b[2J"
+
+
+def take_sample(with_pending=False):
+    """Poll the cluster once and reduce it to a compact Sample (None on failure)."""
+    snapshot = node_stats.get_snapshot(max_age=0)
+    if snapshot is None:
+        return None
+    at = time.monotonic()
+
+    rejected = {(pool.node, pool.name): pool.rejected for pool in snapshot.thread_pools()}
+    trips = {}
+    for breaker in snapshot.breakers():
+        trips[breaker.node] = trips.get(breaker.node, 0) + breaker.tripped
+    translog = {t.node: t for t in snapshot.translog()}
+
+    counters = {}
+    gauges = {}
+    for ops in snapshot.doc_ops():
+        counters[ops.node] = (
+            rejected.get((ops.node, "write"), 0),
+            rejected.get((ops.node, "search"), 0),
+            ops.index_total,
+            ops.query_total,
+            trips.get(ops.node, 0),
+        )
+        t = translog.get(ops.node)
+        gauges[ops.node] = (t.operations, t.size_bytes) if t else (0, 0)
+
+    health = utils.make_request("_cluster/health")
+    status = health.get('status', 'unknown') if health else 'unknown'
+    pending = None
+    if with_pending:
+        data = utils.make_request("_cluster/pending_tasks")
+        pending = len(data.get('tasks', [])) if data else None
+    return Sample(at, counters, gauges, tuple(n for n in snapshot.nodes()), status, pending)
+
+
+def _rate(new, old, elapsed, signed=False):
+    delta = new - old
+    if delta < 0 and not signed:
+        return None  # counter reset: the node restarted between samples
+    return delta / elapsed
+
+
+def node_rates(newer, older):
+    """Per-node per-second deltas between two samples: {node: (counters..., gauges...)}."""
+    elapsed = max(newer.at - older.at, 1e-9)
+    rates = {}
+    for node, values in newer.counters.items():
+        previous = older.counters.get(node)
+        if previous is None:
+            continue
+        row = [_rate(n, o, elapsed) for n, o in zip(values, previous)]
+        row += [_rate(n, o, elapsed, signed=True) for n, o in zip(newer.gauges[node], older.gauges.get(node, (0, 0)))]
+        rates[node] = row
+    return rates
+
+
+def _total(rates, column):
+    values = [row[column] for row in rates.values() if row[column] is not None]
+    return sum(values) if values else None
+
+
+def _fmt(value, width=10):
+    if value is None:
+        return f"{'-':>{width}}"
+    return f"{value:>{width}.1f}"
+
+
+def render(history, interval, show_nodes=True):
+    """Build the lines of one frame from the ring buffer of samples."""
+    latest = history[-1]
+    lines = [
+        f"Cluster status: {latest.status.upper():<8} nodes: {len(latest.counters):<5} "
+        f"every {interval:g}s   {time.strftime('%H:%M:%S')}   (Ctrl-C to stop)"
+    ]
+    if latest.pending is not None:
+        lines.append(f"Pending cluster tasks: {latest.pending}")
+
+    if show_nodes:
+        lines.append("")
+        lines.append(f"{'Name':<20} {'Role':<8} {'Master':<7} {'CPU%':<6} {'Heap%':<6} {'RAM%':<6} {'Load 1m':<8}")
+        for node in latest.nodes:
+            lines.append(f"{node.name:<20} {node.role:<8} {node.master:<7} {node.cpu:<6} {node.heap_percent:<6} {node.ram_percent:<6} {node.load_1m:<8}")
+
+    lines.append("")
+    if len(history) < 2:
+        lines.append("Collecting a second sample for rates...")
+        return lines
+
+    rates = node_rates(latest, history[-2])
+    header = f"{'Per second':<20} {'write rej':>10} {'search rej':>10} {'index':>10} {'query':>10} {'brk trips':>10} {'tlog ops':>10} {'tlog KB':>10}"
+    lines.append(header)
+    lines.append("-" * len(header))
+    for node in sorted(rates):
+        row = rates[node]
+        kb = row[6] / 1024 if row[6] is not None else None
+        lines.append(f"{node:<20} " + " ".join(_fmt(v) for v in row[:6]) + " " + _fmt(kb))
+    totals = [_total(rates, c) for c in range(7)]
+    kb = totals[6] / 1024 if totals[6] is not None else None
+    lines.append(f"{'TOTAL':<20} " + " ".join(_fmt(v) for v in totals[:6]) + " " + _fmt(kb))
+
+    if len(history) > 2:
+        window = node_rates(latest, history[0])
+        span = latest.at - history[0].at
+        lines.append("")
+        lines.append(
+            f"Avg over last {span:.0f}s: index {_fmt(_total(window, 2), 0)}/s, query {_fmt(_total(window, 3), 0)}/s, "
+            f"rejections {_fmt((_total(window, 0) or 0) + (_total(window, 1) or 0), 0)}/s"
+        )
+    if any(v for v in totals[:2]):
+        lines.append("")
+        lines.append("WARNING: The cluster is rejecting requests right now.")
+    return lines
+
+
+def watch(interval, with_pending=False, show_nodes=True, iterations=None):
+    """Poll every `interval` seconds and redraw rates in place until Ctrl-C.
+
+    Ticks are scheduled on a fixed monotonic grid, so a slow poll does not
+    drift the schedule; ticks missed while a poll was running are skipped.
+    Between ticks the process just sleeps.
+    """
+    interval = max(0.5, interval)
+    history = deque(maxlen=HISTORY)
+    tty = sys.stdout.isatty()
+    start = time.monotonic()
+    tick = 0
+    polls = 0
+    try:
+        while iterations is None or polls < iterations:
+            sample = take_sample(with_pending)
+            if sample is None:
+                lines = ["Could not retrieve node stats; retrying..."]
+            else:
+                history.append(sample)
+                lines = render(history, interval, show_nodes)
+            frame = "\n".join(lines)
+            if tty:
+                sys.stdout.write(_CLEAR + frame + "\n")
+            else:
+                sys.stdout.write(frame + "\n\n")
+            sys.stdout.flush()
+
+            polls += 1
+            tick += 1
+            now = time.monotonic()
+            next_tick = start + tick * interval
+            if next_tick < now:
+                # The poll overran; realign to the next slot on the grid.
+                tick = int((now - start) // interval) + 1
+                next_tick = start + tick * interval
+            if iterations is None or polls < iterations:
+                time.sleep(next_tick - now)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Continuously show per-second cluster rates.")
+    parser.add_argument("--interval", type=float, default=5, help="Seconds between polls (default: 5)")
+    parser.add_argument("--pending", action="store_true", help="Also show the number of pending cluster tasks")
+    args = parser.parse_args()
+
+    watch(args.interval, with_pending=args.pending)
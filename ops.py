@@ -1,16 +1,23 @@
 #!/usr/bin/env python3
 import argparse
+import builtins
+import io
+import json
+import queue
+import shlex
 import sys
 import os
+import threading
+import time
+from collections import deque
 
 # Ensure the current directory is in sys.path so we can import modules
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
 
-from monitor import check_cluster_health, cluster_diagnostics
-from indices import manage_indices, create_update_index
-from indices import translog_control
-from ingest import ingest_logs
-from search import search_index
+# Subsystem modules are imported inside the handlers, so a command only pays
+# for the modules it uses (ops.py runs from cron and alerting hooks many times a day).
 import utils
 
 
@@ -21,18 +28,82 @@ def _coerce_int(value, default):
         return default
 
 def handle_health(args):
+    if args.watch:
+        from monitor import watch
+        watch.watch(args.watch)
+        return
+    from monitor import check_cluster_health
     check_cluster_health.get_cluster_health()
     check_cluster_health.get_nodes_info()
 
 def handle_diagnose(args):
-    cluster_diagnostics.run_diagnostics()
+    if args.watch:
+        from monitor import watch
+        watch.watch(args.watch, with_pending=True, show_nodes=False)
+        return
+    from monitor import cluster_diagnostics
+    timeout = args.timeout if args.timeout is not None else cluster_diagnostics.CHECK_TIMEOUT
+    cluster_diagnostics.run_diagnostics(timeout=timeout)
+
+def handle_collect(args):
+    from monitor import metrics_store
+    metrics_store.collect(args.interval or metrics_store.COLLECT_INTERVAL)
+
+def handle_history(args):
+    from monitor import metrics_store
+    metrics_store.show_history(args.metric, args.since, args.tier)
+
+def handle_exporter(args):
+    from monitor import exporter
+    exporter.serve(
+        args.port if args.port is not None else exporter.EXPORTER_PORT,
+        args.interval or exporter.REFRESH_INTERVAL,
+        args.host,
+    )
+
+def handle_shards(args):
+    from monitor import shard_skew
+    shard_skew.analyze_shards(args.index, args.top)
+
+def handle_segments(args):
+    from indices import segments
+    segments.plan_and_run(args.index, args.top, args.execute, args.per_node or segments.MERGES_PER_NODE, args.yes)
 
 def handle_search(args):
+    if args.export:
+        from search import export_index
+        export_index.export_search(args.index, args.export, args.query, args.page_size, args.slices)
+        return
+    from search import search_index
     search_index.search_index(args.index, args.query, args.size)
 
 def handle_indices(args):
+    from indices import manage_indices, create_update_index
     if args.action == "list":
-        manage_indices.list_indices(args.pattern)
+        manage_indices.list_indices(
+            args.pattern or utils.CONFIG.get("default_index_pattern", "*"),
+            sort=args.sort,
+            top=args.top,
+            by=args.by,
+            fmt=args.format,
+        )
+        return
+
+    if args.pattern or args.from_file:
+        from indices import bulk_admin
+        if args.name:
+            print("Error: Use either --name or --pattern/--from-file, not both.")
+            return
+        result = bulk_admin.run_bulk_action(
+            args.action,
+            pattern=args.pattern,
+            names_file=args.from_file,
+            assume_yes=args.yes,
+            concurrency=args.concurrency or bulk_admin.CONCURRENCY,
+            rate=args.rate if args.rate is not None else bulk_admin.REQUESTS_PER_SECOND,
+        )
+        if result is not None and result[1]:
+            sys.exit(1)
         return
 
     default_index_name = utils.CONFIG.get("default_ingest_index", "logs-sample")
@@ -48,7 +119,7 @@ def handle_indices(args):
             return
 
     if args.action == "delete":
-        confirm = input(f"Are you sure you want to DELETE index '{resolved_name}'? (y/n): ")
+        confirm = 'y' if args.yes else input(f"Are you sure you want to DELETE index '{resolved_name}'? (y/n): ")
         if confirm.lower() == 'y':
             manage_indices.delete_index(resolved_name)
     elif args.action == "close":
@@ -65,10 +136,27 @@ def handle_indices(args):
         create_update_index.update_index_settings(resolved_name)
 
 def handle_ingest(args):
-    ingest_logs.ingest_logs(args.index)
+    from ingest import ingest_logs
+    ingest_logs.ingest_logs(
+        args.index,
+        workers=max(1, args.workers),
+        batch_size=args.batch_size,
+        batch_bytes=args.batch_bytes,
+        adaptive=args.adaptive,
+        resume=args.resume,
+        idempotent_ids=args.idempotent_ids,
+        gzip=args.gzip,
+        paths=args.path,
+        readers=max(1, args.readers),
+        follow=args.follow,
+        flush_ms=args.flush_ms,
+        bulk_load_mode=args.bulk_load_mode,
+    )
 
 
 def handle_translog(args):
+    from monitor import cluster_diagnostics
+
     # Node-level overview
     cluster_diagnostics.check_translog_stats()
 
@@ -78,6 +166,7 @@ def handle_translog(args):
 
 
 def handle_translog_mode(args):
+    from indices import translog_control
     index_name = args.index or utils.CONFIG.get("default_ingest_index", "logs-sample")
 
     if args.mode == "disable" and not args.yes:
@@ -122,18 +211,371 @@ def handle_translog_mode(args):
         print("Current translog settings:")
         translog_control.pretty_print(current)
 
-def main():
-    parser = argparse.ArgumentParser(description="Elasticsearch Daily Operations CLI")
+
+# Batch mode: worker threads running many commands in one process.
+BATCH_CONCURRENCY = max(1, _coerce_int(utils.CONFIG.get("batch_concurrency", 8), 8))
+# Commands queued per worker ahead of execution; bounds memory when a plan is streamed in.
+_BATCH_READ_AHEAD = 4
+
+
+class _BatchArgumentParser(argparse.ArgumentParser):
+    """Raises instead of exiting, so one bad line doesn't end the batch."""
+
+    def error(self, message):
+        raise ValueError(f"{self.prog}: {message}")
+
+    def exit(self, status=0, message=None):
+        raise ValueError(message.strip() if message else f"{self.prog}: exited with status {status}")
+
+
+class _ThreadOutput:
+    """sys.stdout stand-in that sends each thread's prints to its own buffer.
+
+    Threads that are not capturing (e.g. helper threads started by a command)
+    write to the fallback stream, which keeps the result stream clean.
+    """
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def capture(self):
+        self._local.buffer = io.StringIO()
+        self._local.declined = False
+        return self._local.buffer
+
+    def release(self):
+        self._local.buffer = None
+
+    def decline(self):
+        self._local.declined = True
+
+    @property
+    def declined(self):
+        return getattr(self._local, 'declined', False)
+
+    def write(self, text):
+        return (getattr(self._local, 'buffer', None) or self._fallback).write(text)
+
+    def flush(self):
+        self._fallback.flush()
+
+    def isatty(self):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._fallback, name)
+
+
+def _batch_target(args):
+    """Index a command acts on; commands on the same index run in order, the rest concurrently."""
+    if args.command == "indices" and args.action == "list":
+        return None
+    target = getattr(args, 'name', None) or getattr(args, 'index', None)
+    if target is None and args.command == "indices":
+        target = args.pattern or args.from_file
+    if target is None and args.command in ("indices", "translog-mode"):
+        target = utils.CONFIG.get("default_ingest_index", "logs-sample")
+    return target
+
+
+def _read_plan(path):
+    """Yield (seq, command, error) from a plan: one command per line, or a JSON/YAML list of commands.
+
+    A command is a command-line string or an argument list; `error` is set for
+    plan entries that are neither.
+    """
+    if path == "-":
+        source = sys.stdin
+    else:
+        try:
+            source = open(path, 'r')
+        except OSError as e:
+            raise ValueError(f"Cannot read plan {path}: {e}")
+
+    with source:
+        if path.endswith((".json", ".yaml", ".yml")):
+            text = source.read()
+            if path.endswith(".json"):
+                try:
+                    plan = json.loads(text)
+                except ValueError as e:
+                    raise ValueError(f"Invalid JSON plan {path}: {e}")
+            else:
+                try:
+                    import yaml
+                except ImportError:
+                    raise ValueError("YAML plans need PyYAML (pip install pyyaml); use a JSON or line plan instead.")
+                try:
+                    plan = yaml.safe_load(text)
+                except yaml.YAMLError as e:
+                    raise ValueError(f"Invalid YAML plan {path}: {e}")
+            if isinstance(plan, dict):
+                plan = plan.get("commands")
+            if not isinstance(plan, list):
+                raise ValueError(f"Plan {path} must be a list of commands (or an object with a 'commands' list).")
+            for seq, entry in enumerate(plan, 1):
+                if isinstance(entry, str):
+                    yield seq, entry, None
+                elif isinstance(entry, list) and all(isinstance(arg, (str, int, float)) for arg in entry):
+                    yield seq, [str(arg) for arg in entry], None
+                else:
+                    yield seq, None, f"entry {seq} is not a command string or argument list"
+            return
+
+        # Line plan; read lazily so commands can be streamed in through a pipe.
+        for seq, line in enumerate(source, 1):
+            if line.strip() and not line.lstrip().startswith("#"):
+                yield seq, line.strip(), None
+
+
+class _BatchRunner:
+    """Runs parsed commands on `concurrency` worker threads.
+
+    Commands are grouped into lanes by target index: a lane runs its commands
+    one after another in plan order, different lanes run in parallel.
+    """
+
+    def __init__(self, concurrency, output, emit):
+        self.output = output
+        self.emit = emit
+        self._lock = threading.Lock()
+        self._lanes = {}
+        self._ready = queue.Queue()
+        self._slots = threading.BoundedSemaphore(concurrency * _BATCH_READ_AHEAD)
+        self._workers = [
+            threading.Thread(target=self._work, name=f"batch-{n}", daemon=True) for n in range(concurrency)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, seq, text, args):
+        self._slots.acquire()
+        target = _batch_target(args)
+        key = ("index", target) if target is not None else ("seq", seq)
+        with self._lock:
+            lane = self._lanes.get(key)
+            if lane is not None:
+                lane.append((seq, text, args))
+                return
+            self._lanes[key] = deque([(seq, text, args)])
+        self._ready.put(key)
+
+    def _work(self):
+        while True:
+            key = self._ready.get()
+            if key is None:
+                return
+            while True:
+                with self._lock:
+                    lane = self._lanes[key]
+                    if not lane:
+                        del self._lanes[key]
+                        break
+                    seq, text, args = lane.popleft()
+                try:
+                    self.emit(self._run(seq, text, args))
+                finally:
+                    self._slots.release()
+
+    def _run(self, seq, text, args):
+        buffer = self.output.capture()
+        requests_before, failed_before = utils.thread_request_counts()
+        started = time.monotonic()
+        error = None
+        try:
+            COMMANDS[args.command](args)
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                error = f"exited with status {e.code}"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            self.output.release()
+        requests_after, failed_after = utils.thread_request_counts()
+        failed = failed_after - failed_before
+        if error is None and self.output.declined:
+            error = "confirmation prompt declined in batch mode (pass --yes)"
+        if error is None and failed:
+            error = f"{failed} request(s) failed"
+        result = {
+            "seq": seq,
+            "command": text,
+            "ok": error is None,
+            "seconds": round(time.monotonic() - started, 3),
+            "requests": requests_after - requests_before,
+            "output": buffer.getvalue(),
+        }
+        if error:
+            result["error"] = error
+        return result
+
+    def close(self):
+        for _ in self._workers:
+            self._ready.put(None)
+        for worker in self._workers:
+            worker.join()
+
+
+def run_batch(plan="-", concurrency=BATCH_CONCURRENCY):
+    """Run every command of a plan in this process and print one JSON result per command.
+
+    Results are written to stdout as NDJSON in completion order (`seq` is the
+    plan position); a summary goes to stderr. All commands share the parsed
+    config and the keep-alive connection pool. Confirmation prompts are
+    answered "n", so destructive commands need their --yes flag. Returns the
+    number of failed commands.
+    """
+    concurrency = max(1, concurrency)
+    utils.ensure_pool_size(concurrency)
+    parser = build_parser(_BatchArgumentParser)
+    real_stdout = sys.stdout
+    output = _ThreadOutput(sys.stderr)
+    emit_lock = threading.Lock()
+    totals = {"ok": 0, "failed": 0}
+
+    def emit(result):
+        with emit_lock:
+            totals["ok" if result["ok"] else "failed"] += 1
+            real_stdout.write(json.dumps(result) + "\n")
+            real_stdout.flush()
+
+    def declined_input(prompt=""):
+        print(f"{prompt}n")
+        output.decline()
+        return "n"
+
+    started = time.monotonic()
+    previous_input = builtins.input
+    sys.stdout = output
+    builtins.input = declined_input
+    runner = _BatchRunner(concurrency, output, emit)
+    try:
+        for seq, command, error in _read_plan(plan):
+            text = command if isinstance(command, str) else shlex.join(command or [])
+            if error is None:
+                try:
+                    argv = shlex.split(command, comments=True) if isinstance(command, str) else command
+                    args = parser.parse_args(argv)
+                    if args.command == "batch":
+                        raise ValueError("batch cannot be nested")
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                emit({"seq": seq, "command": text, "ok": False, "seconds": 0.0, "requests": 0, "output": "", "error": error})
+                continue
+            runner.submit(seq, text, args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        totals["failed"] += 1
+    except KeyboardInterrupt:
+        print("\nStopped reading the plan; waiting for running commands.", file=sys.stderr)
+    finally:
+        runner.close()
+        sys.stdout = real_stdout
+        builtins.input = previous_input
+
+    print(f"Batch: {totals['ok'] + totals['failed']} command(s), {totals['ok']} ok, {totals['failed']} failed "
+          f"in {time.monotonic() - started:.2f}s ({concurrency} worker(s)).", file=sys.stderr)
+    return totals["failed"]
+
+
+def handle_batch(args):
+    if run_batch(args.plan, args.concurrency or BATCH_CONCURRENCY):
+        sys.exit(1)
+
+
+# Subcommand -> handler. Handlers import their subsystem on first use.
+COMMANDS = {
+    "health": handle_health,
+    "diagnose": handle_diagnose,
+    "shards": handle_shards,
+    "segments": handle_segments,
+    "collect": handle_collect,
+    "history": handle_history,
+    "exporter": handle_exporter,
+    "translog": handle_translog,
+    "translog-mode": handle_translog_mode,
+    "indices": handle_indices,
+    "ingest": handle_ingest,
+    "search": handle_search,
+    "batch": handle_batch,
+}
+
+
+def build_parser(parser_class=argparse.ArgumentParser):
+    parser = parser_class(description="Elasticsearch Daily Operations CLI")
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
     subparsers.required = True
 
     # Health Command
     health_parser = subparsers.add_parser("health", help="Check cluster health and nodes info")
-    health_parser.set_defaults(func=handle_health)
+    health_parser.add_argument(
+        "--watch",
+        type=float,
+        metavar="INTERVAL",
+        help="Poll every INTERVAL seconds and show per-second rates (rejections, indexing, search, translog)",
+    )
 
     # Diagnose Command
     diagnose_parser = subparsers.add_parser("diagnose", help="Run comprehensive cluster diagnostics")
-    diagnose_parser.set_defaults(func=handle_diagnose)
+    diagnose_parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Seconds each check may take before it is reported as timed out (default from config.json diagnostics_check_timeout)",
+    )
+    diagnose_parser.add_argument(
+        "--watch",
+        type=float,
+        metavar="INTERVAL",
+        help="Poll every INTERVAL seconds and show per-second rates plus pending tasks instead of one report",
+    )
+
+    # Shards Command
+    shards_parser = subparsers.add_parser("shards", help="Find shard hot spots and node skew (indexing/search/merge/refresh/store)")
+    shards_parser.add_argument("--index", default="*", help="Index name or pattern (default: *)")
+    shards_parser.add_argument("--top", type=int, default=10, help="How many worst shards to list (default: 10)")
+
+    # Segments Command
+    segments_parser = subparsers.add_parser("segments", help="Segment/merge pressure report and force-merge planner")
+    segments_parser.add_argument("--index", default="*", help="Index name or pattern (default: *)")
+    segments_parser.add_argument("--top", type=int, default=20, help="Rows to show per table (default: 20)")
+    segments_parser.add_argument("--execute", action="store_true", help="Force-merge the recommended read-only indices")
+    segments_parser.add_argument(
+        "--per-node",
+        type=int,
+        help="Force merges allowed at once on any node (default from config.json segments.merges_per_node)",
+    )
+    segments_parser.add_argument("--yes", action="store_true", help="Skip the confirmation prompt for --execute")
+
+    # Collect Command
+    collect_parser = subparsers.add_parser("collect", help="Sample cluster stats into the local metrics store until interrupted")
+    collect_parser.add_argument(
+        "--interval",
+        type=int,
+        help="Seconds between samples (default from config.json metrics_interval)",
+    )
+
+    # History Command
+    history_parser = subparsers.add_parser("history", help="Show stored metric history from the local metrics store")
+    history_parser.add_argument("--metric", default="*", help="Metric name or glob, e.g. 'node-1.heap_percent' or '*.write_queue'")
+    history_parser.add_argument("--since", default="1h", help="How far back to look, e.g. 30m, 2h, 7d (default: 1h)")
+    history_parser.add_argument(
+        "--tier",
+        choices=["auto", "raw", "1m", "1h"],
+        default="auto",
+        help="Resolution to read: raw samples or 1m/1h averages (default: finest tier covering --since)",
+    )
+
+    # Exporter Command
+    exporter_parser = subparsers.add_parser("exporter", help="Serve cluster metrics in OpenMetrics format for Prometheus")
+    exporter_parser.add_argument("--port", type=int, help="Port to listen on (default from config.json exporter_port)")
+    exporter_parser.add_argument("--host", default="0.0.0.0", help="Address to bind (default: 0.0.0.0)")
+    exporter_parser.add_argument(
+        "--interval",
+        type=float,
+        help="Seconds between background refreshes from the cluster (default from config.json exporter_refresh_interval)",
+    )
 
     # Translog Command
     translog_parser = subparsers.add_parser(
@@ -141,7 +583,6 @@ def main():
         help="Check translog stats (Uncommitted Ops is about Lucene flush/commit, not fsync timing)",
     )
     translog_parser.add_argument("--index", help="Optional index name for shard-level translog stats")
-    translog_parser.set_defaults(func=handle_translog)
 
     # Translog Mode Command
     translog_mode_parser = subparsers.add_parser(
@@ -176,7 +617,6 @@ def main():
         action="store_true",
         help="Skip confirmation prompt for disable",
     )
-    translog_mode_parser.set_defaults(func=handle_translog_mode)
 
     # Indices Command
     indices_parser = subparsers.add_parser("indices", help="Manage indices (list, delete, create, etc.)")
@@ -187,10 +627,27 @@ def main():
     indices_parser.add_argument("--name", "--index", dest="name", default=None, help="Index name")
     indices_parser.add_argument(
         "--pattern",
-        default=utils.CONFIG.get("default_index_pattern", "*"),
-        help="Index pattern for listing (default from config.json)",
+        help="Index pattern: for list (default from config.json), or to apply delete/close/open/update-* to every matching index",
+    )
+    indices_parser.add_argument(
+        "--from-file",
+        help="Apply delete/close/open/update-* to the index names or patterns in this file (one per line)",
+    )
+    indices_parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="With --pattern/--from-file: multi-index requests in flight at once (default from config.json bulk_admin.concurrency)",
+    )
+    indices_parser.add_argument(
+        "--rate",
+        type=float,
+        help="With --pattern/--from-file: max requests started per second, 0 = unlimited (default from config.json bulk_admin.requests_per_second)",
     )
-    indices_parser.set_defaults(func=handle_indices)
+    indices_parser.add_argument("--yes", action="store_true", help="Skip the confirmation prompt for delete and pattern/file actions")
+    indices_parser.add_argument("--sort", default="index", help="list: server-side sort, e.g. 'store.size:desc' or 'docs.count' (default: index)")
+    indices_parser.add_argument("--top", type=int, help="list: show only the top N indices (see --by)")
+    indices_parser.add_argument("--by", choices=["size", "docs", "health"], default="size", help="list: ranking for --top; health puts red, then yellow first (default: size)")
+    indices_parser.add_argument("--format", choices=["table", "ndjson", "csv"], default="table", help="list: output format; ndjson/csv stream one row per index (default: table)")
 
     # Ingest Command
     ingest_parser = subparsers.add_parser("ingest", help="Ingest sample logs")
@@ -199,7 +656,74 @@ def main():
         default=utils.CONFIG.get("default_ingest_index", "logs-sample"),
         help="Target index name (default from config.json)",
     )
-    ingest_parser.set_defaults(func=handle_ingest)
+    ingest_parser.add_argument(
+        "--workers",
+        type=int,
+        default=_coerce_int(utils.CONFIG.get("ingest_workers", 1), 1),
+        help="Concurrent bulk sender threads (default from config.json)",
+    )
+    ingest_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=_coerce_int(utils.CONFIG.get("ingest_batch_size", 500), 500),
+        help="Max documents per bulk request (default from config.json)",
+    )
+    ingest_parser.add_argument(
+        "--batch-bytes",
+        type=int,
+        default=_coerce_int(utils.CONFIG.get("ingest_batch_bytes", 5 * 1024 * 1024), 5 * 1024 * 1024),
+        help="Max bytes per bulk request (default from config.json)",
+    )
+    ingest_parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        default=None,
+        help="Grow/shrink the batch size from bulk latency, took and 429s (default from config.json ingest_adaptive.enabled)",
+    )
+    ingest_parser.add_argument(
+        "--path",
+        action="append",
+        help="Log file, directory or glob such as 'logs/*.log*' (repeatable; .gz/.bz2 are decompressed). Default: log_file_path from config.json",
+    )
+    ingest_parser.add_argument(
+        "--readers",
+        type=int,
+        default=_coerce_int(utils.CONFIG.get("ingest_readers", os.cpu_count() or 1), os.cpu_count() or 1),
+        help="Reader processes used when ingesting several files (default from config.json, else CPU count)",
+    )
+    ingest_parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Tail the file continuously (handles rotation/truncation) instead of a one-shot ingest",
+    )
+    ingest_parser.add_argument(
+        "--flush-ms",
+        type=int,
+        default=_coerce_int(utils.CONFIG.get("ingest_follow_flush_ms", 1000), 1000),
+        help="In --follow mode, send a partial batch once its oldest line is this old (default from config.json)",
+    )
+    ingest_parser.add_argument(
+        "--gzip",
+        action="store_true",
+        default=bool(utils.CONFIG.get("bulk_gzip", False)),
+        help="gzip-compress bulk request bodies (level from config.json gzip_level)",
+    )
+    ingest_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the last checkpointed byte offset instead of the start of the file",
+    )
+    ingest_parser.add_argument(
+        "--idempotent-ids",
+        action="store_true",
+        default=bool(utils.CONFIG.get("ingest_idempotent_ids", False)),
+        help="Derive each document _id from file path + byte offset so replays overwrite instead of duplicating",
+    )
+    ingest_parser.add_argument(
+        "--bulk-load-mode",
+        action="store_true",
+        help="Set refresh_interval=-1, replicas=0 and async translog for the run, then restore the original settings and wait for green",
+    )
 
     # Search Command
     search_parser = subparsers.add_parser("search", help="Search an index")
@@ -211,10 +735,44 @@ def main():
         default=_coerce_int(utils.CONFIG.get("default_search_size", 10), 10),
         help="Number of results (default from config.json)",
     )
-    search_parser.set_defaults(func=handle_search)
+    search_parser.add_argument(
+        "--export",
+        metavar="OUT_NDJSON",
+        help="Stream all matching documents to this NDJSON file (point-in-time + search_after)",
+    )
+    search_parser.add_argument(
+        "--page-size",
+        type=int,
+        default=_coerce_int(utils.CONFIG.get("export_page_size", 1000), 1000),
+        help="Hits per page for --export (default from config.json)",
+    )
+    search_parser.add_argument(
+        "--slices",
+        type=int,
+        default=1,
+        help="Parallel PIT slices for --export (default: 1)",
+    )
+
+    # Batch Command
+    batch_parser = subparsers.add_parser("batch", help="Run many ops.py commands in one process (shared config and connections)")
+    batch_parser.add_argument(
+        "plan",
+        nargs="?",
+        default="-",
+        help="Plan file: one command per line, or a .json/.yaml list of commands (default: - for stdin)",
+    )
+    batch_parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Commands run in parallel; commands on the same index still run in order (default from config.json batch_concurrency)",
+    )
+
+    return parser
+
 
-    args = parser.parse_args()
-    args.func(args)
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    COMMANDS[args.command](args)
 
 if __name__ == "__main__":
     main()
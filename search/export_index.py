@@ -0,0 +1,141 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils
+import argparse
+import threading
+import time
+
+
+def _coerce_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+PAGE_SIZE = _coerce_int(utils.CONFIG.get("export_page_size", 1000), 1000)
+KEEP_ALIVE = utils.CONFIG.get("export_keep_alive", "2m")
+
+
+def open_pit(index_name, keep_alive=KEEP_ALIVE):
+    data = utils.make_request(f"{index_name}/_pit?keep_alive={keep_alive}", method='POST')
+    return data.get('id') if data else None
+
+
+def close_pit(pit_id):
+    return utils.make_request("_pit", method='DELETE', data={"id": pit_id})
+
+
+class _Exporter:
+    """Shared state for the slice workers of one export."""
+
+    def __init__(self, out, pit_id, query, page_size, slices, keep_alive):
+        self.out = out
+        self.pit_id = pit_id
+        self.query = query
+        self.page_size = page_size
+        self.slices = slices
+        self.keep_alive = keep_alive
+        self.docs = 0
+        self.failed_slices = 0
+        self._lock = threading.Lock()
+        self._next_report = page_size * 10
+
+    def _write_page(self, hits):
+        lines = b"".join(
+            utils.json_dumps({"_index": hit.get('_index'), "_id": hit.get('_id'), "_source": hit.get('_source', {})}) + b"\n"
+            for hit in hits
+        )
+        with self._lock:
+            self.out.write(lines)
+            self.docs += len(hits)
+            if self.docs >= self._next_report:
+                print(f"Exported {self.docs} documents...")
+                self._next_report += self.page_size * 10
+
+    def run_slice(self, slice_id):
+        pit_id = self.pit_id
+        search_after = None
+        while True:
+            body = {
+                "size": self.page_size,
+                "pit": {"id": pit_id, "keep_alive": self.keep_alive},
+                # _shard_doc is the cheapest total order for PIT paging.
+                "sort": [{"_shard_doc": "asc"}],
+                "track_total_hits": False,
+            }
+            if self.query:
+                body["query"] = {"query_string": {"query": self.query}}
+            if self.slices > 1:
+                body["slice"] = {"id": slice_id, "max": self.slices}
+            if search_after is not None:
+                body["search_after"] = search_after
+
+            data = utils.make_request("_search", method='POST', data=body)
+            if not data:
+                print(f"Slice {slice_id}: search request failed; stopping this slice.")
+                with self._lock:
+                    self.failed_slices += 1
+                return
+            # The PIT id may change between pages; always continue with the latest one.
+            pit_id = data.get('pit_id', pit_id)
+            hits = data.get('hits', {}).get('hits', [])
+            if hits:
+                self._write_page(hits)
+                search_after = hits[-1].get('sort')
+            if len(hits) < self.page_size or search_after is None:
+                return
+
+
+def export_search(index_name, out_path, query=None, page_size=PAGE_SIZE, slices=1, keep_alive=KEEP_ALIVE):
+    """Stream every matching document of an index to an NDJSON file.
+
+    Pages through a point-in-time with search_after, so it is not limited by
+    index.max_result_window and only one page per worker is held in memory.
+    With `slices` > 1 the PIT is split into that many slices, each paged by its
+    own thread, to pull large indices in parallel.
+    """
+    pit_id = open_pit(index_name, keep_alive)
+    if not pit_id:
+        print(f"Failed to open a point-in-time on '{index_name}'.")
+        return None
+
+    slices = max(1, slices)
+    print(f"Exporting '{index_name}' to {out_path} ({slices} slice(s), {page_size} docs per page)...")
+    started = time.monotonic()
+    try:
+        with open(out_path, 'wb') as out:
+            exporter = _Exporter(out, pit_id, query, page_size, slices, keep_alive)
+            if slices == 1:
+                exporter.run_slice(0)
+            else:
+                threads = [
+                    threading.Thread(target=exporter.run_slice, args=(i,), name=f"export-slice-{i}")
+                    for i in range(slices)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+    finally:
+        close_pit(pit_id)
+
+    elapsed = max(time.monotonic() - started, 1e-9)
+    print(f"Exported {exporter.docs} documents to {out_path} in {elapsed:.2f}s ({exporter.docs / elapsed:.0f} docs/sec).")
+    if exporter.failed_slices:
+        print(f"Warning: {exporter.failed_slices} slice(s) stopped early; the export is incomplete.")
+    return exporter.docs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export an Elasticsearch index to NDJSON (PIT + search_after)")
+    parser.add_argument("--index", required=True, help="Index to export")
+    parser.add_argument("--out", required=True, help="Output NDJSON file")
+    parser.add_argument("--query", help="Query string (Lucene syntax, e.g. 'field:value')")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help=f"Hits per page (default: {PAGE_SIZE})")
+    parser.add_argument("--slices", type=int, default=1, help="Parallel PIT slices (default: 1)")
+
+    args = parser.parse_args()
+
+    export_search(args.index, args.out, args.query, args.page_size, args.slices)
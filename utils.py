@@ -1,5 +1,10 @@
-import urllib.request
-import urllib.error
+import http.client
+import urllib.parse
+import select
+import ssl
+import threading
+import time
+import zlib
 import json
 import sys
 import os
@@ -27,53 +32,552 @@ def load_config():
 load_config()
 ES_HOST = CONFIG.get("es_host", "http://localhost:9200")
 
+
+def _coerce_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _coerce_float(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+# Max idle keep-alive connections kept per host. Extra connections opened under
+# concurrency are closed when returned instead of being pooled.
+HTTP_POOL_SIZE = max(1, _coerce_int(CONFIG.get("http_pool_size", 10), 10))
+# Idle connections older than this are not reused. Load balancers and proxies
+# drop idle connections, often without telling the client.
+HTTP_KEEPALIVE = max(0.0, _coerce_float(CONFIG.get("http_keepalive_seconds", 30), 30.0))
+# Socket timeout in seconds; unset means none, as with urllib. Long state
+# changes (closing or deleting many indices, create waiting for active shards)
+# can take minutes on a busy master, and a client-side timeout would report
+# them failed while the master still applies them.
+HTTP_TIMEOUT = _coerce_float(CONFIG.get("http_timeout"), None)
+GZIP_LEVEL = min(9, max(1, _coerce_int(CONFIG.get("gzip_level", 3), 3)))
+# Uncompressed bodies are fed to the compressor in slices of this size, so a
+# compressed copy of the whole body never exists in memory.
+_GZIP_CHUNK = 256 * 1024
+
+
+def _build_auth_header():
+    username = CONFIG.get("es_username")
+    password = CONFIG.get("es_password")
+    if username and password:
+        auth_str = f"{username}:{password}"
+        b64_auth_str = base64.b64encode(auth_str.encode('utf-8')).decode('utf-8')
+        return f"Basic {b64_auth_str}"
+    return None
+
+# Basic Auth header is computed once per process, not per request.
+AUTH_HEADER = _build_auth_header()
+
+
+def _is_dropped(conn):
+    """True if an idle keep-alive connection can no longer be used.
+
+    An idle connection should have nothing to read. If its socket is readable,
+    the server has closed it (EOF) or sent something unexpected; either way it
+    must not carry the next request. TLS housekeeping (e.g. session tickets)
+    also makes the socket readable but yields no application data, so it is
+    told apart with a non-blocking read.
+    """
+    sock = conn.sock
+    if sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    if not readable:
+        return False
+    timeout = sock.gettimeout()
+    try:
+        sock.setblocking(False)
+        sock.recv(1)
+    except (ssl.SSLWantReadError, BlockingIOError):
+        return False
+    except OSError:
+        return True
+    finally:
+        try:
+            sock.settimeout(timeout)
+        except OSError:
+            pass
+    # EOF, or data nobody asked for.
+    return True
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections to a single host, reused across requests.
+
+    Idle connections are checked before reuse: ones the server has closed, or
+    that have been idle longer than `keepalive` seconds, are discarded, so a
+    request is only sent on a stale connection if it is closed in the instant
+    between the check and the send.
+    """
+
+    def __init__(self, scheme, host, port, maxsize=None, timeout=None, keepalive=None):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.maxsize = maxsize if maxsize is not None else HTTP_POOL_SIZE
+        self.timeout = timeout if timeout is not None else HTTP_TIMEOUT
+        self.keepalive = keepalive if keepalive is not None else HTTP_KEEPALIVE
+        # (connection, time it was returned), most recently used last.
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self):
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def get(self):
+        """Return (connection, reused). Most recently used connections are preferred."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, returned_at = self._idle.pop()
+            if time.monotonic() - returned_at > self.keepalive or _is_dropped(conn):
+                conn.close()
+                continue
+            return conn, True
+        return self._new_connection(), False
+
+    def put(self, conn):
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _returned_at in idle:
+            conn.close()
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(scheme, host, port):
+    key = (scheme, host, port)
+    pool = _POOLS.get(key)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(key)
+            if pool is None:
+                pool = ConnectionPool(scheme, host, port)
+                _POOLS[key] = pool
+    return pool
+
+
+def ensure_pool_size(size):
+    """Grow the per-host idle pool so `size` concurrent workers can all keep their connection."""
+    global HTTP_POOL_SIZE
+    with _POOLS_LOCK:
+        if size <= HTTP_POOL_SIZE:
+            return
+        HTTP_POOL_SIZE = size
+        for pool in _POOLS.values():
+            pool.maxsize = max(pool.maxsize, size)
+
+
+def close_connections():
+    """Close every pooled connection (e.g. before forking or at the end of a long run)."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    for pool in pools:
+        pool.close()
+
+
+class WireStats:
+    """Process-wide byte counters: body sizes before/after gzip, both directions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent_raw = 0
+        self.sent_wire = 0
+        self.received_raw = 0
+        self.received_wire = 0
+
+    def add(self, sent_raw=0, sent_wire=0, received_raw=0, received_wire=0):
+        with self._lock:
+            self.sent_raw += sent_raw
+            self.sent_wire += sent_wire
+            self.received_raw += received_raw
+            self.received_wire += received_wire
+
+    def summary(self):
+        def ratio(raw, wire):
+            return f"{raw / wire:.1f}x" if wire else "n/a"
+        mb = 1024 * 1024
+        return (
+            f"Request bodies: {self.sent_raw / mb:.2f} MB -> {self.sent_wire / mb:.2f} MB on the wire "
+            f"({ratio(self.sent_raw, self.sent_wire)}); "
+            f"responses: {self.received_wire / mb:.2f} MB on the wire -> {self.received_raw / mb:.2f} MB "
+            f"({ratio(self.received_raw, self.received_wire)})"
+        )
+
+
+WIRE_STATS = WireStats()
+
+
+class _GzipBody:
+    """Iterable gzip-compressed `body`, compressed one slice at a time.
+
+    `wire_size` is the compressed size once the body has been fully sent.
+    """
+
+    def __init__(self, body, level):
+        self.body = body
+        self.level = level
+        self.wire_size = 0
+
+    def __iter__(self):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        view = memoryview(self.body)
+        try:
+            for start in range(0, len(view), _GZIP_CHUNK):
+                chunk = compressor.compress(view[start:start + _GZIP_CHUNK])
+                if chunk:
+                    self.wire_size += len(chunk)
+                    yield chunk
+            chunk = compressor.flush()
+            self.wire_size += len(chunk)
+            yield chunk
+        finally:
+            view.release()
+
+
+def build_url(endpoint):
+    if not endpoint.startswith("http"):
+        return f"{ES_HOST}/{endpoint.lstrip('/')}"
+    return endpoint
+
+
+# JSON codec. The fastest installed backend is used for request/response
+# bodies; the standard library is always there as the fallback, so nothing
+# needs to be installed. `json_backend` in config.json pins one ("auto",
+# "orjson", "ujson", "simdjson" or "json").
+JSON_BACKENDS = ("orjson", "ujson", "simdjson", "json")
+_JSON_CODEC = None
+# Until something has loaded the codec, responses smaller than this are parsed
+# with the standard library: importing a fast backend costs more than it saves
+# on a one-shot health check.
+_JSON_LAZY_BYTES = 64 * 1024
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _load_json_backend(name):
+    """Return (name, loads, dumps) for one backend; raises ImportError if it is not installed."""
+    if name == "orjson":
+        import orjson
+        return name, orjson.loads, orjson.dumps
+    if name == "ujson":
+        import ujson
+
+        def dumps(obj):
+            return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+        return name, ujson.loads, dumps
+    if name == "simdjson":
+        import simdjson
+        # pysimdjson only speeds up parsing; encoding stays on the standard library.
+        return name, simdjson.loads, _stdlib_dumps
+    if name == "json":
+        return name, json.loads, _stdlib_dumps
+    raise ImportError(f"unknown JSON backend '{name}'")
+
+
+def _json_codec():
+    global _JSON_CODEC
+    if _JSON_CODEC is None:
+        wanted = str(CONFIG.get("json_backend", "auto")).lower()
+        candidates = JSON_BACKENDS if wanted == "auto" else (wanted, "json")
+        for name in candidates:
+            try:
+                _JSON_CODEC = _load_json_backend(name)
+                break
+            except ImportError:
+                if name == wanted:
+                    print(f"Warning: JSON backend '{wanted}' is not available; using the standard library.")
+    return _JSON_CODEC
+
+
+def json_backend():
+    """Name of the JSON backend in use."""
+    return _json_codec()[0]
+
+
+def json_loads(data):
+    """Decode JSON from bytes (or str) without an intermediate str copy. Raises ValueError on bad input."""
+    if _JSON_CODEC is None and len(data) < _JSON_LAZY_BYTES:
+        return json.loads(data)
+    return _json_codec()[1](data)
+
+
+def json_dumps(obj):
+    """Encode to compact UTF-8 JSON bytes."""
+    return _json_codec()[2](obj)
+
+
+# The pool discards idle connections the server has closed, but one can still
+# be closed in the instant before it is used. These errors on a reused
+# connection then mean "retry once on a fresh one" - but only when the server
+# cannot have acted on the request: it failed while still being sent, or the
+# method is idempotent. A POST (e.g. `_bulk`) that was fully sent may have been
+# processed, so the error goes to the caller's retry policy.
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+_IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "PUT", "DELETE", "OPTIONS"))
+
+
+def _can_resend(method, reused, sent):
+    return reused and (not sent or method.upper() in _IDEMPOTENT_METHODS)
+
+
+def perform_request(method, url, body=None, headers=None, compress=False):
+    """Send one request over a pooled keep-alive connection.
+
+    Returns (status, reason, response_bytes). Connection-level failures raise
+    OSError / http.client.HTTPException; HTTP error statuses are returned as-is.
+    Responses are always requested gzip-encoded and are decompressed here.
+    With `compress`, the body is gzip-compressed on the fly and streamed with
+    chunked transfer encoding (Content-Encoding: gzip).
+    """
+    parsed = urllib.parse.urlsplit(url)
+    scheme = parsed.scheme or "http"
+    port = parsed.port or (443 if scheme == "https" else 80)
+    path = parsed.path or "/"
+    if parsed.query:
+        path = f"{path}?{parsed.query}"
+
+    request_headers = {'Accept-Encoding': 'gzip'}
+    if AUTH_HEADER:
+        request_headers['Authorization'] = AUTH_HEADER
+    if headers:
+        request_headers.update(headers)
+    compress = compress and body is not None and len(body) > 0
+    if compress:
+        request_headers['Content-Encoding'] = 'gzip'
+
+    pool = get_pool(scheme, parsed.hostname, port)
+    while True:
+        conn, reused = pool.get()
+        sent = False
+        try:
+            # A fresh body per attempt, so a retried request re-compresses from the source.
+            payload = _GzipBody(body, GZIP_LEVEL) if compress else body
+            conn.request(method, path, body=payload, headers=request_headers)
+            sent = True
+            response = conn.getresponse()
+            response_data = response.read()
+        except _STALE_CONNECTION_ERRORS:
+            conn.close()
+            if _can_resend(method, reused, sent):
+                continue
+            raise
+        except BaseException:
+            conn.close()
+            raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            pool.put(conn)
+
+        # Only attempts that got a response are counted, so resends don't inflate the totals.
+        if compress:
+            WIRE_STATS.add(sent_raw=len(body), sent_wire=payload.wire_size)
+        elif body is not None:
+            WIRE_STATS.add(sent_raw=len(body), sent_wire=len(body))
+        wire_size = len(response_data)
+        if response_data and response.getheader('Content-Encoding', '').lower() == 'gzip':
+            response_data = zlib.decompress(response_data, 31)
+        WIRE_STATS.add(received_raw=len(response_data), received_wire=wire_size)
+        return response.status, response.reason, response_data
+
+
+def _iter_lines(pool, conn, response, chunk_size):
+    decompressor = None
+    if response.getheader('Content-Encoding', '').lower() == 'gzip':
+        decompressor = zlib.decompressobj(31)
+    pending = b""
+    wire_size = raw_size = 0
+    completed = False
+    try:
+        while True:
+            chunk = response.read(chunk_size)
+            if not chunk:
+                break
+            wire_size += len(chunk)
+            if decompressor is not None:
+                chunk = decompressor.decompress(chunk)
+            raw_size += len(chunk)
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line
+        if decompressor is not None:
+            tail = decompressor.flush()
+            raw_size += len(tail)
+            pending += tail
+        for line in pending.split(b"\n"):
+            if line:
+                yield line
+        completed = True
+    finally:
+        WIRE_STATS.add(received_raw=raw_size, received_wire=wire_size)
+        # A body abandoned half-way cannot be reused; only return fully read connections.
+        if completed and not response.will_close:
+            pool.put(conn)
+        else:
+            conn.close()
+
+
+# Per-thread destination for the error messages printed by make_request and
+# stream_request, so code fetching on several threads at once can show each
+# thread's errors next to its own output instead of wherever they land.
+_THREAD_OUTPUT = threading.local()
+
+
+def set_thread_output(stream):
+    """Send the calling thread's request error messages to `stream` (None = sys.stdout)."""
+    _THREAD_OUTPUT.stream = stream
+
+
+def report(message):
+    """Print an error message to the calling thread's output (see set_thread_output)."""
+    print(message, file=getattr(_THREAD_OUTPUT, 'stream', None))
+
+
+# Per-thread request counters, so a caller running several commands in one
+# process (ops.py batch) can tell which of them hit an error.
+_THREAD_REQUESTS = threading.local()
+
+
+def _count_request(failed):
+    counts = _THREAD_REQUESTS.__dict__
+    counts['requests'] = counts.get('requests', 0) + 1
+    if failed:
+        counts['failed'] = counts.get('failed', 0) + 1
+
+
+def thread_request_counts():
+    """(requests, failed) made by the calling thread through make_request/stream_request."""
+    counts = _THREAD_REQUESTS.__dict__
+    return counts.get('requests', 0), counts.get('failed', 0)
+
+
+def stream_request(endpoint, method='GET', chunk_size=64 * 1024):
+    """
+    Like make_request, but for large text responses (e.g. `_cat/*` without
+    format=json): returns an iterator over the response lines (bytes, without
+    the newline), read and gunzipped incrementally, or None on error. Memory use
+    stays at one chunk however large the response is.
+    """
+    url = build_url(endpoint)
+    parsed = urllib.parse.urlsplit(url)
+    scheme = parsed.scheme or "http"
+    port = parsed.port or (443 if scheme == "https" else 80)
+    path = parsed.path or "/"
+    if parsed.query:
+        path = f"{path}?{parsed.query}"
+    request_headers = {'Accept-Encoding': 'gzip'}
+    if AUTH_HEADER:
+        request_headers['Authorization'] = AUTH_HEADER
+
+    pool = get_pool(scheme, parsed.hostname, port)
+    while True:
+        conn, reused = pool.get()
+        sent = False
+        try:
+            conn.request(method, path, headers=request_headers)
+            sent = True
+            response = conn.getresponse()
+        except _STALE_CONNECTION_ERRORS as e:
+            conn.close()
+            if _can_resend(method, reused, sent):
+                continue
+            report(f"URL Error connecting to {url}: {e}")
+            _count_request(True)
+            return None
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            report(f"URL Error connecting to {url}: {e}")
+            _count_request(True)
+            return None
+        break
+
+    if response.status >= 400:
+        try:
+            response_data = response.read()
+        except (OSError, http.client.HTTPException):
+            response_data = b""
+        conn.close()
+        if response_data and response.getheader('Content-Encoding', '').lower() == 'gzip':
+            response_data = zlib.decompress(response_data, 31)
+        report(f"HTTP Error {response.status} for {method} {url}: {response.reason}")
+        if response_data:
+            report(f"Response body: {response_data.decode('utf-8', errors='replace')}")
+        _count_request(True)
+        return None
+    _count_request(False)
+    return _iter_lines(pool, conn, response, chunk_size)
+
+
 def make_request(endpoint, method='GET', data=None, headers=None):
     """
     Helper function to make HTTP requests to Elasticsearch.
     """
+    result = _make_request(endpoint, method, data, headers)
+    _count_request(result is None)
+    return result
+
+
+def _make_request(endpoint, method, data, headers):
     if headers is None:
         headers = {}
-    
+
     if data is not None and 'Content-Type' not in headers:
         headers['Content-Type'] = 'application/json'
 
-    if not endpoint.startswith("http"):
-        url = f"{ES_HOST}/{endpoint.lstrip('/')}"
-    else:
-        url = endpoint
+    url = build_url(endpoint)
 
     if data is not None and isinstance(data, (dict, list)):
-        data = json.dumps(data).encode('utf-8')
+        data = json_dumps(data)
     elif data is not None and isinstance(data, str):
         data = data.encode('utf-8')
 
-    # Add Basic Auth if credentials are provided
-    username = CONFIG.get("es_username")
-    password = CONFIG.get("es_password")
-    if username and password:
-        auth_str = f"{username}:{password}"
-        b64_auth_str = base64.b64encode(auth_str.encode('utf-8')).decode('utf-8')
-        headers['Authorization'] = f"Basic {b64_auth_str}"
-
-    req = urllib.request.Request(url, data=data, headers=headers, method=method)
-
     try:
-        with urllib.request.urlopen(req) as response:
-            response_data = response.read()
-            if response_data:
-                return json.loads(response_data)
-            return {}
-    except urllib.error.HTTPError as e:
-        print(f"HTTP Error {e.code} for {method} {url}: {e.reason}")
-        try:
-            error_body = e.read().decode()
-            print(f"Response body: {error_body}")
-        except:
-            pass
+        status, reason, response_data = perform_request(method, url, body=data, headers=headers)
+    except (OSError, http.client.HTTPException) as e:
+        report(f"URL Error connecting to {url}: {e}")
+        return None
+    except Exception as e:
+        report(f"Unexpected error: {e}")
         return None
-    except urllib.error.URLError as e:
-        print(f"URL Error connecting to {url}: {e.reason}")
+
+    if status >= 400:
+        report(f"HTTP Error {status} for {method} {url}: {reason}")
+        if response_data:
+            report(f"Response body: {response_data.decode('utf-8', errors='replace')}")
         return None
+
+    try:
+        if response_data:
+            return json_loads(response_data)
+        return {}
     except Exception as e:
-        print(f"Unexpected error: {e}")
+        report(f"Unexpected error: {e}")
         return None